@@ -18,8 +18,11 @@ import requests
 import os
 import pwd
 import atexit
+import logging
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 class MainWindow(Gtk.Window):
     def __init__(self, system_mode=False, system_only_mode=False):
         app_title = "Flatpost (user mode)"
@@ -65,14 +68,29 @@ class MainWindow(Gtk.Window):
             print(f"ERROR loading icon: {str(e)}")
 
 
-        # Store search results as an instance variable
-        self.all_apps = []
+        # Store search results as an immutable snapshot that is swapped as a whole on refresh
+        self.snapshot = fp_turbo.CatalogSnapshot()
+        # Cancels the metadata refresh started by refresh_data() while it runs
+        self.refresh_cancellable = None
+        # app id -> (row container, row data) for the apps on the current page
+        self.app_rows = {}
+        # Operations collected from the app dialogs, run together as one transaction
+        self.transaction_queue = fp_turbo.TransactionQueue(self.system_mode)
+        # Downloads pending updates in the background so "Update all" only has to deploy
+        staging_limit = os.environ.get("FLATPOST_STAGING_LIMIT_KBPS", "")
+        self.update_stager = fp_turbo.UpdateStager(
+            self.system_mode,
+            int(staging_limit) * 1024 if staging_limit.isdigit() else None
+        )
+        # (app id or None for the global override, system) -> fp_turbo.PermissionEditSession
+        self.permission_sessions = {}
+        # Same keys -> [(switch, state)] flipped since the session's last commit
+        self.pending_permission_switches = {}
+        self.updating_permission_switches = False
+        # app id -> {portal: switch} of the permissions window that is open
+        self.portal_switches = {}
         self.current_component_type = None
-        self.category_results = []  # Initialize empty list
         self.subcategory_buttons = {}
-        self.collection_results = []  # Initialize empty list
-        self.installed_results = []  # Initialize empty list
-        self.updates_results = []  # Initialize empty list
         self.current_page = None  # Track current page
         self.current_group = None  # Track current group (system/collections/categories)
 
@@ -466,6 +484,10 @@ class MainWindow(Gtk.Window):
                 padding: 20px;
                 background: none;
             }
+            .permissions-section {
+                border: 0px;
+                background: none;
+            }
             .permissions-header-label {
                 font-weight: bold;
                 font-size: 24px;
@@ -578,6 +600,33 @@ class MainWindow(Gtk.Window):
         # Select Trending by default
         self.select_default_category()
 
+        # Pick up installs, removals and updates made outside Flatpost
+        self.installation_monitor = fp_turbo.InstallationMonitor(self.on_installation_changed)
+        # And portal permissions changed by GNOME Settings or the apps themselves
+        self.portal_monitor = fp_turbo.PortalPermissionMonitor(self.on_portal_permissions_changed)
+
+    # Read-only views of the current snapshot. Code that reads more than one of
+    # these should take self.snapshot once and use it throughout.
+    @property
+    def all_apps(self):
+        return self.snapshot.all_apps
+
+    @property
+    def category_results(self):
+        return self.snapshot.category_results
+
+    @property
+    def collection_results(self):
+        return self.snapshot.collection_results
+
+    @property
+    def installed_results(self):
+        return self.snapshot.installed_results
+
+    @property
+    def updates_results(self):
+        return self.snapshot.updates_results
+
     def on_drag_data_received(self, widget, context, x, y, data, info, time):
         """Handle drag and drop events"""
         # Check if data is a URI list
@@ -703,6 +752,18 @@ class MainWindow(Gtk.Window):
         refresh_metadata_button.set_image(Gtk.Image.new_from_gicon(refresh_metadata_button_icon, Gtk.IconSize.BUTTON))
         refresh_metadata_button.connect("clicked", self.on_refresh_metadata_button_clicked)
 
+        # Add transaction queue button, the popover lists what is queued
+        self.queue_button = Gtk.MenuButton()
+        self.queue_button.set_size_request(26, 26)
+        self.queue_button.get_style_context().add_class("app-action-button")
+        self.queue_button.set_tooltip_text("Queued operations")
+        queue_button_icon = Gio.Icon.new_for_string('view-list-symbolic')
+        self.queue_button.set_image(Gtk.Image.new_from_gicon(queue_button_icon, Gtk.IconSize.BUTTON))
+        self.queue_button.set_always_show_image(True)
+        self.queue_popover = Gtk.Popover()
+        self.queue_button.set_popover(self.queue_popover)
+        self.update_queue_panel()
+
         parent_system_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         parent_system_box.set_vexpand(True)
         parent_system_box.set_valign(Gtk.Align.CENTER)
@@ -728,6 +789,7 @@ class MainWindow(Gtk.Window):
         system_box.pack_end(about_button, False, False, 0)
         system_box.pack_end(global_overrides_button, False, False, 0)
         system_box.pack_end(refresh_metadata_button, False, False, 0)
+        system_box.pack_end(self.queue_button, False, False, 0)
         parent_system_box.pack_end(system_box, False, False, 0)
         # Add system controls to header
         self.top_bar.pack_end(parent_system_box, False, False, 0)
@@ -864,6 +926,9 @@ class MainWindow(Gtk.Window):
     def on_system_mode_toggled(self, switch, gparam):
         """Handle system mode toggle switch state changes"""
         desired_state = switch.get_active()
+        # Results of a refresh for the other installation are useless now
+        self.cancel_refresh()
+        self.update_stager.stop()
 
         if desired_state:
             # Get current script path
@@ -953,6 +1018,7 @@ class MainWindow(Gtk.Window):
             destroy_with_parent=True
         )
         dialog.set_size_request(400, 100)
+        dialog.add_button("Cancel", Gtk.ResponseType.CANCEL)
 
         progress_bar = Gtk.ProgressBar()
         progress_bar.set_text("Initializing...")
@@ -965,53 +1031,90 @@ class MainWindow(Gtk.Window):
         # Show the dialog
         dialog.show_all()
 
-        searcher = fp_turbo.get_reposearcher(self.system_mode)
+        # Catalogs are loaded by the refresh itself, don't parse them twice
+        searcher = fp_turbo.AppstreamSearcher()
+        cancellable = Gio.Cancellable()
+        self.refresh_cancellable = cancellable
+
+        def update_progress(event):
+            if not cancellable.is_cancelled():
+                progress_bar.set_fraction(event.fraction)
+                progress_bar.set_text(str(event))
+            return False
+
+        def show_error(message):
+            error_dialog = Gtk.MessageDialog(
+                transient_for=self,
+                modal=True,
+                destroy_with_parent=True,
+                message_type=Gtk.MessageType.ERROR,
+                buttons=Gtk.ButtonsType.OK,
+                text=f"Error retrieving metadata: {message}"
+            )
+            error_dialog.run()
+            error_dialog.destroy()
+            return False
 
         # Define thread target function
         def retrieve_metadata():
             try:
-                category_results, collection_results, installed_results, updates_results, all_apps = searcher.retrieve_metadata(self.system_mode)
-                self.category_results = category_results
-                self.collection_results = collection_results
-                self.installed_results = installed_results
-                self.updates_results = updates_results
-                self.all_apps = all_apps
-            except Exception as e:
-                dialog = Gtk.MessageDialog(
-                    transient_for=None,  # Changed from self
-                    modal=True,
-                    destroy_with_parent=True,
-                    message_type=Gtk.MessageType.ERROR,
-                    buttons=Gtk.ButtonsType.OK,
-                    text=f"Error retrieving metadata: {str(e)}"
+                results = searcher.retrieve_metadata(
+                    self.system_mode,
+                    lambda event: GLib.idle_add(update_progress, event),
+                    cancellable
                 )
-                dialog.run()
-                dialog.destroy()
+                if results is not None:
+                    GLib.idle_add(publish, searcher.get_snapshot())
+            except Exception as e:
+                GLib.idle_add(show_error, str(e))
+            finally:
+                GLib.idle_add(finish)
+
+        def publish(snapshot):
+            # Cancel may have been pressed after the worker's last check, it runs on this thread
+            if not cancellable.is_cancelled():
+                # Publish the fully built snapshot in one assignment
+                self.snapshot = snapshot
+            return False
+
+        def finish():
+            if self.refresh_cancellable is cancellable:
+                dialog.response(Gtk.ResponseType.OK)
+            return False
+
         # Start the refresh thread
-        refresh_thread = threading.Thread(target=retrieve_metadata)
+        refresh_thread = threading.Thread(target=retrieve_metadata, daemon=True)
         refresh_thread.start()
-        def update_progress():
-            while refresh_thread.is_alive():
-                progress_bar.set_text("Fetching...")
-                progress = searcher.refresh_progress
-                progress_bar.set_fraction(progress / 100)
-                return True
-            else:
-                progress_bar.set_fraction(100 / 100)
-                dialog.destroy()
 
-        # Start the progress update timer
-        GLib.timeout_add_seconds(0.5, update_progress)
-        dialog.run()
-        if not refresh_thread.is_alive() and dialog.is_active():
-            dialog.destroy()
+        # Returns when the refresh finishes, or when the user cancels/closes the dialog
+        if dialog.run() != Gtk.ResponseType.OK:
+            # The worker stops at its next cancellation point, and a snapshot
+            # it already handed over is not published
+            cancellable.cancel()
+        self.refresh_cancellable = None
+        dialog.destroy()
+        self.start_update_staging()
+
+    def start_update_staging(self):
+        """Pull pending updates at low priority without deploying them"""
+        if self.updates_results and not self.update_stager.is_running():
+            self.update_stager.start(done_callback=lambda stager: GLib.idle_add(self._on_update_staging_done))
+
+    def _on_update_staging_done(self):
+        if self.current_page == "updates":
+            self.update_updates_available_bar("updates")
+        return False
+
+    def cancel_refresh(self):
+        """Abort a metadata refresh that is still running"""
+        if self.refresh_cancellable:
+            self.refresh_cancellable.cancel()
 
     def refresh_local(self):
         try:
             searcher = fp_turbo.get_reposearcher(self.system_mode)
-            installed_results, updates_results = searcher.refresh_local(self.system_mode)
-            self.installed_results = installed_results
-            self.updates_results = updates_results
+            installed_results, updates_results = searcher.refresh_local(self.system_mode, self.on_updates_revalidated)
+            self.snapshot = self.snapshot.with_installed(installed_results, updates_results)
         except Exception as e:
             message_type = Gtk.MessageType.ERROR
             dialog = Gtk.MessageDialog(
@@ -1139,6 +1242,8 @@ class MainWindow(Gtk.Window):
 
                 # Add label to the box
                 category_box.add(category_label)
+                if category == "updates":
+                    self.updates_badge_label = category_label
 
                 # Connect click event
                 category_box.connect("button-release-event",
@@ -1173,7 +1278,7 @@ class MainWindow(Gtk.Window):
 
         # Combine all searchable fields
         searchable_items = []
-        for app in self.all_apps:
+        for app in self.snapshot.all_apps:
             details = app.get_details()
             searchable_items.append({
                 'app': app,
@@ -1269,7 +1374,7 @@ class MainWindow(Gtk.Window):
                 label.get_style_context().add_class("active")
                 break
         
-        if self.updates_results == []:
+        if not self.updates_results:
             self.updates_available_bar.set_visible(False)
 
         self.current_page = category
@@ -1532,7 +1637,7 @@ class MainWindow(Gtk.Window):
             child.destroy()
 
         if category == "updates":
-            if self.updates_results != [] :
+            if self.updates_results:
                 self.updates_available_bar.get_style_context().add_class("updates_available_bar")
                 self.updates_available_bar.set_visible(True)
                 self.updates_available_bar.set_valign(Gtk.Align.CENTER)
@@ -1553,7 +1658,13 @@ class MainWindow(Gtk.Window):
                 buttons_box.pack_end(update_all_button, False, False, 0)
 
                 # Create left label
-                left_label = Gtk.Label(label="New updates are available")
+                label_text = "New updates are available"
+                staged = self.update_stager.staged_count()
+                if self.update_stager.is_running():
+                    label_text += " (downloading in the background)"
+                elif staged:
+                    label_text += f" ({min(staged, len(self.updates_results))} of {len(self.updates_results)} already downloaded)"
+                left_label = Gtk.Label(label=label_text)
                 left_label.set_halign(Gtk.Align.CENTER)
                 left_label.get_style_context().add_class("updates_available_bar_label")
                 self.updates_available_bar.pack_end(buttons_box, False, False, 0)
@@ -1573,21 +1684,33 @@ class MainWindow(Gtk.Window):
             text="Download and install all available Flatpak updates?",
             title="Confirm"
         )
+        self._add_plan_label(dialog.get_message_area())
+        dialog.show_all()
 
         # Show the dialog and get the response
         response = dialog.run()
 
         # Handle the response
         if response == Gtk.ResponseType.OK:
+            # Don't pull the same refs twice, what is staged so far gets deployed
+            self.update_stager.stop()
+
             # Perform Removal
             def perform_update():
                 # Show waiting dialog
                 GLib.idle_add(self.show_waiting_dialog, "Updating packages...")
 
-                success, message = fp_turbo.update_all_flatpaks(self.updates_results, self.system_mode)
+                # A staging transaction may still be writing to the repository
+                self.update_stager.stop(wait=True)
+
+                # Apps first and in small batches, so they become usable before runtimes finish
+                affected_refs = set()
+                success, message = fp_turbo.update_all_flatpaks(None, self.system_mode,
+                                                                self.task_progress_callback,
+                                                                "apps-first", 5, affected_refs)
 
                 # Update UI on main thread
-                GLib.idle_add(lambda: self.on_task_complete(dialog, success, message))
+                GLib.idle_add(lambda: self.on_task_complete(dialog, success, message, affected_refs))
 
             # Start spinner and begin installation
             thread = threading.Thread(target=perform_update)
@@ -1681,59 +1804,32 @@ class MainWindow(Gtk.Window):
         vadjustment = self.category_scrolled_window.get_vadjustment()
         vadjustment.set_value(vadjustment.get_lower())
 
+        # Read everything from one snapshot so a refresh can't mix old and new state
+        snapshot = self.snapshot
+
         # Load system data
         if 'installed' in category:
-            apps.extend([app for app in self.installed_results])
+            apps.extend([app for app in snapshot.installed_results])
         if 'updates' in category:
-            apps.extend([app for app in self.updates_results])
+            apps.extend([app for app in snapshot.updates_results])
 
         if ('installed' in category) or ('updates' in category):
             # Sort apps by component type priority
             if apps:
                 apps.sort(key=lambda app: self.get_app_priority(app.get_details()['kind']))
 
-        # Define paths
-        app_data_dir = Path.home() / ".local" / "share" / "flatpost"
-        system_data_dir = Path("/usr/share/flatpost")
-
-        # Ensure local directory exists
-        app_data_dir.mkdir(parents=True, exist_ok=True)
-
-        # Define file paths
-        json_path = app_data_dir / "collections_data.json"
-
-        # Load collections data
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                collections_data = json.load(f)
-
-                # Find the specific category in collections data
-                category_entry = next((
-                    entry for entry in collections_data
-                    if entry['category'] == category
-                ), None)
-
-                if category_entry:
-                    # Get all app IDs in this category
-                    app_ids_in_category = [
-                        hit['app_id'] for hit in category_entry['data']['hits']
-                    ]
-
-                    # Filter apps based on presence in category
-                    apps.extend([
-                        app for app in self.collection_results
-                        if app.get_details()['id'] in app_ids_in_category
-                    ])
-                else:
-                    # Fallback to previous behavior if category isn't in collections
-                    apps.extend([
-                        app for app in self.collection_results
-                        if category in app.get_details()['categories']
-                    ])
-
-        except (IOError, json.JSONDecodeError) as e:
+        # Collection membership was read from collections_data.json when the snapshot was built
+        app_ids_in_category = snapshot.collection_members.get(category)
+        if app_ids_in_category is not None:
+            # Filter apps based on presence in category
+            apps.extend([
+                app for app in snapshot.collection_results
+                if app.id in app_ids_in_category
+            ])
+        else:
+            # Fallback to previous behavior if category isn't in collections
             apps.extend([
-                app for app in self.collection_results
+                app for app in snapshot.collection_results
                 if category in app.get_details()['categories']
             ])
 
@@ -1897,6 +1993,7 @@ class MainWindow(Gtk.Window):
         """Clear all children from the right container."""
         for child in self.right_container.get_children():
             child.destroy()
+        self.app_rows = {}
 
     def _group_apps_by_id(self, apps):
         """Group applications by their IDs and collect repositories."""
@@ -1936,6 +2033,8 @@ class MainWindow(Gtk.Window):
         self.right_container.pack_start(container, False, False, 0)
         # self.right_container.pack_start(Gtk.Separator(), False, False, 0)
         self.right_container.show_all()
+        self.app_rows[details['id']] = (container, app_data)
+        return container
 
     def click_event(self, app=None, content=None):
         if content.get_style_context().has_class("hover-event") == True:
@@ -1945,9 +2044,10 @@ class MainWindow(Gtk.Window):
     def _get_app_status(self, app):
         """Determine installation and update status of an application."""
         details = app.get_details()
+        snapshot = self.snapshot
         return {
-            'is_installed': any(pkg.id == details['id'] for pkg in self.installed_results),
-            'is_updatable': any(pkg.id == details['id'] for pkg in self.updates_results),
+            'is_installed': details['id'] in snapshot.installed_ids,
+            'is_updatable': details['id'] in snapshot.updates_ids,
             'has_donation_url': bool(app.get_details().get('urls', {}).get('donation'))
         }
 
@@ -2162,6 +2262,136 @@ class MainWindow(Gtk.Window):
             if accent is True:
                 button.get_style_context().add_class("suggested-action")
 
+    def update_queue_panel(self):
+        """Rebuild the queue popover and the queued operation count"""
+        count = len(self.transaction_queue)
+        self.queue_button.set_label(f"  {count}" if count else "")
+        self.queue_button.set_sensitive(count > 0)
+
+        child = self.queue_popover.get_child()
+        if child:
+            self.queue_popover.remove(child)
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        box.set_border_width(12)
+        box.pack_start(Gtk.Label(label="Queued Operations"), False, False, 0)
+
+        listbox = Gtk.ListBox()
+        listbox.set_selection_mode(Gtk.SelectionMode.NONE)
+        for action, app, repo_name in self.transaction_queue:
+            row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
+            row.set_border_width(4)
+            text = f"{action.name.title()} {app.name}"
+            if repo_name:
+                text += f" ({repo_name})"
+            label = Gtk.Label(label=text, xalign=0)
+            label.set_hexpand(True)
+            row.pack_start(label, True, True, 0)
+
+            discard_button = Gtk.Button()
+            discard_button.set_tooltip_text("Remove from queue")
+            discard_button.set_image(Gtk.Image.new_from_icon_name("list-remove-symbolic", Gtk.IconSize.BUTTON))
+            discard_button.connect("clicked", self.on_queue_discard_clicked, app.id)
+            row.pack_end(discard_button, False, False, 0)
+            listbox.add(row)
+        box.pack_start(listbox, True, True, 0)
+
+        button_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
+        button_box.set_halign(Gtk.Align.END)
+        clear_button = Gtk.Button(label="Clear")
+        clear_button.connect("clicked", self.on_queue_clear_clicked)
+        run_button = Gtk.Button(label="Run All")
+        run_button.get_style_context().add_class("suggested-action")
+        run_button.connect("clicked", self.on_queue_run_clicked)
+        button_box.pack_start(clear_button, False, False, 0)
+        button_box.pack_start(run_button, False, False, 0)
+        box.pack_start(button_box, False, False, 0)
+
+        box.show_all()
+        self.queue_popover.add(box)
+
+    def on_queue_discard_clicked(self, button, app_id):
+        self.transaction_queue.discard(app_id)
+        self.update_queue_panel()
+
+    def on_queue_clear_clicked(self, button):
+        self.transaction_queue.clear()
+        self.queue_popover.popdown()
+        self.update_queue_panel()
+
+    def on_queue_run_clicked(self, button):
+        """Run everything queued as a single transaction"""
+        self.queue_popover.popdown()
+
+        def perform_queue():
+            GLib.idle_add(self.show_waiting_dialog, "Running queued operations...")
+            success, message = self.transaction_queue.run(self.task_progress_callback)
+
+            def complete():
+                self.update_queue_panel()
+                self.on_task_complete(None, success, message, self.transaction_queue.affected_refs)
+            GLib.idle_add(complete)
+
+        thread = threading.Thread(target=perform_queue)
+        thread.daemon = True
+        thread.start()
+
+    def _add_plan_label(self, box, action=None, app=None, repo_combo=None):
+        """
+        Add a download size and disk usage estimate to a confirmation dialog.
+
+        The estimate is resolved on a worker thread and filled in when ready.
+        Without an action it covers updating everything. When a repository
+        combo is given, the estimate is redone whenever its selection changes.
+        """
+        label = Gtk.Label(label="Estimating download size...")
+        label.set_line_wrap(True)
+        box.pack_start(label, False, False, 0)
+        alive = [True]
+        generation = [0]
+        label.connect("destroy", lambda widget: alive.clear())
+
+        def show_estimate(text, current):
+            if alive and current == generation[0]:
+                label.set_text(text)
+            return False
+
+        def start(widget=None):
+            generation[0] += 1
+            repo_name = repo_combo.get_active_text() if repo_combo else None
+            label.set_text("Estimating download size...")
+            thread = threading.Thread(target=estimate, args=(repo_name, generation[0]))
+            thread.daemon = True
+            thread.start()
+
+        def estimate(repo_name, current):
+            try:
+                if action is None:
+                    plan = fp_turbo.plan_update_all(self.system_mode)
+                else:
+                    queue = fp_turbo.TransactionQueue(self.system_mode)
+                    if action == fp_turbo.TransactionAction.INSTALL:
+                        queue.add_install(app, repo_name)
+                    elif action == fp_turbo.TransactionAction.REMOVE:
+                        queue.add_remove(app)
+                    else:
+                        queue.add_update(app)
+                    plan = queue.plan()
+                text = "\n".join([plan.summary()] + plan.messages)
+            except Exception as e:
+                text = f"Could not estimate download size: {str(e)}"
+            GLib.idle_add(show_estimate, text, current)
+
+        if repo_combo is not None:
+            handler = repo_combo.connect("changed", start)
+
+            def disconnect(widget):
+                if repo_combo.handler_is_connected(handler):
+                    repo_combo.disconnect(handler)
+
+            label.connect("destroy", disconnect)
+        start()
+
     def show_waiting_dialog(self, message="Please wait while task is running..."):
         """Show a modal dialog with a spinner"""
         self.waiting_dialog = Gtk.Dialog(
@@ -2184,9 +2414,31 @@ class MainWindow(Gtk.Window):
         box.pack_start(Gtk.Label(label=message), False, False, 0)
         box.pack_start(self.spinner, False, False, 0)
 
+        # Replaces the spinner once the transaction reports progress
+        self.task_progress_bar = Gtk.ProgressBar()
+        self.task_progress_bar.set_show_text(True)
+        self.task_progress_bar.set_size_request(400, -1)
+        self.task_progress_bar.set_no_show_all(True)
+        box.pack_start(self.task_progress_bar, False, False, 0)
+
         # Show dialog
         self.waiting_dialog.show_all()
 
+    def update_task_progress(self, event):
+        """Show a TransactionProgressEvent in the waiting dialog"""
+        if not getattr(self, "task_progress_bar", None):
+            return False
+        self.spinner.stop()
+        self.spinner.hide()
+        self.task_progress_bar.show()
+        self.task_progress_bar.set_fraction(event.fraction)
+        self.task_progress_bar.set_text(str(event))
+        return False
+
+    def task_progress_callback(self, event):
+        """Progress callback for fp_turbo transactions running on a worker thread"""
+        GLib.idle_add(self.update_task_progress, event)
+
     def on_install_clicked(self, button=None, app=None):
         """Handle the Install button click with installation options"""
         if not app:
@@ -2194,17 +2446,21 @@ class MainWindow(Gtk.Window):
             return
 
         title, label = self._get_dialog_details(app, button)
-        dialog = self._create_dialog(title)
+        dialog = self._create_dialog(title, queueable=bool(button))
         content_area = self._setup_dialog_content(dialog, label)
 
         if button and app:
             self._handle_repository_selection(content_area, app)
+            self._add_plan_label(content_area, fp_turbo.TransactionAction.INSTALL, app, self.repo_combo)
 
         dialog.show_all()
         response = dialog.run()
 
         if response == Gtk.ResponseType.OK:
             self._perform_installation(dialog, app, button)
+        elif response == Gtk.ResponseType.APPLY:
+            self.transaction_queue.add_install(app, self.repo_combo.get_active_text())
+            self.update_queue_panel()
 
         dialog.destroy()
 
@@ -2215,7 +2471,7 @@ class MainWindow(Gtk.Window):
             return f"Install {details['name']}?", f"Install: {details['id']}"
         return f"Install {app}?", f"Install: {app}"
 
-    def _create_dialog(self, title):
+    def _create_dialog(self, title, queueable=False):
         """Create and configure the dialog"""
         dialog = Gtk.Dialog(
             title=title,
@@ -2225,6 +2481,8 @@ class MainWindow(Gtk.Window):
         )
         # Add buttons using the new method
         dialog.add_button("Cancel", Gtk.ResponseType.CANCEL)
+        if queueable:
+            dialog.add_button("Add to Queue", Gtk.ResponseType.APPLY)
         dialog.add_button("Install", Gtk.ResponseType.OK)
         return dialog
 
@@ -2290,17 +2548,27 @@ class MainWindow(Gtk.Window):
         def installation_thread():
             GLib.idle_add(self.show_waiting_dialog)
             if button:
-                success, message = fp_turbo.install_flatpak(app, selected_repo, self.system_mode)
+                queue = fp_turbo.TransactionQueue(self.system_mode)
+                queue.add_install(app, selected_repo)
+                success, message = queue.run(self.task_progress_callback)
+                affected_refs = queue.affected_refs
             else:
-                success, message = fp_turbo.install_flatpakref(app, self.system_mode)
-            GLib.idle_add(lambda: self.on_task_complete(dialog, success, message))
+                success, message = fp_turbo.install_flatpakref(app, self.system_mode, self.task_progress_callback)
+                # The refs inside a .flatpakref aren't known here, fall back to a full refresh
+                affected_refs = None
+            GLib.idle_add(lambda: self.on_task_complete(dialog, success, message, affected_refs))
 
         thread = threading.Thread(target=installation_thread)
         thread.daemon = True
         thread.start()
 
-    def on_task_complete(self, dialog, success, message):
-        """Handle task completion"""
+    def on_task_complete(self, dialog, success, message, affected_refs=None):
+        """
+        Handle task completion.
+
+        With the refs the transaction touched only their state and rows are
+        updated, without them everything is reloaded through refresh_local().
+        """
         message_type = Gtk.MessageType.INFO
         if not success:
             message_type = Gtk.MessageType.ERROR
@@ -2315,9 +2583,84 @@ class MainWindow(Gtk.Window):
             )
             finished_dialog.run()
             finished_dialog.destroy()
-        self.refresh_local()
-        self.refresh_current_page()
+        if affected_refs is None:
+            self.refresh_local()
+            self.refresh_current_page()
+        else:
+            self.snapshot, changed_ids = fp_turbo.patch_installed_state(self.snapshot, affected_refs, self.system_mode)
+            self.refresh_app_rows(changed_ids)
+            self.update_updates_badge()
         self.waiting_dialog.destroy()
+        self.task_progress_bar = None
+
+    def on_installation_changed(self, system, refs):
+        """Apply changes another program made to the installation shown here"""
+        if system != self.system_mode:
+            return
+        self.snapshot, changed_ids = fp_turbo.patch_installed_state(self.snapshot, refs, system)
+        self.refresh_app_rows(changed_ids)
+        self.update_updates_badge()
+
+    def on_portal_permissions_changed(self, portal, app_ids):
+        """Show portal permission changes made elsewhere in the open permissions window"""
+        for app_id in app_ids & self.portal_switches.keys():
+            switches = self.portal_switches[app_id]
+            fp_turbo.portal_get_app_permissions_async(
+                app_id,
+                lambda success, result, switches=switches: self._on_portal_permissions(switches, success, result)
+            )
+
+    def on_updates_revalidated(self, system, updates):
+        """Called from the revalidation thread when the cached update check changed"""
+        GLib.idle_add(self._apply_revalidated_updates, system, updates)
+
+    def _apply_revalidated_updates(self, system, updates):
+        if system != self.system_mode:
+            return False
+        self.snapshot, changed_ids = fp_turbo.apply_pending_updates(self.snapshot, updates)
+        self.refresh_app_rows(changed_ids)
+        self.update_updates_badge()
+        self.start_update_staging()
+        return False
+
+    def update_updates_badge(self):
+        """Show the current number of updates next to Updates in the sidebar"""
+        label = getattr(self, "updates_badge_label", None)
+        if label is None:
+            return
+        title = GLib.markup_escape_text(self.category_groups['system']['updates'])
+        markup = f"{title} ({len(self.updates_results)})"
+        if label.get_style_context().has_class("active"):
+            markup += f" <span foreground='#3584e4'><b>❯</b></span>"
+        label.set_markup(markup)
+
+    def refresh_app_rows(self, app_ids):
+        """Re-render the rows of the given apps on the current page"""
+        if not app_ids:
+            return
+        if self.current_page in ("installed", "updates"):
+            # Which apps these pages list depends on install state, rebuild them from the snapshot
+            self.refresh_current_page()
+            return
+
+        for app_id in app_ids:
+            row = self.app_rows.get(app_id)
+            if row is None:
+                continue
+            container, app_data = row
+            if container.get_parent() is not self.right_container:
+                # The page was replaced without going through _clear_container()
+                continue
+            position = self.right_container.child_get_property(container, "position")
+            container.destroy()
+            new_container = self._create_and_add_app_row(app_data)
+            self.right_container.reorder_child(new_container, position)
+
+        try:
+            if self.details_window:
+                self.details_window.destroy() # Temporary solution for action buttons not updating on details window
+        except AttributeError:
+            logger.debug("Details window not opened")
 
 
     def on_remove_clicked(self, button, app):
@@ -2333,6 +2676,7 @@ class MainWindow(Gtk.Window):
         )
         # Add buttons using the new method
         dialog.add_button("Cancel", Gtk.ResponseType.CANCEL)
+        dialog.add_button("Add to Queue", Gtk.ResponseType.APPLY)
         dialog.add_button("Remove", Gtk.ResponseType.OK)
 
         # Create content area
@@ -2341,6 +2685,7 @@ class MainWindow(Gtk.Window):
         content_area.set_border_width(12)
 
         content_area.pack_start(Gtk.Label(label=f"Remove: {details['id']}?"), False, False, 0)
+        self._add_plan_label(content_area, fp_turbo.TransactionAction.REMOVE, app)
 
         # Show dialog
         dialog.show_all()
@@ -2353,15 +2698,20 @@ class MainWindow(Gtk.Window):
                 # Show waiting dialog
                 GLib.idle_add(self.show_waiting_dialog, "Removing package...")
 
-                success, message = fp_turbo.remove_flatpak(app, self.system_mode)
+                queue = fp_turbo.TransactionQueue(self.system_mode)
+                queue.add_remove(app)
+                success, message = queue.run(self.task_progress_callback)
 
                 # Update UI on main thread
-                GLib.idle_add(lambda: self.on_task_complete(dialog, success, message))
+                GLib.idle_add(lambda: self.on_task_complete(dialog, success, message, queue.affected_refs))
 
             # Start spinner and begin installation
             thread = threading.Thread(target=perform_removal)
             thread.daemon = True  # Allow program to exit even if thread is still running
             thread.start()
+        elif response == Gtk.ResponseType.APPLY:
+            self.transaction_queue.add_remove(app)
+            self.update_queue_panel()
 
         dialog.destroy()
 
@@ -2380,12 +2730,7 @@ class MainWindow(Gtk.Window):
         listbox.add(row_header)
 
         # Get permissions
-        global_success, global_perms = fp_turbo.global_list_other_perm_values(perm_type, True, self.system_mode)
-        if not global_success:
-            global_perms = {"paths": []}
-        success, perms = fp_turbo.list_other_perm_values(app_id, perm_type, self.system_mode)
-        if not success:
-            perms = {"paths": []}
+        perms, global_perms = self._permission_listings(perm_type)
 
         # Add Talks section
         talks_row = Gtk.ListBoxRow(selectable=False)
@@ -2640,6 +2985,7 @@ class MainWindow(Gtk.Window):
 
         owns_row.show_all()
         listbox.add(owns_row)
+        self._add_permission_notes(listbox, perm_type)
 
         spacing_box = Gtk.ListBoxRow(selectable=False)
         spacing_box.get_style_context().add_class("permissions-spacing-box")
@@ -2677,19 +3023,7 @@ class MainWindow(Gtk.Window):
         listbox.add(row_header)
 
         # Get permissions
-        if perm_type == "persistent":
-            success, perms = fp_turbo.list_other_perm_toggles(app_id, perm_type, self.system_mode)
-        else:
-            success, perms = fp_turbo.list_other_perm_values(app_id, perm_type, self.system_mode)
-        if not success:
-            perms = {"paths": []}
-
-        if perm_type == "persistent":
-            global_success, global_perms = fp_turbo.global_list_other_perm_toggles(perm_type, True, self.system_mode)
-        else:
-            global_success, global_perms = fp_turbo.global_list_other_perm_values(perm_type, True, self.system_mode)
-        if not global_success:
-            global_perms = {"paths": []}
+        perms, global_perms = self._permission_listings(perm_type)
 
 
         # First, create rows for global paths
@@ -2806,6 +3140,8 @@ class MainWindow(Gtk.Window):
                 hbox.pack_end(btn_box, False, False, 0)
                 listbox.add(row)
 
+        self._add_permission_notes(listbox, perm_type)
+
         # Add add button
         row = Gtk.ListBoxRow(selectable=False)
         row.get_style_context().add_class("permissions-row")
@@ -2838,12 +3174,7 @@ class MainWindow(Gtk.Window):
         listbox.add(row_header)
 
         # Get filesystem permissions
-        global_success, global_perms = fp_turbo.global_list_file_perms(True, self.system_mode)
-        if not global_success:
-            global_perms = {"paths": [], "special_paths": []}
-        success, perms = fp_turbo.list_file_perms(app_id, self.system_mode)
-        if not success:
-            perms = {"paths": [], "special_paths": []}
+        perms, global_perms = self._permission_listings("filesystems")
 
         # Add special paths as toggles
         special_paths = [
@@ -2879,6 +3210,7 @@ class MainWindow(Gtk.Window):
             in_global_perms = option in global_perms["special_paths"]
 
             switch.set_active(in_global_perms or in_perms)
+            source = self.app_permissions.source("filesystems", option)
             # Set sensitivity based on your requirements
             if in_global_perms:
                 switch.set_sensitive(False)  # Global permissions take precedence
@@ -2886,6 +3218,12 @@ class MainWindow(Gtk.Window):
                 indicator.get_style_context().add_class("global-indicator")
                 switch_box.pack_start(indicator, False, True, 0)
 
+            elif source in ("global", "override"):
+                # Revoked globally, or decided by the app's override file this window doesn't edit
+                switch.set_active(self.app_permissions.granted("filesystems", option))
+                switch.set_sensitive(False)
+                switch_box.pack_start(self._override_indicator(source), False, True, 0)
+
             elif in_perms:
                 switch.set_sensitive(True)   # Local permissions enabled and sensitive
 
@@ -3010,6 +3348,8 @@ class MainWindow(Gtk.Window):
                 hbox.pack_end(btn_box, False, False, 0)
                 listbox.add(row)
 
+        self._add_permission_notes(listbox, "filesystems")
+
         # Add add button
         row = Gtk.ListBoxRow(selectable=False)
         row.get_style_context().add_class("permissions-row")
@@ -3057,94 +3397,55 @@ class MainWindow(Gtk.Window):
         listbox.set_selection_mode(Gtk.SelectionMode.NONE)
         listbox.get_style_context().add_class("permissions-window")
 
-        indicator = Gtk.Label(label="* = global override", xalign=1.0)
+        indicator = Gtk.Label(label="* = global override, ** = app override", xalign=1.0)
         indicator.get_style_context().add_class("permissions-global-indicator")
-        # Add other sections with correct permission types
-        self._add_section(app_id, listbox, "Shared", "shared", [
-            ("Network", "network", "Can communicate over network"),
-            ("Inter-process communications", "ipc", "Can communicate with other applications")
-        ])
-        spacing_box = Gtk.ListBoxRow(selectable=False)
-        spacing_box.get_style_context().add_class("permissions-spacing-box")
-        listbox.add(spacing_box)
-
-        self._add_section(app_id, listbox, "Sockets", "sockets", [
-            ("X11 windowing system", "x11", "Can access X11 display server"),
-            ("Wayland windowing system", "wayland", "Can access Wayland display server"),
-            ("Fallback to X11 windowing system", "fallback-x11", "Can fallback to X11 if Wayland unavailable"),
-            ("PulseAudio sound server", "pulseaudio", "Can access PulseAudio sound system"),
-            ("D-Bus session bus", "session-bus", "Can communicate with session D-Bus"),
-            ("D-Bus system bus", "system-bus", "Can communicate with system D-Bus"),
-            ("Secure Shell agent", "ssh-auth", "Can access SSH authentication agent"),
-            ("Smart cards", "pcsc", "Can access smart card readers"),
-            ("Printing system", "cups", "Can access printing subsystem"),
-            ("GPG-Agent directories", "gpg-agent", "Can access GPG keyring"),
-            ("Inherit Wayland socket", "inherit-wayland-socket", "Can inherit existing Wayland socket")
+        # Sections are built once they scroll into view, see _add_lazy_sections()
+        self._add_lazy_sections(app_id, scrolled, listbox, [
+            ("Shared", lambda section: self._add_section(app_id, section, "Shared", "shared", [
+                ("Network", "network", "Can communicate over network"),
+                ("Inter-process communications", "ipc", "Can communicate with other applications")
+            ])),
+            ("Sockets", lambda section: self._add_section(app_id, section, "Sockets", "sockets", [
+                ("X11 windowing system", "x11", "Can access X11 display server"),
+                ("Wayland windowing system", "wayland", "Can access Wayland display server"),
+                ("Fallback to X11 windowing system", "fallback-x11", "Can fallback to X11 if Wayland unavailable"),
+                ("PulseAudio sound server", "pulseaudio", "Can access PulseAudio sound system"),
+                ("D-Bus session bus", "session-bus", "Can communicate with session D-Bus"),
+                ("D-Bus system bus", "system-bus", "Can communicate with system D-Bus"),
+                ("Secure Shell agent", "ssh-auth", "Can access SSH authentication agent"),
+                ("Smart cards", "pcsc", "Can access smart card readers"),
+                ("Printing system", "cups", "Can access printing subsystem"),
+                ("GPG-Agent directories", "gpg-agent", "Can access GPG keyring"),
+                ("Inherit Wayland socket", "inherit-wayland-socket", "Can inherit existing Wayland socket")
+            ])),
+            ("Devices", lambda section: self._add_section(app_id, section, "Devices", "devices", [
+                ("GPU Acceleration", "dri", "Can use hardware graphics acceleration"),
+                ("Input devices", "input", "Can access input devices"),
+                ("Virtualization", "kvm", "Can access virtualization services"),
+                ("Shared memory", "shm", "Can use shared memory"),
+                ("All devices (e.g. webcam)", "all", "Can access all device files")
+            ])),
+            ("Features", lambda section: self._add_section(app_id, section, "Features", "features", [
+                ("Development syscalls", "devel", "Can perform development operations"),
+                ("Programs from other architectures", "multiarch", "Can execute programs from other architectures"),
+                ("Bluetooth", "bluetooth", "Can access Bluetooth hardware"),
+                ("Controller Area Network bus", "canbus", "Can access CAN bus"),
+                ("Application Shared Memory", "per-app-dev-shm", "Can use shared memory for IPC")
+            ])),
+            ("Filesystems", lambda section: self._add_filesystem_section(app_id, app, section, "Filesystems")),
+            ("Persistent", lambda section: self._add_path_section(app_id, app, section, "Persistent", "persistent")),
+            ("Environment", lambda section: self._add_path_section(app_id, app, section, "Environment", "environment")),
+            ("System Bus", lambda section: self._add_bus_section(app_id, app, section, "System Bus", "system_bus")),
+            ("Session Bus", lambda section: self._add_bus_section(app_id, app, section, "Session Bus", "session_bus")),
+            ("Portals", lambda section: self._add_section(app_id, section, "Portals", section_options=[
+                ("Background", "background", "Can run in the background"),
+                ("Notifications", "notifications", "Can send notifications"),
+                ("Microphone", "microphone", "Can listen to your microphone"),
+                ("Speakers", "speakers", "Can play sounds to your speakers"),
+                ("Camera", "camera", "Can record videos with your camera"),
+                ("Location", "location", "Can access your location")
+            ])),
         ])
-        spacing_box = Gtk.ListBoxRow(selectable=False)
-        spacing_box.get_style_context().add_class("permissions-spacing-box")
-        listbox.add(spacing_box)
-
-        self._add_section(app_id, listbox, "Devices", "devices", [
-            ("GPU Acceleration", "dri", "Can use hardware graphics acceleration"),
-            ("Input devices", "input", "Can access input devices"),
-            ("Virtualization", "kvm", "Can access virtualization services"),
-            ("Shared memory", "shm", "Can use shared memory"),
-            ("All devices (e.g. webcam)", "all", "Can access all device files")
-        ])
-        spacing_box = Gtk.ListBoxRow(selectable=False)
-        spacing_box.get_style_context().add_class("permissions-spacing-box")
-        listbox.add(spacing_box)
-
-        self._add_section(app_id, listbox, "Features", "features", [
-            ("Development syscalls", "devel", "Can perform development operations"),
-            ("Programs from other architectures", "multiarch", "Can execute programs from other architectures"),
-            ("Bluetooth", "bluetooth", "Can access Bluetooth hardware"),
-            ("Controller Area Network bus", "canbus", "Can access CAN bus"),
-            ("Application Shared Memory", "per-app-dev-shm", "Can use shared memory for IPC")
-        ])
-        spacing_box = Gtk.ListBoxRow(selectable=False)
-        spacing_box.get_style_context().add_class("permissions-spacing-box")
-        listbox.add(spacing_box)
-
-        # Add Filesystems section
-        self._add_filesystem_section(app_id, app, listbox, "Filesystems")
-        spacing_box = Gtk.ListBoxRow(selectable=False)
-        spacing_box.get_style_context().add_class("permissions-spacing-box")
-        listbox.add(spacing_box)
-
-        self._add_path_section(app_id, app, listbox, "Persistent", "persistent")
-        spacing_box = Gtk.ListBoxRow(selectable=False)
-        spacing_box.get_style_context().add_class("permissions-spacing-box")
-        listbox.add(spacing_box)
-
-        self._add_path_section(app_id, app, listbox, "Environment", "environment")
-        spacing_box = Gtk.ListBoxRow(selectable=False)
-        spacing_box.get_style_context().add_class("permissions-spacing-box")
-        listbox.add(spacing_box)
-
-        self._add_bus_section(app_id, app, listbox, "System Bus", "system_bus")
-        spacing_box = Gtk.ListBoxRow(selectable=False)
-        spacing_box.get_style_context().add_class("permissions-spacing-box")
-        listbox.add(spacing_box)
-
-        self._add_bus_section(app_id, app, listbox, "Session Bus", "session_bus")
-        spacing_box = Gtk.ListBoxRow(selectable=False)
-        spacing_box.get_style_context().add_class("permissions-spacing-box")
-        listbox.add(spacing_box)
-
-        # Add Portals section
-        self._add_section(app_id, listbox, "Portals", section_options=[
-            ("Background", "background", "Can run in the background"),
-            ("Notifications", "notifications", "Can send notifications"),
-            ("Microphone", "microphone", "Can listen to your microphone"),
-            ("Speakers", "speakers", "Can play sounds to your speakers"),
-            ("Camera", "camera", "Can record videos with your camera"),
-            ("Location", "location", "Can access your location")
-        ])
-        spacing_box = Gtk.ListBoxRow(selectable=False)
-        spacing_box.get_style_context().add_class("permissions-spacing-box")
-        listbox.add(spacing_box)
 
         # Add widgets to container
         box_outer.pack_start(indicator, False, False, 0)
@@ -3153,10 +3454,184 @@ class MainWindow(Gtk.Window):
 
         # Connect destroy signal
         self.options_window.connect("destroy", lambda w: w.destroy())
+        self.options_window.connect("destroy", lambda w: self._flush_permission_session(app_id))
 
         # Show window
         self.options_window.show_all()
 
+    def _add_lazy_sections(self, app_id, scrolled, listbox, sections):
+        """
+        Add permission sections that are built once they scroll into view.
+
+        Each (title, build) pair starts out as a header with a spinner,
+        build(section_listbox) replaces it when the section first becomes
+        visible. The app's permissions are resolved on a worker thread before
+        any section is built, so the window shows up right away.
+        """
+        system = self.system_mode
+        pending = []
+        # (placeholder box, spinner) of every section, until the permissions are resolved
+        spinners = []
+        for section_title, build in sections:
+            section_listbox = Gtk.ListBox()
+            section_listbox.set_selection_mode(Gtk.SelectionMode.NONE)
+            section_listbox.get_style_context().add_class("permissions-section")
+
+            placeholder = Gtk.ListBoxRow(selectable=False)
+            placeholder.get_style_context().add_class("permissions-row")
+            # Roughly a built section, so few placeholders are in view at once
+            placeholder.set_size_request(-1, 200)
+            box_header = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+            label_header = Gtk.Label(label=section_title, xalign=0)
+            label_header.get_style_context().add_class("permissions-header-label")
+            box_header.pack_start(label_header, False, False, 0)
+            box_header.pack_start(Gtk.Separator(orientation=Gtk.Orientation.HORIZONTAL), False, False, 0)
+            spinner = Gtk.Spinner()
+            spinner.start()
+            box_header.pack_start(spinner, False, False, 0)
+            placeholder.add(box_header)
+            section_listbox.add(placeholder)
+
+            row = Gtk.ListBoxRow(selectable=False, activatable=False)
+            row.add(section_listbox)
+            listbox.add(row)
+            pending.append((section_listbox, build))
+            spinners.append((box_header, spinner))
+
+        loaded = False
+        closed = False
+        build_source = None
+
+        def in_view(widget):
+            translated, x, y = widget.translate_coordinates(listbox, 0, 0)
+            if not translated:
+                return False
+            adjustment = scrolled.get_vadjustment()
+            view_top = adjustment.get_value()
+            view_bottom = view_top + adjustment.get_page_size()
+            return y <= view_bottom and y + widget.get_allocated_height() >= view_top
+
+        def build_next():
+            nonlocal build_source
+            build_source = None
+            for entry in pending:
+                section_listbox, build = entry
+                if not in_view(section_listbox):
+                    continue
+                pending.remove(entry)
+                for child in section_listbox.get_children():
+                    child.destroy()
+                build(section_listbox)
+                spacing_box = Gtk.ListBoxRow(selectable=False)
+                spacing_box.get_style_context().add_class("permissions-spacing-box")
+                section_listbox.add(spacing_box)
+                section_listbox.show_all()
+                # The new rows move the sections below, look again once they are laid out
+                schedule_build()
+                break
+            return False
+
+        def schedule_build(*args):
+            nonlocal build_source
+            if loaded and pending and build_source is None:
+                build_source = GLib.idle_add(build_next)
+
+        def on_resolved(permissions):
+            nonlocal loaded
+            if closed:
+                return False
+            # Every section renders from this, see _permission_listings()
+            self.app_permissions = permissions
+            loaded = True
+            schedule_build()
+            return False
+
+        def on_failed(message):
+            if closed:
+                return False
+            # Nothing can be built, replace every spinner with the reason
+            pending.clear()
+            for box_header, spinner in spinners:
+                spinner.destroy()
+                label = Gtk.Label(label=f"Failed to read the permissions of {app_id}: {message}", xalign=0)
+                label.set_line_wrap(True)
+                label.get_style_context().add_class("permissions-item-summary")
+                box_header.pack_start(label, False, False, 0)
+                label.show()
+            return False
+
+        def resolve():
+            try:
+                permissions = fp_turbo.resolve_permissions(app_id, system)
+            except GLib.Error as e:
+                # E.g. the app was uninstalled while the window opened
+                GLib.idle_add(on_failed, str(e))
+                return
+            GLib.idle_add(on_resolved, permissions)
+
+        def on_destroy(widget):
+            nonlocal closed, build_source
+            closed = True
+            pending.clear()
+            if build_source is not None:
+                GLib.source_remove(build_source)
+                build_source = None
+
+        scrolled.get_vadjustment().connect("value-changed", schedule_build)
+        scrolled.connect("size-allocate", schedule_build)
+        listbox.connect("destroy", on_destroy)
+
+        thread = threading.Thread(target=resolve)
+        thread.daemon = True
+        thread.start()
+
+    def _permission_listings(self, perm_type):
+        """
+        Return (app, global) listings of a permission type for the open
+        permissions window. Grants the global override decides get the
+        "* = global override" treatment, the app listing only holds what the
+        app's metadata grants, the file this window edits. Entries from the
+        app's override file and revocations are shown by _add_permission_notes().
+        """
+        perms = self.app_permissions.listing(perm_type, ("metadata",))
+        global_perms = self.app_permissions.listing(perm_type, ("global",))
+        return perms, global_perms
+
+    def _override_indicator(self, source):
+        """Marker for a switch decided by the global ("*") or the app's ("**") override file"""
+        indicator = Gtk.Label(label="*" if source == "global" else "**", xalign=0)
+        indicator.get_style_context().add_class("global-indicator")
+        indicator.set_tooltip_text("Set by the global override" if source == "global"
+                                   else "Set by this app's override (flatpak override)")
+        return indicator
+
+    def _add_permission_notes(self, listbox, perm_type):
+        """
+        Add read-only rows for grants of the app's override file and for
+        revoked entries, which can't be changed from this window.
+        """
+        # Special filesystems are shown by their switches
+        listing = self.app_permissions.listing(perm_type, ("override",))
+        notes = [(entry, "** granted by this app's override") for entry in listing["paths"]]
+        for name in self.app_permissions.revoked(perm_type):
+            source = self.app_permissions.source(perm_type, name)
+            if perm_type == "filesystems" and name in fp_turbo.SPECIAL_FILESYSTEMS:
+                continue
+            notes.append((name, {"global": "* revoked by the global override",
+                                 "override": "** revoked by this app's override"}.get(source, "revoked by the app")))
+        for entry, note in notes:
+            row = Gtk.ListBoxRow(selectable=False)
+            row.get_style_context().add_class("permissions-row")
+            vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+            label = Gtk.Label(label=entry, xalign=0)
+            label.get_style_context().add_class("permissions-item-label")
+            desc = Gtk.Label(label=note, xalign=0)
+            desc.get_style_context().add_class("permissions-item-summary")
+            vbox.pack_start(label, True, True, 0)
+            vbox.pack_start(desc, True, True, 0)
+            row.add(vbox)
+            listbox.add(row)
+
     def _add_section(self, app_id, listbox, section_title, perm_type=None, section_options=None):
         """Helper method to add a section with multiple options"""
 
@@ -3175,24 +3650,10 @@ class MainWindow(Gtk.Window):
         # Handle portal permissions specially
         perms = {}
         global_perms = {}
-        if section_title == "Portals":
-            success, perms = fp_turbo.portal_get_app_permissions(app_id)
-            if not success:
-                perms = {}
-        elif section_title in ["Persistent", "Environment", "System Bus", "Session Bus"]:
-            global_success, global_perms = fp_turbo.global_list_other_perm_toggles(perm_type, True, self.system_mode)
-            if not global_success:
-                global_perms = {"paths": []}
-            success, perms = fp_turbo.list_other_perm_toggles(app_id, perm_type, self.system_mode)
-            if not success:
-                perms = {"paths": []}
-        else:
-            global_success, global_perms = fp_turbo.global_list_other_perm_toggles(perm_type, True, self.system_mode)
-            if not global_success:
-                global_perms = {"paths": []}
-            success, perms = fp_turbo.list_other_perm_toggles(app_id, perm_type, self.system_mode)
-            if not success:
-                perms = {"paths": []}
+        # Portal switches are filled in by _on_portal_permissions() once the permission store replies
+        portal_switches = {}
+        if section_title != "Portals":
+            perms, global_perms = self._permission_listings(perm_type)
         if section_options:
             # Add options
             for display_text, option, description in section_options:
@@ -3219,11 +3680,8 @@ class MainWindow(Gtk.Window):
 
                 # Handle portal permissions differently
                 if section_title == "Portals":
-                    if option in perms:
-                        switch.set_active(perms[option] == 'yes')
-                        switch.set_sensitive(True)
-                    else:
-                        switch.set_sensitive(False)
+                    switch.set_sensitive(False)
+                    portal_switches[option] = switch
                 else:
                     # First check if option exists in either perms or global_perms
                     in_perms = option.lower() in [p.lower() for p in perms["paths"]]
@@ -3231,6 +3689,7 @@ class MainWindow(Gtk.Window):
 
                     # Set active state based on precedence rules
                     switch.set_active(in_global_perms or in_perms)
+                    source = self.app_permissions.source(perm_type, option.lower())
 
                     # Set sensitivity based on your requirements
                     if in_global_perms:
@@ -3239,6 +3698,12 @@ class MainWindow(Gtk.Window):
                         indicator.get_style_context().add_class("global-indicator")
                         switch_box.pack_start(indicator, False, True, 0)
 
+                    elif source in ("global", "override"):
+                        # Revoked globally, or decided by the app's override file this window doesn't edit
+                        switch.set_active(self.app_permissions.granted(perm_type, option.lower()))
+                        switch.set_sensitive(False)
+                        switch_box.pack_start(self._override_indicator(source), False, True, 0)
+
                     elif in_perms:
                         switch.set_sensitive(True)   # Local permissions enabled and sensitive
 
@@ -3249,27 +3714,96 @@ class MainWindow(Gtk.Window):
 
                 listbox.add(row)
 
+        if portal_switches:
+            cancellable = Gio.Cancellable()
+            self.portal_switches[app_id] = portal_switches
+
+            def on_destroy(widget):
+                cancellable.cancel()
+                if self.portal_switches.get(app_id) is portal_switches:
+                    del self.portal_switches[app_id]
+            listbox.connect("destroy", on_destroy)
+            fp_turbo.portal_get_app_permissions_async(
+                app_id,
+                lambda success, result: self._on_portal_permissions(portal_switches, success, result),
+                cancellable
+            )
+
+    def _on_portal_permissions(self, portal_switches, success, perms):
+        """Set the portal switches from the permission store's reply"""
+        if not success:
+            # No entries for the app at all
+            perms = {}
+        self.updating_permission_switches = True
+        try:
+            for option, switch in portal_switches.items():
+                if option in perms:
+                    switch.set_active(perms[option] == 'yes')
+                switch.set_sensitive(option in perms)
+        finally:
+            self.updating_permission_switches = False
+
     def _on_switch_toggled(self, switch, state, app_id, perm_type, option):
         """Handle switch toggle events"""
+        if self.updating_permission_switches:
+            return
         if perm_type is None:  # Portal section
-            success, message = fp_turbo.portal_set_app_permissions(
+            def on_portal_set(success, message):
+                if not success:
+                    self._revert_permission_switches([(switch, state)])
+                    print(f"Error: {message}")
+            fp_turbo.portal_set_app_permissions_async(
                 option.lower(),
                 app_id,
-                "yes" if state else "no"
+                "yes" if state else "no",
+                on_portal_set
             )
         else:
-            success, message = fp_turbo.toggle_other_perms(
-                app_id,
-                perm_type,
-                option.lower(),
-                state,
-                self.system_mode
-            )
+            self._queue_permission_toggle(app_id, switch, state, perm_type, option.lower())
+
+    def _permission_session(self, app_id):
+        """Return the edit session of an app, or of the global override if app_id is None"""
+        key = (app_id, self.system_mode)
+        session = self.permission_sessions.get(key)
+        if session is None:
+            session = fp_turbo.PermissionEditSession(app_id, app_id is None, self.system_mode)
+            self.permission_sessions[key] = session
+        return session
+
+    def _queue_permission_toggle(self, app_id, switch, state, perm_type, option):
+        """Record a switch change, rapid changes are written together once they settle"""
+        key = (app_id, self.system_mode)
+        session = self._permission_session(app_id)
+        success, message = session.toggle(perm_type, option, state)
+        if not success:
+            self._revert_permission_switches([(switch, state)])
+            print(f"Error: {message}")
+            return
+        self.pending_permission_switches.setdefault(key, []).append((switch, state))
+        session.schedule_commit(callback=lambda ok, msg: self._on_permission_commit(key, ok, msg))
 
+    def _on_permission_commit(self, key, success, message):
+        switches = self.pending_permission_switches.pop(key, [])
         if not success:
-            switch.set_active(not state)
+            # Nothing was written, put every switch of the batch back
+            self._revert_permission_switches(reversed(switches))
             print(f"Error: {message}")
 
+    def _revert_permission_switches(self, switches):
+        # The toggle handlers ignore changes the window makes itself
+        self.updating_permission_switches = True
+        try:
+            for switch, state in switches:
+                switch.set_active(not state)
+        finally:
+            self.updating_permission_switches = False
+
+    def _flush_permission_session(self, app_id):
+        """Write pending toggles right away, e.g. when the permissions window closes"""
+        session = self.permission_sessions.get((app_id, self.system_mode))
+        if session and session.pending:
+            session.flush()
+
     def _on_remove_path(self, button, app_id, app, path, perm_type=None):
         """Handle remove path button click"""
         if perm_type:
@@ -3901,6 +4435,7 @@ class MainWindow(Gtk.Window):
 
         # Connect destroy signal
         self.global_options_window.connect("destroy", lambda w: w.destroy())
+        self.global_options_window.connect("destroy", lambda w: self._flush_permission_session(None))
 
         # Show window
         self.global_options_window.show_all()
@@ -3967,17 +4502,9 @@ class MainWindow(Gtk.Window):
 
     def _global_on_switch_toggled(self, switch, state, perm_type, option):
         """Handle switch toggle events"""
-        success, message = fp_turbo.global_toggle_other_perms(
-                perm_type,
-                option.lower(),
-                state,
-                True,
-                self.system_mode
-            )
-
-        if not success:
-            switch.set_active(not state)
-            print(f"Error: {message}")
+        if self.updating_permission_switches:
+            return
+        self._queue_permission_toggle(None, switch, state, perm_type, option.lower())
 
     def _global_on_remove_path(self, button, path, perm_type=None):
         """Handle remove path button click"""
@@ -4120,6 +4647,7 @@ class MainWindow(Gtk.Window):
         )
         # Add buttons using the new method
         dialog.add_button("Cancel", Gtk.ResponseType.CANCEL)
+        dialog.add_button("Add to Queue", Gtk.ResponseType.APPLY)
         dialog.add_button("Update", Gtk.ResponseType.OK)
 
         # Create content area
@@ -4128,6 +4656,7 @@ class MainWindow(Gtk.Window):
         content_area.set_border_width(12)
 
         content_area.pack_start(Gtk.Label(label=f"Update: {details['id']}?"), False, False, 0)
+        self._add_plan_label(content_area, fp_turbo.TransactionAction.UPDATE, app)
 
         # Show dialog
         dialog.show_all()
@@ -4140,15 +4669,20 @@ class MainWindow(Gtk.Window):
                 # Show waiting dialog
                 GLib.idle_add(self.show_waiting_dialog, "Updating package...")
 
-                success, message = fp_turbo.update_flatpak(app, self.system_mode)
+                queue = fp_turbo.TransactionQueue(self.system_mode)
+                queue.add_update(app)
+                success, message = queue.run(self.task_progress_callback)
 
                 # Update UI on main thread
-                GLib.idle_add(lambda: self.on_task_complete(dialog, success, message))
+                GLib.idle_add(lambda: self.on_task_complete(dialog, success, message, queue.affected_refs))
 
             # Start spinner and begin installation
             thread = threading.Thread(target=perform_update)
             thread.daemon = True  # Allow program to exit even if thread is still running
             thread.start()
+        elif response == Gtk.ResponseType.APPLY:
+            self.transaction_queue.add_update(app)
+            self.update_queue_panel()
 
         dialog.destroy()
 
@@ -4237,7 +4771,7 @@ class MainWindow(Gtk.Window):
         if os.path.exists(local_path):
             image.set_from_file(local_path)
         else:
-            if fp_turbo.check_internet():
+            if fp_turbo.check_internet(wait=False):
                 try:
                     if not self.download_screenshot(url, local_path):
                         print("Failed to download screenshot")
@@ -50,12 +50,29 @@ import os
 import sys
 import json
 import time
-import dbus
+import threading
+import itertools
+import copy
+import concurrent.futures
+import csv
+import fnmatch
+from types import MappingProxyType
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Ways AppstreamSearcher can load remote metadata:
+#   xml  - parse appstream.xml.gz with AppStream.Metadata on every run
+#   pool - let AppStream.Pool load the catalog and keep its binary cache between runs
+APPSTREAM_BACKENDS = ("xml", "pool")
+
+# Packages built from the last load of each remote's catalog, keyed by the
+# remote's appstream directory: (appstream.xml.gz signature, {bundle id: package}).
+# While the file is unchanged a refresh reuses the packages instead of rebuilding them.
+_catalog_cache: dict[str, tuple[tuple | None, dict[str, "AppStreamPackage"]]] = {}
+_catalog_cache_lock = threading.Lock()
+
 class Match(IntEnum):
     NAME = 1
     ID = 2
@@ -139,6 +156,28 @@ class AppStreamPackage:
         self.developer = self.component.get_developer().get_name()
         self.categories = self._get_categories()
 
+    def with_component(self, comp: AppStream.Component, remote: Flatpak.Remote) -> "AppStreamPackage":
+        """
+        Return a new package for comp that shares this one's derived data.
+
+        Only valid when comp has the same content, e.g. was parsed from the
+        same unchanged catalog file. This package is left untouched, snapshots
+        holding it keep seeing the data they were built with.
+        """
+        package = copy.copy(self)
+        package.component = comp
+        package.remote = remote
+        package.repo_name = remote.get_name()
+        package.screenshots = comp.get_screenshots_all()
+        package.match = Match.NONE
+        return package
+
+    def content_key(self) -> tuple:
+        """Derived data compared to tell whether a package changed between two catalog loads"""
+        return (self.name, self.summary, self.version, self.description, self.flatpak_bundle, self.icon_url,
+                self.icon_filename, tuple(sorted(self.urls.items())), self.developer, tuple(self.categories),
+                len(self.screenshots))
+
     @property
     def id(self) -> str:
         return self.component.get_id()
@@ -255,13 +294,189 @@ class AppStreamPackage:
             "component": self.component,
         }
 
+class CatalogDelta:
+    """Change set between two loads of a remote's AppStream catalog"""
+
+    def __init__(self, remote_name: str, added: list[AppStreamPackage], changed: list[AppStreamPackage],
+                 removed: list[AppStreamPackage], unchanged: int, initial=False) -> None:
+        self.remote_name = remote_name
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+        self.unchanged = unchanged
+        # True when there was nothing cached to compare against
+        self.initial = initial
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+    def changed_ids(self) -> set[str]:
+        """App ids whose rows, index entries or cached state need updating"""
+        return {package.id for package in self.added + self.changed + self.removed}
+
+    def __str__(self) -> str:
+        return (f"{self.remote_name}: {len(self.added)} added, {len(self.changed)} changed, "
+                f"{len(self.removed)} removed, {self.unchanged} unchanged")
+
+_snapshot_generation = itertools.count(1)
+
+class CatalogSnapshot:
+    """
+    Immutable view of everything the searcher knows about the catalog.
+
+    A snapshot is built completely before it is published, and publishing is a
+    single reference assignment, so readers that grab one snapshot and keep
+    using it always see packages, collection membership and installed/update
+    state that belong together, without taking any lock.
+    """
+
+    __slots__ = ("generation", "category_results", "collection_results", "installed_results",
+                 "updates_results", "all_apps", "apps_by_id", "apps_by_remote", "collection_members",
+                 "installed_ids", "updates_ids")
+
+    def __init__(self, category_results=(), collection_results=(), installed_results=(),
+                 updates_results=(), all_apps=(), collection_members=None) -> None:
+        set_attr = object.__setattr__
+        set_attr(self, "generation", next(_snapshot_generation))
+        set_attr(self, "category_results", tuple(category_results))
+        set_attr(self, "collection_results", tuple(collection_results))
+        set_attr(self, "installed_results", tuple(installed_results))
+        set_attr(self, "updates_results", tuple(updates_results))
+        set_attr(self, "all_apps", tuple(all_apps))
+
+        apps_by_id = {}
+        apps_by_remote = {}
+        for app in self.all_apps:
+            apps_by_id.setdefault(app.id, app)
+            apps_by_remote.setdefault((app.repo_name, app.id), app)
+        set_attr(self, "apps_by_id", MappingProxyType(apps_by_id))
+        # (remote, id) -> package, for when the first package with an id is from another remote
+        set_attr(self, "apps_by_remote", MappingProxyType(apps_by_remote))
+
+        members = {category: frozenset(app_ids) for category, app_ids in (collection_members or {}).items()}
+        set_attr(self, "collection_members", MappingProxyType(members))
+        set_attr(self, "installed_ids", frozenset(app.id for app in self.installed_results))
+        set_attr(self, "updates_ids", frozenset(app.id for app in self.updates_results))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CatalogSnapshot is immutable, publish a new snapshot instead")
+
+    def __delattr__(self, name):
+        raise AttributeError("CatalogSnapshot is immutable, publish a new snapshot instead")
+
+    def with_installed(self, installed_results, updates_results) -> "CatalogSnapshot":
+        """Return a new snapshot sharing this catalog but with different installed/update state"""
+        return CatalogSnapshot(self.category_results, self.collection_results, installed_results,
+                               updates_results, self.all_apps, self.collection_members)
+
+    def results(self) -> tuple:
+        """Return the snapshot in the tuple layout used by retrieve_metadata()"""
+        return (
+            list(self.category_results),
+            list(self.collection_results),
+            list(self.installed_results),
+            list(self.updates_results),
+            list(self.all_apps)
+        )
+
+class RefreshPhase(IntEnum):
+    """Stages of AppstreamSearcher.retrieve_metadata(), in the order they run"""
+
+    SYNC_REMOTES = 1
+    """Download AppStream data for every enabled remote."""
+
+    PARSE_CATALOGS = 2
+    """Build packages from the downloaded catalogs."""
+
+    FETCH_COLLECTIONS = 3
+    """Fetch collection and category listings from the Flathub API."""
+
+    RESOLVE_COLLECTIONS = 4
+    """Map collection and category entries to packages."""
+
+    INSTALLED_UPDATES = 5
+    """Query installed apps and available updates."""
+
+    DONE = 6
+    CANCELLED = 7
+
+REFRESH_PHASE_TITLES = {
+    RefreshPhase.SYNC_REMOTES: "Syncing remotes",
+    RefreshPhase.PARSE_CATALOGS: "Reading catalogs",
+    RefreshPhase.FETCH_COLLECTIONS: "Fetching collections",
+    RefreshPhase.RESOLVE_COLLECTIONS: "Resolving collections",
+    RefreshPhase.INSTALLED_UPDATES: "Checking installed apps and updates",
+    RefreshPhase.DONE: "Done",
+    RefreshPhase.CANCELLED: "Cancelled",
+}
+
+# Share of the overall refresh each phase accounts for
+_REFRESH_PHASE_WEIGHTS = {
+    RefreshPhase.SYNC_REMOTES: 0.35,
+    RefreshPhase.PARSE_CATALOGS: 0.2,
+    RefreshPhase.FETCH_COLLECTIONS: 0.2,
+    RefreshPhase.RESOLVE_COLLECTIONS: 0.1,
+    RefreshPhase.INSTALLED_UPDATES: 0.15,
+}
+
+class RefreshProgress:
+    """Progress event emitted while retrieve_metadata() runs"""
+
+    def __init__(self, phase: RefreshPhase, current=0, total=0, message="",
+                 bytes_done=0, bytes_total=0) -> None:
+        self.phase = phase
+        # Items (remotes, categories, apps) finished out of the phase total
+        self.current = current
+        self.total = total
+        self.message = message
+        # Catalog bytes downloaded or read so far, 0 when not known
+        self.bytes_done = bytes_done
+        self.bytes_total = bytes_total
+
+    @property
+    def title(self) -> str:
+        return REFRESH_PHASE_TITLES[self.phase]
+
+    @property
+    def fraction(self) -> float:
+        """Overall progress of the whole refresh, from 0.0 to 1.0"""
+        if self.phase == RefreshPhase.DONE:
+            return 1.0
+        if self.phase == RefreshPhase.CANCELLED:
+            return 0.0
+        finished = sum(weight for phase, weight in _REFRESH_PHASE_WEIGHTS.items() if phase < self.phase)
+        within = min(self.current / self.total, 1.0) if self.total else 0.0
+        return finished + _REFRESH_PHASE_WEIGHTS[self.phase] * within
+
+    def __str__(self) -> str:
+        text = self.title
+        if self.message:
+            text += f": {self.message}"
+        if self.total:
+            text += f" ({int(self.current)}/{self.total})"
+        if self.bytes_done:
+            text += f" - {GLib.format_size(self.bytes_done)}"
+            if self.bytes_total:
+                text += f" of {GLib.format_size(self.bytes_total)}"
+        return text
+
 class AppstreamSearcher:
     """Flatpak AppStream Package seacher"""
 
-    def __init__(self, refresh=False) -> None:
+    def __init__(self, refresh=False, backend=None) -> None:
         self.remotes: dict[str, list[AppStreamPackage]] = {}
         self.refresh_progress = 0
         self.refresh = refresh
+        self.backend = backend or os.environ.get("FLATPOST_APPSTREAM_BACKEND", "xml")
+        if self.backend not in APPSTREAM_BACKENDS:
+            logger.warning(f"Unknown AppStream backend '{self.backend}', using xml")
+            self.backend = "xml"
+        # Seconds spent loading each remote's metadata, for benchmarking backends
+        self.load_times: dict[str, float] = {}
+        # What changed in each remote's catalog compared to the previous load
+        self.catalog_deltas: dict[str, CatalogDelta] = {}
+        # Last published catalog state, replaced as a whole by publish_snapshot()
+        self.snapshot = CatalogSnapshot()
 
         # Define category groups and their titles
         self.category_groups = {
@@ -405,38 +620,147 @@ class AppstreamSearcher:
         """Add packages for a given Flatpak.Remote"""
         remote_name = remote.get_name()
         if remote_name not in self.remotes:
-            self.remotes[remote_name] = self._load_appstream_metadata(remote, inst)
-    def _load_appstream_metadata(self, remote: Flatpak.Remote, inst: Flatpak.Installation) -> list[AppStreamPackage]:
-        """load AppStrean metadata and create AppStreamPackage objects"""
-        packages = []
-        metadata = AppStream.Metadata.new()
-        metadata.set_format_style(AppStream.FormatStyle.CATALOG)
+            start = time.perf_counter()
+            appstream_file = self._sync_appstream(remote, inst)
+            self.remotes[remote_name] = self._load_remote_catalog(remote, appstream_file)
+            self.load_times[remote_name] = time.perf_counter() - start
+
+    def _load_remote_catalog(self, remote: Flatpak.Remote, appstream_file: Path) -> list[AppStreamPackage]:
+        """Build packages from an already downloaded catalog with the configured backend"""
+        if not appstream_file.exists():
+            logger.debug(f"AppStream file not found: {appstream_file}")
+            return []
+        if self.backend == "pool":
+            return self._load_appstream_pool(remote, appstream_file)
+        return self._load_appstream_metadata(remote, appstream_file)
+
+    def _update_remote_appstream(self, remote: Flatpak.Remote, inst: Flatpak.Installation,
+                                 progress=None, cancellable: Gio.Cancellable = None):
+        """Download the latest AppStream data for a remote"""
+        if remote.get_name() == "flathub" or remote.get_name() == "flathub-beta":
+            remote.set_gpg_verify(True)
+            inst.modify_remote(remote, cancellable)
+        inst.update_appstream_full_sync(remote.get_name(), None, progress, None, cancellable)
+
+    def _sync_appstream(self, remote: Flatpak.Remote, inst: Flatpak.Installation) -> Path:
+        """Download AppStream data for a remote if requested or missing, return the appstream.xml.gz path"""
         if self.refresh:
-            if remote.get_name() == "flathub" or remote.get_name() == "flathub-beta":
-                remote.set_gpg_verify(True)
-                inst.modify_remote(remote, None)
-            inst.update_appstream_full_sync(remote.get_name(), None, None, True)
+            self._update_remote_appstream(remote, inst)
         appstream_file = Path(remote.get_appstream_dir().get_path() + "/appstream.xml.gz")
         if not appstream_file.exists():
             try:
-                if remote.get_name() == "flathub" or remote.get_name() == "flathub-beta":
-                    remote.set_gpg_verify(True)
-                    inst.modify_remote(remote, None)
-                inst.update_appstream_full_sync(remote.get_name(), None, None, True)
+                self._update_remote_appstream(remote, inst)
             except GLib.Error as e:
                 logger.error(f"Failed to update AppStream metadata: {str(e)}")
-        if appstream_file.exists():
-            metadata.parse_file(Gio.File.new_for_path(appstream_file.as_posix()), AppStream.FormatKind.XML)
-            components: AppStream.ComponentBox = metadata.get_components()
-            i = 0
-            for i in range(components.get_size()):
-                component = components.index_safe(i)
-                #if component.get_kind() == AppStream.ComponentKind.DESKTOP_APP:
-                packages.append(AppStreamPackage(component, remote))
-            return packages
-        else:
-            logger.debug(f"AppStream file not found: {appstream_file}")
-            return []
+        return appstream_file
+
+    def _load_appstream_pool(self, remote: Flatpak.Remote, appstream_file: Path) -> list[AppStreamPackage]:
+        """Load AppStream metadata through an AppStream.Pool backed by a persistent binary cache"""
+        # One pool per remote so every component can be mapped back to its Flatpak.Remote
+        cache_dir = Path.home() / ".cache" / "flatpost" / "appstream-pool" / remote.get_name()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+        pool = AppStream.Pool.new()
+        pool.set_load_std_data_locations(False)
+        pool.reset_extra_data_locations()
+        pool.add_extra_data_location(appstream_file.parent.as_posix(), AppStream.FormatStyle.CATALOG)
+        if hasattr(pool, "override_cache_locations"):
+            # libappstream >= 1.0
+            pool.override_cache_locations(None, cache_dir.as_posix())
+        elif hasattr(pool, "set_cache_location"):
+            pool.set_cache_location(cache_dir.as_posix())
+
+        try:
+            pool.load(None)
+        except GLib.Error as e:
+            logger.error(f"Failed to load AppStream pool for {remote.get_name()}: {str(e)}")
+            return self._parse_appstream_file(appstream_file, remote)
+
+        components = pool.get_components()
+        if hasattr(components, "get_size"):
+            components = [components.index_safe(i) for i in range(components.get_size())]
+        # The pool can pick up stray metainfo, only keep entries we can install
+        components = [component for component in components
+                      if component.get_bundle(AppStream.BundleKind.FLATPAK)]
+        return self._build_packages(components, remote, appstream_file)
+
+    def _load_appstream_metadata(self, remote: Flatpak.Remote, appstream_file: Path) -> list[AppStreamPackage]:
+        """load AppStrean metadata and create AppStreamPackage objects"""
+        return self._parse_appstream_file(appstream_file, remote)
+
+    def _parse_appstream_file(self, appstream_file: Path, remote: Flatpak.Remote) -> list[AppStreamPackage]:
+        """Parse an appstream.xml.gz catalog into AppStreamPackage objects"""
+        metadata = AppStream.Metadata.new()
+        metadata.set_format_style(AppStream.FormatStyle.CATALOG)
+        metadata.parse_file(Gio.File.new_for_path(appstream_file.as_posix()), AppStream.FormatKind.XML)
+        components: AppStream.ComponentBox = metadata.get_components()
+        component_list = []
+        i = 0
+        for i in range(components.get_size()):
+            component = components.index_safe(i)
+            #if component.get_kind() == AppStream.ComponentKind.DESKTOP_APP:
+            component_list.append(component)
+        return self._build_packages(component_list, remote, appstream_file)
+
+    def _build_packages(self, components: list[AppStream.Component], remote: Flatpak.Remote,
+                        appstream_file: Path) -> list[AppStreamPackage]:
+        """
+        Create AppStreamPackage objects and the change set against the
+        previous load of this remote, stored in self.catalog_deltas.
+
+        If the catalog file has the same signature as last time, nothing in
+        it changed and each component gets a copy of its previous package
+        instead of a rebuilt one. Otherwise every package is built and
+        compared with its predecessor through content_key().
+        """
+        remote_name = remote.get_name()
+        cache_key = remote.get_appstream_dir().get_path()
+        signature = _file_signature(appstream_file.as_posix())
+        with _catalog_cache_lock:
+            previous_signature, previous = _catalog_cache.get(cache_key, (None, None))
+        unchanged_file = previous is not None and signature is not None and signature == previous_signature
+
+        packages = []
+        entries = {}
+        added = []
+        changed = []
+        unchanged = 0
+        for component in components:
+            bundle = component.get_bundle(AppStream.BundleKind.FLATPAK)
+            bundle_id = bundle.get_id() if bundle else component.get_id()
+            cached = previous.get(bundle_id) if previous else None
+            if cached and unchanged_file:
+                package = cached.with_component(component, remote)
+                unchanged += 1
+            else:
+                package = AppStreamPackage(component, remote)
+                if cached is None:
+                    added.append(package)
+                elif cached.content_key() != package.content_key():
+                    changed.append(package)
+                else:
+                    unchanged += 1
+            entries[bundle_id] = package
+            packages.append(package)
+
+        removed = []
+        if previous:
+            removed = [package for bundle_id, package in previous.items() if bundle_id not in entries]
+
+        with _catalog_cache_lock:
+            _catalog_cache[cache_key] = (signature, entries)
+
+        delta = CatalogDelta(remote_name, added, changed, removed, unchanged, initial=previous is None)
+        self.catalog_deltas[remote_name] = delta
+        logger.debug(f"AppStream catalog {delta}")
+        return packages
+
+    def get_catalog_changes(self, repo_name=None) -> list[CatalogDelta]:
+        """Get the change sets produced by the last load of specified or all repositories"""
+        if repo_name:
+            delta = self.catalog_deltas.get(repo_name)
+            return [delta] if delta else []
+        return list(self.catalog_deltas.values())
 
     def search_flatpak_repo(self, keyword: str, repo_name: str) -> list[AppStreamPackage]:
         search_results = []
@@ -560,20 +884,15 @@ class AppstreamSearcher:
         """Check for available updates for installed Flatpak applications"""
         updates = []
 
-        installation = get_installation(system)
-
-        def check_updates_for_install(inst: Flatpak.Installation, system=False):
-            for ref in inst.list_installed_refs_for_update(None):
-                app_id = ref.get_name()
-                # Get remote name from the installation
-                remote_name = ref.get_origin()
-                if system is False:
-                    updates.append((app_id, remote_name, "user"))
-                else:
-                    updates.append((app_id, remote_name, "system"))
-
-        # Process both system-wide and user installations
-        check_updates_for_install(installation, system)
+        # Served from the cached check, see get_pending_updates()
+        for ref in get_pending_updates(system):
+            app_id = ref.get_name()
+            # Get remote name from the installation
+            remote_name = ref.get_origin()
+            if system is False:
+                updates.append((app_id, remote_name, "user"))
+            else:
+                updates.append((app_id, remote_name, "system"))
 
         return updates
 
@@ -673,8 +992,19 @@ class AppstreamSearcher:
             print(f"Error fetching apps: {str(e)}")
             return None
 
-    def refresh_local(self, system=False):
+    def refresh_local(self, system=False, on_updates_revalidated=None):
+        """
+        Reload installed apps and pending updates without touching the remotes.
+
+        Pending updates come from the cached update check, see get_pending_updates().
 
+        Args:
+            system (bool): Whether to use the user or system installation
+            on_updates_revalidated (callable): Optional, passed on to get_pending_updates()
+
+        Returns:
+            tuple: (installed_results, updates_results)
+        """
         self._initialize_metadata()
 
         total_categories = sum(len(categories) for categories in self.category_groups.values())
@@ -685,139 +1015,220 @@ class AppstreamSearcher:
         for group_name, categories in self.category_groups.items():
             # Process categories one at a time to keep GUI responsive
             for category, title in categories.items():
-                self._process_system_category(searcher, category, system)
+                self._process_system_category(searcher, category, system, on_updates_revalidated)
                 # Update progress bar
                 self.refresh_progress = (current_category / total_categories) * 100
         # make sure to reset these to empty before refreshing.
+        self.snapshot = self.snapshot.with_installed(self.installed_results, self.updates_results)
         return self.installed_results, self.updates_results
 
 
-    def retrieve_metadata(self, system=False):
-        """Retrieve and refresh metadata for Flatpak repositories."""
-        self._initialize_metadata()
-
-        if not check_internet():
-            return self._handle_offline_mode()
-
-        searcher = get_reposearcher(system, True)
-        self.all_apps = searcher.get_all_apps()
-
-        return self._process_categories(searcher, system)
-
-    def _initialize_metadata(self):
-        """Initialize empty lists for metadata storage."""
-        self.category_results = []
-        self.collection_results = []
-        self.installed_results = []
-        self.updates_results = []
-        self.all_apps = []
-
-    def _handle_offline_mode(self):
-        """Handle metadata retrieval when offline."""
-
-        total_categories = sum(len(categories) for categories in self.category_groups.values())
-        current_category = 0
-        # Search for each app in local repositories
-        searcher = get_reposearcher()
-        search_result = []
-        for group_name, categories in self.category_groups.items():
-            # Process categories one at a time to keep GUI responsive
-            for category, title in categories.items():
-                self._process_system_category(searcher, category)
+    def retrieve_metadata(self, system=False, progress_callback=None, cancellable: Gio.Cancellable = None):
+        """
+        Retrieve and refresh metadata for Flatpak repositories.
 
-        # Define paths
-        app_data_dir = Path.home() / ".local" / "share" / "flatpost"
-        system_data_dir = Path("/usr/share/flatpost")
+        The refresh runs in phases (see RefreshPhase): sync remotes, parse
+        catalogs, fetch collections, resolve collections, then installed apps
+        and updates. Cancellation is checked between every remote, category
+        and app and is passed on to Flatpak, a cancelled refresh publishes
+        nothing and leaves the previous snapshot in place.
 
-        # Ensure local directory exists
-        app_data_dir.mkdir(parents=True, exist_ok=True)
+        Args:
+            system (bool): Whether to use the user or system installation
+            progress_callback (callable): Called with a RefreshProgress, from the calling thread
+            cancellable (Gio.Cancellable): Used to cancel the refresh from another thread
 
-        # Define file paths
-        json_path = app_data_dir / "collections_data.json"
+        Returns:
+            tuple: (category_results, collection_results, installed_results, updates_results, all_apps),
+            or None if the refresh was cancelled
+        """
+        if cancellable is None:
+            cancellable = Gio.Cancellable()
 
-        # Helper function to copy file if it doesn't exist locally
-        def copy_if_missing(source_path, dest_path):
-            try:
-                shutil.copy(str(source_path), str(dest_path))
-                logger.info(f"Copied {dest_path.name} to user directory")
-            except IOError as e:
-                logger.error(f"Failed to copy {dest_path.name}: {str(e)}")
-                return False
-            return True
+        def emit(phase, current=0, total=0, message="", bytes_done=0, bytes_total=0):
+            event = RefreshProgress(phase, current, total, message, bytes_done, bytes_total)
+            self.refresh_progress = event.fraction * 100
+            if progress_callback:
+                progress_callback(event)
 
-        # Try to copy collections_data.json if needed
-        if not json_path.exists() and not copy_if_missing(
-            system_data_dir / "collections_data.json",
-            json_path
-        ):
-            logger.error("Could not load or copy collections_data.json")
-            return None, [], [], [], []
+        self._initialize_metadata()
+        installation = get_installation(system)
+        remotes = [remote for remote in installation.list_remotes() if not remote.get_disabled()]
+        online = check_internet()
 
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                collections_data = json.load(f)
-                processed_data = self._process_offline_data(collections_data)
-
-                return processed_data
-
-        except (IOError, json.JSONDecodeError) as e:
-            logger.error(f"Error loading offline data: {str(e)}")
-            return None, [], [], [], []
-
-
-    def _process_offline_data(self, collections_data):
-        """Process cached collections data when offline."""
-        for collection in collections_data:
-            category = collection['category']
-            if category in self.category_groups['collections']:
-                apps = [app['app_id'] for app in collection['data'].get('hits', [])]
-                for app_id in apps:
-                    search_result = self.search_flatpak(app_id, 'flathub')
-                    self.collection_results.extend(search_result)
-        return self._get_current_results()
-
-    def _process_categories(self, searcher, system=False):
-        """Process categories and retrieve metadata."""
-        total_categories = sum(len(categories) for categories in self.category_groups.values())
-        current_category = 0
-
-        for group_name, categories in self.category_groups.items():
-            for category, title in categories.items():
-                if category not in self.category_groups['system']:
-                    self._process_category(searcher, category, current_category, total_categories, system)
-                else:
-                    self._process_system_category(searcher, category, system)
-                current_category += 1
-        self.save_collections_data()
+            if online:
+                self._sync_remotes(installation, remotes, emit, cancellable)
+            self._parse_remotes(remotes, emit, cancellable)
+            api_data = self._fetch_collections(online, emit, cancellable)
+            self._resolve_collections(api_data, emit, cancellable)
+            self._query_installed_updates(installation, online, emit, cancellable)
+        except GLib.Error as e:
+            if not e.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+                raise
+            logger.info("Metadata refresh cancelled")
+            emit(RefreshPhase.CANCELLED)
+            return None
 
+        self.all_apps = self.get_all_apps()
+        self.publish_snapshot()
+        emit(RefreshPhase.DONE)
         return self._get_current_results()
 
-    def _process_category(self, searcher, category, current_category, total_categories, system=False):
-        """Process a single category and retrieve its metadata."""
+    def _sync_remotes(self, installation, remotes, emit, cancellable):
+        """SYNC_REMOTES phase: download AppStream data for every remote"""
+        total = len(remotes)
+        bytes_done = 0
+        for index, remote in enumerate(remotes):
+            cancellable.set_error_if_cancelled()
+            remote_name = remote.get_name()
+            emit(RefreshPhase.SYNC_REMOTES, index, total, remote_name, bytes_done)
 
-        if self._should_refresh():
-            self._refresh_category_data(searcher, category)
+            def on_progress(status, progress, estimating, *data, remote_name=remote_name, index=index):
+                # Flatpak reports percent per remote, spread it over this remote's slot
+                emit(RefreshPhase.SYNC_REMOTES, index + progress / 100, total,
+                     f"{remote_name}: {status}", bytes_done)
 
+            try:
+                self._update_remote_appstream(remote, installation, on_progress, cancellable)
+            except GLib.Error as e:
+                if cancellable.is_cancelled():
+                    raise
+                logger.error(f"Failed to update AppStream metadata for {remote_name}: {str(e)}")
+            appstream_file = Path(remote.get_appstream_dir().get_path() + "/appstream.xml.gz")
+            if appstream_file.exists():
+                bytes_done += appstream_file.stat().st_size
+        emit(RefreshPhase.SYNC_REMOTES, total, total, bytes_done=bytes_done)
+
+    def _parse_remotes(self, remotes, emit, cancellable):
+        """PARSE_CATALOGS phase: build packages from each remote's downloaded catalog"""
+        files = [(remote, Path(remote.get_appstream_dir().get_path() + "/appstream.xml.gz")) for remote in remotes]
+        bytes_total = sum(path.stat().st_size for _, path in files if path.exists())
+        bytes_done = 0
+        loaded = {}
+        for index, (remote, appstream_file) in enumerate(files):
+            cancellable.set_error_if_cancelled()
+            emit(RefreshPhase.PARSE_CATALOGS, index, len(files), remote.get_name(), bytes_done, bytes_total)
+            start = time.perf_counter()
+            loaded[remote.get_name()] = self._load_remote_catalog(remote, appstream_file)
+            self.load_times[remote.get_name()] = time.perf_counter() - start
+            if appstream_file.exists():
+                bytes_done += appstream_file.stat().st_size
+        # Only replace the catalog once every remote has been read
+        self.remotes = loaded
+        emit(RefreshPhase.PARSE_CATALOGS, len(files), len(files), bytes_done=bytes_done, bytes_total=bytes_total)
+
+    def _fetch_collections(self, online, emit, cancellable) -> dict[str, dict]:
+        """FETCH_COLLECTIONS phase: download listings from Flathub when the cached copy is stale"""
+        categories = [category for group_name, categories in self.category_groups.items()
+                      if group_name != 'system' for category in categories]
+        if not online or not self._should_refresh():
+            emit(RefreshPhase.FETCH_COLLECTIONS, 1, 1, "Using cached collections")
+            return {}
+
+        self.collections_db = []
+        api_data = {}
+        for index, category in enumerate(categories):
+            cancellable.set_error_if_cancelled()
+            emit(RefreshPhase.FETCH_COLLECTIONS, index, len(categories), category)
+            data = self.fetch_flathub_category_apps(category)
+            if data:
+                api_data[category] = data
+        self.save_collections_data()
+        emit(RefreshPhase.FETCH_COLLECTIONS, len(categories), len(categories))
+        return api_data
+
+    def _resolve_collections(self, api_data, emit, cancellable):
+        """RESOLVE_COLLECTIONS phase: look up the packages listed in each collection and category"""
+        app_ids = {}
+        for collection in self._read_collections_data():
+            app_ids[collection['category']] = [app['app_id'] for app in collection['data'].get('hits', [])]
+        for category, data in api_data.items():
+            app_ids[category] = [app['app_id'] for app in data.get('hits', [])]
+
+        total = sum(len(ids) for ids in app_ids.values())
+        resolved = 0
+        for category, ids in app_ids.items():
+            cancellable.set_error_if_cancelled()
+            emit(RefreshPhase.RESOLVE_COLLECTIONS, resolved, total, category)
+            search_results = []
+            for app_id in ids:
+                search_results.extend(self.search_flatpak(app_id, 'flathub'))
+            if category in self.category_groups['collections']:
+                self.update_collection_results(search_results)
+            else:
+                self.category_results.extend(search_results)
+            resolved += len(ids)
+        emit(RefreshPhase.RESOLVE_COLLECTIONS, total, total)
+
+    def _query_installed_updates(self, installation, online, emit, cancellable):
+        """INSTALLED_UPDATES phase: map installed refs and pending updates to packages"""
+        emit(RefreshPhase.INSTALLED_UPDATES, 0, 0, "Listing installed refs")
+        installed = installation.list_installed_refs(cancellable)
+        updates = _check_updates_now(installation, cancellable) if online else []
+        total = len(installed) + len(updates)
+        for index, ref in enumerate(installed):
+            cancellable.set_error_if_cancelled()
+            self.installed_results.extend(self.search_flatpak(ref.get_name(), ref.get_origin()))
+            emit(RefreshPhase.INSTALLED_UPDATES, index + 1, total, ref.get_name())
+        for index, ref in enumerate(updates, len(installed)):
+            cancellable.set_error_if_cancelled()
+            self.updates_results.extend(self.search_flatpak(ref.get_name(), ref.get_origin()))
+            emit(RefreshPhase.INSTALLED_UPDATES, index + 1, total, ref.get_name())
+
+    def publish_snapshot(self) -> CatalogSnapshot:
+        """Freeze the current results into a new CatalogSnapshot and publish it in one step"""
+        snapshot = CatalogSnapshot(
+            self.category_results,
+            self.collection_results,
+            self.installed_results,
+            self.updates_results,
+            self.all_apps or self.get_all_apps(),
+            self._load_collection_members()
+        )
+        self.snapshot = snapshot
+        return snapshot
+
+    def get_snapshot(self) -> CatalogSnapshot:
+        """Return the last published snapshot, readers should keep using the returned object"""
+        return self.snapshot
+
+    def _load_collection_members(self) -> dict[str, list[str]]:
+        """Read which app ids belong to each collection/category from collections_data.json"""
+        members = {}
+        for collection in self._read_collections_data():
+            hits = collection.get('data', {}).get('hits', [])
+            members.setdefault(collection['category'], []).extend(app['app_id'] for app in hits)
+        return members
+
+    def _read_collections_data(self) -> list[dict]:
+        """Load collections_data.json, seeding it from the system copy when missing"""
         app_data_dir = Path.home() / ".local" / "share" / "flatpost"
         app_data_dir.mkdir(parents=True, exist_ok=True)
         json_path = app_data_dir / "collections_data.json"
+
+        if not json_path.exists():
+            try:
+                shutil.copy(str(Path("/usr/share/flatpost") / "collections_data.json"), str(json_path))
+                logger.info(f"Copied {json_path.name} to user directory")
+            except IOError as e:
+                logger.error(f"Failed to copy {json_path.name}: {str(e)}")
+                return []
+
         try:
             with open(json_path, 'r', encoding='utf-8') as f:
-                collections_data = json.load(f)
-                self._update_from_collections(collections_data, category)
+                return json.load(f)
         except (IOError, json.JSONDecodeError) as e:
-            pass
-
-        self.refresh_progress = (current_category / total_categories) * 100
+            logger.error(f"Error loading collections data: {str(e)}")
+            return []
 
-    def _update_from_collections(self, collections_data, category):
-        """Update results from cached collections data."""
-        for collection in collections_data:
-            if collection['category'] == category:
-                apps = [app['app_id'] for app in collection['data'].get('hits', [])]
-                for app_id in apps:
-                    search_result = self.search_flatpak(app_id, 'flathub')
-                    self.collection_results.extend(search_result)
+    def _initialize_metadata(self):
+        """Initialize empty lists for metadata storage."""
+        self.category_results = []
+        self.collection_results = []
+        self.installed_results = []
+        self.updates_results = []
+        self.all_apps = []
 
     def _should_refresh(self):
         """Check if category data needs refresh."""
@@ -830,31 +1241,17 @@ class AppstreamSearcher:
         except OSError:
             return True
 
-    def _refresh_category_data(self, searcher, category):
-        """Refresh category data from Flathub API."""
-        try:
-            api_data = self.fetch_flathub_category_apps(category)
-            if api_data:
-                apps = api_data['hits']
-                for app in apps:
-                    app_id = app['app_id']
-                    search_result = searcher.search_flatpak(app_id, 'flathub')
-                    if category in self.category_groups['collections']:
-                        self.update_collection_results(search_result)
-                    else:
-                        self.category_results.extend(search_result)
-        except requests.RequestException as e:
-            logger.error(f"Error refreshing category {category}: {str(e)}")
-
-    def _process_system_category(self, searcher, category, system=False):
+    def _process_system_category(self, searcher, category, system=False, on_updates_revalidated=None):
         """Process system-related categories."""
         if "installed" in category:
             installed_apps = get_installation(system).list_installed_refs()
             for app in installed_apps:
                 search_result = searcher.search_flatpak(app.get_name(), app.get_origin())
                 self.installed_results.extend(search_result)
-        elif "updates" in category and check_internet():
-            updates = get_installation(system).list_installed_refs_for_update()
+        elif "updates" in category:
+            # Served from the last check, stale results are revalidated in the background
+            updates = get_pending_updates(system, wait=check_internet(wait=False),
+                                          on_revalidated=on_updates_revalidated)
             for app in updates:
                 search_result = searcher.search_flatpak(app.get_name(), app.get_origin())
                 self.updates_results.extend(search_result)
@@ -869,43 +1266,325 @@ class AppstreamSearcher:
             self.all_apps
         )
 
-def install_flatpak(app: AppStreamPackage, repo_name=None, system=False) -> tuple[bool, str]:
+class TransactionProgressEvent:
+    """Progress of one operation in a running Flatpak.Transaction"""
+
+    def __init__(self, ref: str, operation: str, index: int, total: int, status="", percent=0,
+                 bytes_transferred=0, download_size=0, rate=0.0, eta=None, done=False, estimating=False) -> None:
+        self.ref = ref
+        # install, update, uninstall, install-bundle
+        self.operation = operation
+        # 1-based position of the operation in the transaction
+        self.index = index
+        self.total = total
+        self.status = status
+        self.percent = percent
+        self.bytes_transferred = bytes_transferred
+        self.download_size = download_size
+        # Bytes per second since the operation started
+        self.rate = rate
+        # Estimated seconds left, None when the download size or rate is unknown
+        self.eta = eta
+        self.done = done
+        self.estimating = estimating
+
+    @property
+    def fraction(self) -> float:
+        """Overall progress of the transaction, from 0.0 to 1.0"""
+        if not self.total:
+            return 0.0
+        return min(((self.index - 1) + self.percent / 100) / self.total, 1.0)
+
+    def __str__(self) -> str:
+        text = f"[{self.index}/{self.total}] {self.operation} {self.ref}: "
+        if self.done:
+            return text + "done"
+        text += f"{self.percent}%"
+        if self.bytes_transferred:
+            text += f" {GLib.format_size(self.bytes_transferred)}"
+            if self.download_size:
+                text += f" of {GLib.format_size(self.download_size)}"
+        if self.rate:
+            text += f" at {GLib.format_size(int(self.rate))}/s"
+        if self.eta is not None:
+            text += f", {int(self.eta)}s left"
+        return text
+
+def connect_transaction_progress(transaction: Flatpak.Transaction, progress_callback):
     """
-    Install a Flatpak package.
+    Stream per-operation progress of a transaction to a callback.
+
+    The callback receives TransactionProgressEvent objects on the thread that
+    calls transaction.run().
 
     Args:
-        app (AppStreamPackage): The package to install.
-        repo_name (str): Optional repository name to use for installation
-        system (Optional[bool]): Whether to operate on user or system installation
+        transaction (Flatpak.Transaction): Transaction to watch, before it runs
+        progress_callback (callable): Called with a TransactionProgressEvent
+    """
+    if progress_callback is None:
+        return
+
+    def make_event(operation, progress=None, done=False):
+        operations = transaction.get_operations()
+        refs = [op.get_ref() for op in operations]
+        ref = operation.get_ref()
+        index = refs.index(ref) + 1 if ref in refs else len(refs)
+        op_type = Flatpak.transaction_operation_type_to_string(operation.get_operation_type())
+        download_size = operation.get_download_size() if hasattr(operation, "get_download_size") else 0
+        if done or progress is None:
+            return TransactionProgressEvent(ref, op_type, index, len(refs), percent=100 if done else 0,
+                                            download_size=download_size, done=done)
+
+        transferred = progress.get_bytes_transferred()
+        elapsed = (GLib.get_monotonic_time() - progress.get_start_time()) / 1000000
+        rate = transferred / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if rate and download_size and download_size > transferred:
+            eta = (download_size - transferred) / rate
+        return TransactionProgressEvent(ref, op_type, index, len(refs), progress.get_status() or "",
+                                        progress.get_progress(), transferred, download_size, rate, eta,
+                                        estimating=progress.get_is_estimating())
+
+    def on_new_operation(transaction, operation, progress):
+        progress.set_update_frequency(250)
+        progress.connect("changed", lambda progress: progress_callback(make_event(operation, progress)))
+        progress_callback(make_event(operation))
+
+    def on_operation_done(transaction, operation, commit, result):
+        progress_callback(make_event(operation, done=True))
+
+    transaction.connect("new-operation", on_new_operation)
+    transaction.connect("operation-done", on_operation_done)
+
+def print_transaction_progress():
+    """Return a progress callback that prints one line per started/finished operation and every 10%"""
+    last_percent = {}
+
+    def callback(event: TransactionProgressEvent):
+        previous = last_percent.get(event.ref)
+        if event.done or previous is None or event.percent >= previous + 10:
+            last_percent[event.ref] = event.percent
+            print(event, flush=True)
+    return callback
+
+class OperationOutcome(IntEnum):
+    PENDING = 0
+    DONE = 1
+    FAILED = 2
+
+class OperationResult:
+    """What happened to one ref across all attempts of run_transaction()"""
+
+    def __init__(self, ref: str, action: "TransactionAction|None" = None) -> None:
+        self.ref = ref
+        # None for dependencies flatpak added on its own
+        self.action = action
+        self.outcome = OperationOutcome.PENDING
+        self.error: GLib.Error|None = None
+        self.attempts = 0
+
+# Gio.IOErrorEnum codes that usually go away when tried again
+_TRANSIENT_IO_ERRORS = {
+    "TIMED_OUT", "CONNECTION_REFUSED", "CONNECTION_CLOSED", "HOST_UNREACHABLE", "NETWORK_UNREACHABLE",
+    "NOT_CONNECTED", "BROKEN_PIPE", "PARTIAL_INPUT", "HOST_NOT_FOUND",
+}
+# ostree and libsoup report most HTTP and DNS failures as G_IO_ERROR_FAILED with a message.
+# ostree prefixes every fetch error with "While fetching", permanent ones such as
+# status 404 included, so only the cause after it is matched.
+_TRANSIENT_MESSAGES = (
+    "timed out", "timeout", "temporarily", "temporary failure", "connection reset", "connection refused",
+    "could not resolve", "network is unreachable", "server returned status 5",
+)
+
+def is_transient_error(error: GLib.Error) -> bool:
+    """Return True for network errors worth retrying, False for errors that would just fail again"""
+    if error.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+        return False
+    if error.domain == GLib.quark_to_string(Gio.io_error_quark()):
+        for name in _TRANSIENT_IO_ERRORS:
+            code = getattr(Gio.IOErrorEnum, name, None)
+            if code is not None and error.code == int(code):
+                return True
+    if error.domain == GLib.quark_to_string(Gio.resolver_error_quark()):
+        return error.code == int(Gio.ResolverError.TEMPORARY_FAILURE)
+    message = (error.message or "").lower()
+    return any(text in message for text in _TRANSIENT_MESSAGES)
+
+def _add_operation(transaction: Flatpak.Transaction, action: "TransactionAction", ref: str, remote=None):
+    if action == TransactionAction.INSTALL:
+        transaction.add_install(remote, ref, None)
+    elif action == TransactionAction.REMOVE:
+        transaction.add_uninstall(ref)
+    else:
+        transaction.add_update(ref)
+
+def run_transaction(installation: Flatpak.Installation, operations: list[tuple], progress_callback=None,
+                    retries=3, backoff=2.0, configure=None) -> dict[str, OperationResult]:
+    """
+    Run operations in a transaction, retrying the failed ones on transient errors.
+
+    Every attempt builds a new transaction holding only the operations that
+    haven't finished. Objects pulled by an earlier attempt stay in the local
+    repository, and ostree resumes partial downloads from its staging
+    directory, so a retry only fetches what is still missing. Between
+    attempts it waits backoff, 2 * backoff, 4 * backoff... seconds.
+
+    Args:
+        installation (Flatpak.Installation): Installation to operate on
+        operations (list[tuple]): (TransactionAction, ref, remote name or None) tuples
+        progress_callback (callable): Optional, receives TransactionProgressEvent updates
+        retries (int): Attempts to make after the first one
+        backoff (float): Seconds to wait before the first retry
+        configure (callable): Optional, called with each new transaction before it runs
 
     Returns:
-        tuple[bool, str]: (success, message)
+        dict[str, OperationResult]: Outcome per ref, including dependencies flatpak added
     """
+    results = {ref: OperationResult(ref, action) for action, ref, remote in operations}
+    attempt = 0
 
-    if not repo_name:
-        repo_name = "flathub"
+    while True:
+        pending = [(action, ref, remote) for action, ref, remote in operations
+                   if results[ref].outcome != OperationOutcome.DONE]
+        if not pending:
+            break
 
-    installation = get_installation(system)
+        transaction = Flatpak.Transaction.new_for_installation(installation)
+        if configure:
+            configure(transaction)
+        try:
+            for action, ref, remote in pending:
+                _add_operation(transaction, action, ref, remote)
+                results[ref].attempts += 1
+                results[ref].outcome = OperationOutcome.PENDING
+                results[ref].error = None
+        except GLib.Error as e:
+            for action, ref, remote in pending:
+                results[ref].outcome = OperationOutcome.FAILED
+                results[ref].error = e
+            break
+        connect_transaction_progress(transaction, progress_callback)
+
+        def on_operation_done(transaction, operation, commit, result):
+            result_entry = results.setdefault(operation.get_ref(), OperationResult(operation.get_ref()))
+            result_entry.outcome = OperationOutcome.DONE
+            result_entry.error = None
+
+        def on_operation_error(transaction, operation, error, details):
+            result_entry = results.setdefault(operation.get_ref(), OperationResult(operation.get_ref()))
+            result_entry.outcome = OperationOutcome.FAILED
+            result_entry.error = error
+            # Let independent operations carry on, only the failed ones get retried
+            return True
 
-    transaction = Flatpak.Transaction.new_for_installation(installation)
-    available_apps = installation.list_remote_refs_sync(repo_name)
-    match_found = None
-    for available_app in available_apps:
-        if available_app.get_name() in app.id:
-            match_found = 1
-            # Add the install operation
-            transaction.add_install(repo_name, available_app.format_ref(), None)
+        transaction.connect("operation-done", on_operation_done)
+        transaction.connect("operation-error", on_operation_error)
+
+        try:
+            transaction.run()
+        except GLib.Error as e:
+            # Resolution or the transaction as a whole failed, blame whatever didn't finish
+            for action, ref, remote in pending:
+                if results[ref].outcome != OperationOutcome.DONE:
+                    results[ref].outcome = OperationOutcome.FAILED
+                    results[ref].error = results[ref].error or e
+
+        failed = [result for result in results.values() if result.outcome == OperationOutcome.FAILED]
+        if not failed or attempt >= retries or not all(is_transient_error(r.error) for r in failed if r.error):
+            break
+        delay = backoff * (2 ** attempt)
+        attempt += 1
+        logger.info(f"Retrying {len(failed)} failed operation(s) in {delay:.0f}s (attempt {attempt + 1} of {retries + 1})")
+        time.sleep(delay)
+
+    return results
+
+# Refs of each remote keyed by (installation path, remote name), then by ref
+# name. Only used when a package's bundle id does not resolve directly, since
+# listing a remote enumerates every ref it has.
+_remote_ref_index: dict[tuple[str, str], tuple[float, dict[str, list[Flatpak.RemoteRef]]]] = {}
+_remote_ref_index_lock = threading.Lock()
+REMOTE_REF_INDEX_TTL = 3600
+
+def _get_remote_ref_index(installation: Flatpak.Installation, repo_name: str) -> dict[str, list[Flatpak.RemoteRef]]:
+    """Return the cached ref index of a remote, listing the remote if it is missing or stale"""
+    key = (installation.get_path().get_path(), repo_name)
+    with _remote_ref_index_lock:
+        cached = _remote_ref_index.get(key)
+    if cached and time.monotonic() - cached[0] < REMOTE_REF_INDEX_TTL:
+        return cached[1]
+
+    index = {}
+    for ref in installation.list_remote_refs_sync(repo_name, None):
+        index.setdefault(ref.get_name(), []).append(ref)
+    with _remote_ref_index_lock:
+        _remote_ref_index[key] = (time.monotonic(), index)
+    return index
+
+def invalidate_remote_ref_index(repo_name=None):
+    """Drop cached ref indexes for one remote, or all of them"""
+    with _remote_ref_index_lock:
+        for key in list(_remote_ref_index):
+            if repo_name is None or key[1] == repo_name:
+                del _remote_ref_index[key]
+
+def resolve_remote_ref(installation: Flatpak.Installation, repo_name: str, app: AppStreamPackage) -> Flatpak.RemoteRef|None:
+    """
+    Find the exact remote ref to install for a package.
+
+    The ref is taken from the package's flatpak bundle id, with the arch
+    swapped for the default one if this machine can't run it, and looked up
+    directly in the remote. Only if that ref does not exist is the cached ref
+    index of the remote searched for the same name.
 
-    if not match_found:
-        return False, f"No available package named {app.id} found in any repositories."
+    Args:
+        installation (Flatpak.Installation): Installation to look the ref up for
+        repo_name (str): Remote to install from
+        app (AppStreamPackage): The package to resolve
 
+    Returns:
+        Flatpak.RemoteRef|None: The ref, or None if the remote has no match
+    """
+    default_arch = Flatpak.get_default_arch()
+    kind, name, arch, branch = Flatpak.RefKind.APP, app.id, default_arch, None
     try:
-        transaction.run()
+        bundle_ref = Flatpak.Ref.parse(app.flatpak_bundle)
+        kind, name, arch, branch = (bundle_ref.get_kind(), bundle_ref.get_name(),
+                                    bundle_ref.get_arch(), bundle_ref.get_branch())
+        if arch not in Flatpak.get_supported_arches():
+            arch = default_arch
+        return installation.fetch_remote_ref_sync(repo_name, kind, name, arch, branch, None)
     except GLib.Error as e:
-        return False, f"Installation failed: {e}"
-    return True, f"Successfully installed {app.id}"
+        logger.debug(f"Could not resolve {app.flatpak_bundle} in {repo_name} directly: {str(e)}")
+
+    candidates = _get_remote_ref_index(installation, repo_name).get(name, [])
+    candidates = [ref for ref in candidates if ref.get_arch() in Flatpak.get_supported_arches()]
+    if not candidates:
+        return None
+    # Closest match first: same kind, default arch, same branch
+    candidates.sort(key=lambda ref: (ref.get_kind() != kind,
+                                     ref.get_arch() != default_arch,
+                                     ref.get_branch() != branch))
+    return candidates[0]
+
+def install_flatpak(app: AppStreamPackage, repo_name=None, system=False, progress_callback=None) -> tuple[bool, str]:
+    """
+    Install a Flatpak package.
+
+    Args:
+        app (AppStreamPackage): The package to install.
+        repo_name (str): Optional repository name to use for installation
+        system (Optional[bool]): Whether to operate on user or system installation
+        progress_callback (callable): Optional, receives TransactionProgressEvent updates
+
+    Returns:
+        tuple[bool, str]: (success, message)
+    """
+    queue = TransactionQueue(system)
+    queue.add_install(app, repo_name)
+    return queue.run(progress_callback)
 
-def install_flatpakref(ref_file, system=False):
+def install_flatpakref(ref_file, system=False, progress_callback=None):
     """Add a new repository using a .flatpakrepo file"""
     # Get existing repositories
     installation = get_installation(system)
@@ -932,6 +1611,7 @@ def install_flatpakref(ref_file, system=False):
 
     # Add the install operation
     transaction.add_install_flatpakref(repo_bytes)
+    connect_transaction_progress(transaction, progress_callback)
     # Run the transaction
     try:
         transaction.run()
@@ -940,121 +1620,1178 @@ def install_flatpakref(ref_file, system=False):
     return True, f"Successfully installed {ref_file}"
 
 
-def remove_flatpak(app: AppStreamPackage, system=False) -> tuple[bool, str]:
+def remove_flatpak(app: AppStreamPackage, system=False, progress_callback=None) -> tuple[bool, str]:
     """
     Remove a Flatpak package using transactions.
 
     Args:
         app (AppStreamPackage): The package to install.
         system (Optional[bool]): Whether to operate on user or system installation
+        progress_callback (callable): Optional, receives TransactionProgressEvent updates
 
     Returns:
         Tuple[bool, str]: (success, message)
     """
+    queue = TransactionQueue(system)
+    queue.add_remove(app)
+    return queue.run(progress_callback)
 
-    # Get the appropriate installation based on user parameter
-    installation = get_installation(system)
-    installed = installation.list_installed_refs(None)
-    # Create a new transaction for removal
-    transaction = Flatpak.Transaction.new_for_installation(installation)
-    match_found = None
-    for installed_ref in installed:
-        if installed_ref.get_name() in app.id:
-            match_found = 1
-            # Add the install operation
-            transaction.add_uninstall(installed_ref.format_ref())
-
-    if not match_found:
-        return False, f"No installed package named {app.id} found."
-    try:
-        transaction.run()
-    except GLib.Error as e:
-        return False, f"Failed to remove {app.id}: {e}"
-    return True, f"Successfully removed {app.id}"
-
-def update_flatpak(app: AppStreamPackage, system=False) -> tuple[bool, str]:
+def update_flatpak(app: AppStreamPackage, system=False, progress_callback=None) -> tuple[bool, str]:
     """
-    Remove a Flatpak package using transactions.
+    Update a Flatpak package using transactions.
 
     Args:
         app (AppStreamPackage): The package to install.
         system (Optional[bool]): Whether to operate on user or system installation
+        progress_callback (callable): Optional, receives TransactionProgressEvent updates
 
     Returns:
         Tuple[bool, str]: (success, message)
     """
+    queue = TransactionQueue(system)
+    queue.add_update(app)
+    return queue.run(progress_callback)
 
-    # Get the appropriate installation based on user parameter
-    installation = get_installation(system)
-    updates = installation.list_installed_refs_for_update(None)
-    # Create a new transaction for removal
-    transaction = Flatpak.Transaction.new_for_installation(installation)
-    match_found = None
-    for update in updates:
-        if update.get_name() in app.id:
-            match_found = 1
-            # Add the install operation
-            transaction.add_update(update.format_ref())
+def _lower_thread_priority():
+    """Run the calling thread at idle CPU and IO priority where the platform allows it"""
+    try:
+        # Linux applies nice values per thread
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
 
+class UpdateStager:
+    """
+    Pulls pending updates in the background without deploying them.
+
+    Staged refs are remembered together with the remote commit that was
+    pulled, so update_all_flatpaks() can deploy them without touching the
+    network. A staged entry stops counting as soon as the remote's current
+    commit, as of the last summary fetch, is a different one.
+    Flatpak can't throttle a pull, so the bandwidth limit is kept on average
+    by pausing between refs.
+    """
 
-    if not match_found:
-        return False, f"No updateable package named {app.id} found."
-    # Run the transaction
-    try:
-        transaction.run()
-    except GLib.Error as e:
-        return False, f"Failed to update {app.id}: {e}"
-    return True, f"Successfully updated {app.id}"
+    def __init__(self, system=False, bandwidth_limit=None) -> None:
+        self.system = system
+        # Average download rate to stay under in bytes per second, None for no limit
+        self.bandwidth_limit = bandwidth_limit
+        self.cancellable = Gio.Cancellable()
+        self.current_ref = None
+        self.skipped_reason = None
+        self.last_error = None
+        self._thread = None
+        state_name = "staged_updates_system.json" if system else "staged_updates.json"
+        self.state_path = Path.home() / ".local" / "share" / "flatpost" / state_name
+
+    def _load_state(self) -> dict[str, dict]:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self, state: dict[str, dict]):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(self.state_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=2)
+        except IOError as e:
+            logger.error(f"Error saving staged updates: {str(e)}")
+
+    def staged_refs(self, updates=None) -> dict[str, dict]:
+        """
+        Return refs whose latest commit has already been pulled.
+
+        Args:
+            updates (list[Flatpak.InstalledRef]): Pending updates, listed if not given
+
+        Returns:
+            dict[str, dict]: ref -> {"commit", "download_size", "staged_at"}
+        """
+        if updates is None:
+            updates = get_pending_updates(self.system)
+        state = self._load_state()
+        installation = get_installation(self.system)
+        staged = {}
+        for update in updates:
+            ref = update.format_ref()
+            info = state.get(ref)
+            if info and self._remote_commit(installation, update) == info.get("commit"):
+                staged[ref] = info
+        if len(staged) != len(state):
+            # Drop entries that were deployed or went stale
+            self._save_state(staged)
+        return staged
+
+    def staged_count(self) -> int:
+        """Number of staged refs as last recorded, without checking them against the remotes"""
+        return len(self._load_state())
+
+    def forget(self, refs):
+        """Drop staged entries, e.g. once they were deployed"""
+        state = self._load_state()
+        for ref in refs:
+            state.pop(ref, None)
+        self._save_state(state)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, progress_callback=None, done_callback=None):
+        """
+        Start staging on a low priority background thread.
+
+        Args:
+            progress_callback (callable): Optional, receives TransactionProgressEvent updates
+            done_callback (callable): Optional, called with this stager when staging stops
+        """
+        if self.is_running():
+            return
+        self.cancellable = Gio.Cancellable()
+        self._thread = threading.Thread(target=self.run, args=(progress_callback, done_callback), daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=False):
+        """
+        Cancel staging.
+
+        Args:
+            wait (bool): Also block until the staging thread finished, so no
+                staging transaction is still writing to the repository
+        """
+        self.cancellable.cancel()
+        thread = self._thread
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def run(self, progress_callback=None, done_callback=None):
+        """Pull every pending update that isn't staged yet, blocking until done or stopped"""
+        _lower_thread_priority()
+        self.skipped_reason = None
+        self.last_error = None
+        try:
+            if Gio.NetworkMonitor.get_default().get_network_metered():
+                self.skipped_reason = "metered connection"
+                return
+            if not check_internet():
+                self.skipped_reason = "offline"
+                return
+
+            installation = get_installation(self.system)
+            updates = _check_updates_now(installation, self.cancellable)
+            state = self.staged_refs(updates)
+            for update in updates:
+                if self.cancellable.is_cancelled():
+                    break
+                ref = update.format_ref()
+                if ref in state:
+                    continue
+                self.current_ref = ref
+                downloaded = self._pull(installation, ref, progress_callback)
+                if downloaded is None:
+                    continue
+                # The remote commit that was just pulled, staged_refs() compares it with the remote's current one
+                commit = self._remote_commit(installation, update)
+                if commit is None:
+                    continue
+                state[ref] = {
+                    "commit": commit,
+                    "download_size": downloaded,
+                    "staged_at": time.time(),
+                }
+                self._save_state(state)
+        finally:
+            self.current_ref = None
+            if done_callback:
+                done_callback(self)
+
+    @staticmethod
+    def _remote_commit(installation: Flatpak.Installation, update: Flatpak.InstalledRef) -> str|None:
+        """Return the commit the ref's remote currently offers, from the cached summary"""
+        try:
+            remote_ref = installation.fetch_remote_ref_sync_full(
+                update.get_origin(), update.get_kind(), update.get_name(), update.get_arch(),
+                update.get_branch(), Flatpak.QueryFlags.ONLY_CACHED, None)
+        except GLib.Error as e:
+            logger.error(f"Failed to read the remote commit of {update.format_ref()}: {str(e)}")
+            return None
+        return remote_ref.get_commit()
+
+    def _pull(self, installation: Flatpak.Installation, ref: str, progress_callback=None) -> int|None:
+        """Pull one ref without deploying it, returns the bytes transferred or None on failure"""
+        transaction = Flatpak.Transaction.new_for_installation(installation)
+        transaction.set_no_deploy(True)
+        transaction.add_update(ref)
+        transferred = [0]
+
+        def on_progress(event):
+            transferred[0] = max(transferred[0], event.bytes_transferred)
+            if progress_callback:
+                progress_callback(event)
+        connect_transaction_progress(transaction, on_progress)
+
+        start = time.monotonic()
+        try:
+            transaction.run(self.cancellable)
+        except GLib.Error as e:
+            if not self.cancellable.is_cancelled():
+                self.last_error = f"Failed to stage {ref}: {e}"
+                logger.error(self.last_error)
+            return None
+
+        if self.bandwidth_limit:
+            # Pause long enough that this ref averaged out to the limit
+            pause = transferred[0] / self.bandwidth_limit - (time.monotonic() - start)
+            deadline = time.monotonic() + pause
+            while time.monotonic() < deadline and not self.cancellable.is_cancelled():
+                time.sleep(min(0.5, deadline - time.monotonic()))
+        return transferred[0]
+
+    def status(self) -> dict:
+        """Report what is staged, what is still pending and how staging is limited"""
+        updates = get_pending_updates(self.system)
+        staged = self.staged_refs(updates)
+        return {
+            "running": self.is_running(),
+            "current_ref": self.current_ref,
+            "staged": staged,
+            "pending": [ref.format_ref() for ref in updates if ref.format_ref() not in staged],
+            "staged_bytes": sum(info.get("download_size", 0) for info in staged.values()),
+            "bandwidth_limit": self.bandwidth_limit,
+            "skipped_reason": self.skipped_reason,
+            "last_error": self.last_error,
+        }
+
+# Orders update_all_flatpaks() can apply updates in:
+#   default        - the order flatpak lists them
+#   apps-first     - applications before runtimes and extensions
+#   smallest-first - smallest download first, so more apps finish early
+UPDATE_ORDERS = ("default", "apps-first", "smallest-first")
 
-def update_all_flatpaks(apps: list[AppStreamPackage], system=False) -> tuple[bool, str]:
+def order_updates(installation: Flatpak.Installation, updates: list[Flatpak.InstalledRef],
+                  order="default") -> list[Flatpak.InstalledRef]:
+    """
+    Sort pending updates by an ordering policy.
+
+    Args:
+        installation (Flatpak.Installation): Installation the updates belong to
+        updates (list[Flatpak.InstalledRef]): Pending updates
+        order (str): One of UPDATE_ORDERS
+
+    Returns:
+        list[Flatpak.InstalledRef]: The updates in the order to apply them
+    """
+    if order == "apps-first":
+        # sorted() is stable, apps keep their relative order
+        return sorted(updates, key=lambda ref: ref.get_kind() != Flatpak.RefKind.APP)
+    if order == "smallest-first":
+        sizes = {}
+        for ref in updates:
+            try:
+                _, download_size, _ = installation.fetch_remote_size_sync(ref.get_origin(), ref, None)
+            except GLib.Error:
+                # Unknown sizes go last
+                download_size = float("inf")
+            sizes[ref.format_ref()] = download_size
+        return sorted(updates, key=lambda ref: sizes[ref.format_ref()])
+    return list(updates)
+
+def update_all_flatpaks(apps: list[AppStreamPackage]|None = None, system=False, progress_callback=None,
+                        order="default", batch_size=None, affected_refs: set|None = None) -> tuple[bool, str]:
     """
     Update multiple Flatpak packages using transactions.
 
+    Updates are sorted by the given order and, with a batch size, split over
+    several transactions so the first apps are usable before the last ones
+    are downloaded. Updates staged by UpdateStager are deployed first, in
+    the same order and batches, without pulling.
+
     Args:
-        apps (Union[List[AppStreamPackage], AppStreamPackage]): One or more packages to update
+        apps (Union[List[AppStreamPackage], AppStreamPackage]): Packages to update, None for every pending update
         system (Optional[bool]): Whether to operate on user or system installation
+        progress_callback (callable): Optional, receives TransactionProgressEvent updates
+        order (str): One of UPDATE_ORDERS
+        batch_size (int): Optional maximum number of refs per transaction
+        affected_refs (set): Optional, every ref that was updated gets added to it
 
     Returns:
-        Tuple[bool, List[str]]: (success, list of status messages)
+        Tuple[bool, str]: (success, status message)
     """
 
-    installation = get_installation(system)
-    updates = installation.list_installed_refs_for_update(None)
-    # Create a new transaction for removal
-    transaction = Flatpak.Transaction.new_for_installation(installation)
-    for update in updates:
-        transaction.add_update(update.format_ref())
+    if isinstance(apps, AppStreamPackage):
+        apps = [apps]
+    if apps is not None and not apps:
+        # An explicit empty selection, not "everything"
+        return True, "No updates available."
 
+    installation = get_installation(system)
+    all_updates = list(installation.list_installed_refs_for_update(None))
+    updates = all_updates
+
+    if apps is not None:
+        names = {_bundle_ref_name(app) for app in apps}
+        updates = [update for update in updates if update.get_name() in names]
+        if not updates:
+            return False, "No updateable packages found for the selected apps."
+    if not updates:
+        return True, "No updates available."
+    total = len(updates)
+
+    # Staged and pulled refs alike follow the requested order
+    updates = order_updates(installation, updates, order)
+
+    def split(refs):
+        if batch_size and batch_size > 0:
+            return [refs[i:i + batch_size] for i in range(0, len(refs), batch_size)]
+        return [refs] if refs else []
+
+    stager = UpdateStager(system)
+    # Checked against every pending update, a subset must not drop the other staged entries
+    staged = stager.staged_refs(all_updates)
+    staged_updates = [update for update in updates if update.format_ref() in staged]
+    for batch in split(staged_updates):
+        refs = [update.format_ref() for update in batch]
+        deploy = Flatpak.Transaction.new_for_installation(installation)
+        deploy.set_no_pull(True)
+        for ref in refs:
+            deploy.add_update(ref)
+        connect_transaction_progress(deploy, progress_callback)
+        try:
+            deploy.run()
+        except GLib.Error as e:
+            # Objects may have been pruned since staging, pull them normally
+            logger.warning(f"Deploying staged updates failed, pulling them instead: {str(e)}")
+            continue
+        stager.forget(refs)
+        if affected_refs is not None:
+            affected_refs.update(refs)
+        deployed = set(refs)
+        updates = [update for update in updates if update.format_ref() not in deployed]
+
+    batches = split(updates)
+
+    failures = []
+    for batch in batches:
+        operations = [(TransactionAction.UPDATE, update.format_ref(), None) for update in batch]
+        results = run_transaction(installation, operations, progress_callback)
+        if affected_refs is not None:
+            affected_refs.update(ref for ref, result in results.items() if result.outcome == OperationOutcome.DONE)
+        # Later batches don't depend on this one, keep going
+        for update in batch:
+            result = results[update.format_ref()]
+            if result.outcome != OperationOutcome.DONE:
+                failures.append(f"Failed to update {update.get_name()}: {result.error}")
+
+    if failures:
+        return False, "\n".join(failures)
+    if apps is not None:
+        return True, f"Successfully updated {total} package(s)"
+    return True, "Successfully updated all packages"
+
+class TransactionAction(IntEnum):
+    INSTALL = 1
+    REMOVE = 2
+    UPDATE = 3
+
+def _bundle_ref_name(app: AppStreamPackage) -> str:
+    """Return the flatpak ref name of a package, its AppStream id may carry a .desktop suffix"""
     try:
-        transaction.run()
-        return True, "Successfully updated all packages"
-    except GLib.Error as e:
-        return False, f"Failed to update all packages: {str(e)}"
+        return Flatpak.Ref.parse(app.flatpak_bundle).get_name()
+    except GLib.Error:
+        return app.id.removesuffix(".desktop")
 
-def get_installation(system=False):
-    if system is False:
-        installation = Flatpak.Installation.new_user()
-    else:
-        installation = Flatpak.Installation.new_system()
-    return installation
+class TransactionQueue:
+    """
+    Collects install, remove and update jobs for many apps and runs them as
+    one Flatpak.Transaction, so dependencies are resolved once and runtimes
+    shared by several apps are only pulled once.
+    """
 
-def get_reposearcher(system=False, refresh=False):
-    installation = get_installation(system)
-    searcher = AppstreamSearcher(refresh)
-    searcher.add_installation(installation)
-    return searcher
+    def __init__(self, system=False) -> None:
+        self.system = system
+        # app id -> (action, package, repo name), queuing an app again replaces its job
+        self.jobs: dict[str, tuple[TransactionAction, AppStreamPackage, str|None]] = {}
+        # Refs the last run() installed, removed or updated, dependencies included
+        self.affected_refs: set[str] = set()
 
-def check_internet():
-    """Check if internet connection is available."""
-    try:
-        requests.head('https://flathub.org', timeout=3)
-        return True
-    except requests.ConnectionError:
-        return False
+    def add_install(self, app: AppStreamPackage, repo_name=None):
+        self.jobs[app.id] = (TransactionAction.INSTALL, app, repo_name)
 
-def repotoggle(repo, toggle=True, system=False):
-    """
-    Enable or disable a Flatpak repository
+    def add_remove(self, app: AppStreamPackage):
+        self.jobs[app.id] = (TransactionAction.REMOVE, app, None)
+
+    def add_update(self, app: AppStreamPackage):
+        self.jobs[app.id] = (TransactionAction.UPDATE, app, None)
+
+    def discard(self, app_id: str):
+        """Drop the job queued for an app, if any"""
+        self.jobs.pop(app_id, None)
+
+    def clear(self):
+        self.jobs.clear()
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def __contains__(self, app_id) -> bool:
+        return app_id in self.jobs
+
+    def __iter__(self):
+        return iter(list(self.jobs.values()))
+
+    def _resolve_jobs(self, installation: Flatpak.Installation):
+        """
+        Work out the refs every job touches.
+
+        A ref several jobs touch becomes an operation of the first of them
+        only, every job still lists it in its refs and shares its outcome.
+
+        Returns:
+            tuple[list, list[str], list[str]]: ((action, app, refs, operations) for each
+            resolved job, messages for jobs that could not be resolved, ids of those apps)
+        """
+        resolved = []
+        messages = []
+        unresolved = []
+        seen_refs = set()
+        installed = None
+        updates = None
+
+        for action, app, repo_name in self.jobs.values():
+            name = _bundle_ref_name(app)
+            try:
+                if action == TransactionAction.INSTALL:
+                    repo_name = repo_name or app.repo_name or "flathub"
+                    remote_ref = resolve_remote_ref(installation, repo_name, app)
+                    if not remote_ref:
+                        messages.append(f"No available package named {app.id} found in {repo_name}.")
+                        unresolved.append(app.id)
+                        continue
+                    refs = [remote_ref.format_ref()]
+                elif action == TransactionAction.REMOVE:
+                    # One listing shared by every removal in the queue
+                    if installed is None:
+                        installed = installation.list_installed_refs(None)
+                    refs = [ref.format_ref() for ref in installed if ref.get_name() == name]
+                    if not refs:
+                        messages.append(f"No installed package named {app.id} found.")
+                        unresolved.append(app.id)
+                        continue
+                else:
+                    if updates is None:
+                        updates = installation.list_installed_refs_for_update(None)
+                    refs = [ref.format_ref() for ref in updates if ref.get_name() == name]
+                    if not refs:
+                        messages.append(f"No updateable package named {app.id} found.")
+                        unresolved.append(app.id)
+                        continue
+            except GLib.Error as e:
+                messages.append(f"Failed to queue {app.id}: {e}")
+                unresolved.append(app.id)
+                continue
+
+            operations = []
+            for ref in refs:
+                if ref not in seen_refs:
+                    seen_refs.add(ref)
+                    operations.append((action, ref, repo_name if action == TransactionAction.INSTALL else None))
+            resolved.append((action, app, refs, operations))
+
+        return resolved, messages, unresolved
+
+    def plan(self) -> "TransactionPlan":
+        """
+        Estimate download size and disk usage of the queued jobs without running them.
+
+        Returns:
+            TransactionPlan: The resolved operations, including dependencies, and their sizes
+        """
+        installation = get_installation(self.system)
+        key = tuple(sorted((action, app.flatpak_bundle, repo_name or "")
+                           for action, app, repo_name in self.jobs.values()))
+
+        def build():
+            resolved, messages, _ = self._resolve_jobs(installation)
+            if not resolved:
+                return TransactionPlan([], messages)
+            transaction = Flatpak.Transaction.new_for_installation(installation)
+            try:
+                for action, app, refs, operations in resolved:
+                    for operation in operations:
+                        _add_operation(transaction, *operation)
+            except GLib.Error as e:
+                return TransactionPlan([], messages + [f"Failed to resolve transaction: {e}"])
+            return _resolve_plan(installation, transaction, messages)
+
+        return _cached_plan(installation, key, build)
+
+    def run(self, progress_callback=None, retries=3) -> tuple[bool, str]:
+        """
+        Run every queued job in a single transaction.
+
+        Operations that fail on a transient network error are retried with
+        backoff, see run_transaction(). Jobs that finished are removed from
+        the queue, failed ones stay queued so they can be run again. Jobs
+        that can't be resolved, e.g. because the app is gone from the
+        remote, are reported once and removed.
+
+        Args:
+            progress_callback (callable): Optional, receives TransactionProgressEvent updates
+            retries (int): How often to retry operations that failed on a transient error
+
+        Returns:
+            tuple[bool, str]: (success, message) with one line per app
+        """
+        self.affected_refs = set()
+        if not self.jobs:
+            return False, "No operations queued."
+
+        installation = get_installation(self.system)
+        resolved, messages, unresolved = self._resolve_jobs(installation)
+        # Retrying them would only fail the same way
+        for app_id in unresolved:
+            self.discard(app_id)
+        if not resolved:
+            return False, "\n".join(messages)
+
+        operations = [operation for action, app, refs, job_operations in resolved for operation in job_operations]
+        results = run_transaction(installation, operations, progress_callback, retries)
+        self.affected_refs = {ref for ref, result in results.items() if result.outcome == OperationOutcome.DONE}
+
+        done = {
+            TransactionAction.INSTALL: "installed",
+            TransactionAction.REMOVE: "removed",
+            TransactionAction.UPDATE: "updated",
+        }
+        succeeded = 0
+        for action, app, refs, job_operations in resolved:
+            # Refs owned by an earlier job carry that job's outcome
+            errors = [results[ref].error if ref in results else None for ref in refs
+                      if ref not in results or results[ref].outcome != OperationOutcome.DONE]
+            if not errors:
+                messages.append(f"Successfully {done[action]} {app.id}")
+                self.discard(app.id)
+                succeeded += 1
+                continue
+            error = next((e for e in errors if e), "unknown error")
+            if action == TransactionAction.INSTALL:
+                messages.append(f"Installation of {app.id} failed: {error}")
+            elif action == TransactionAction.REMOVE:
+                messages.append(f"Failed to remove {app.id}: {error}")
+            else:
+                messages.append(f"Failed to update {app.id}: {error}")
+
+        success = succeeded == len(resolved) and not unresolved
+        return success, "\n".join(messages)
+
+class PlannedOperation:
+    """One resolved operation of a dry-run transaction with its size estimates"""
+
+    def __init__(self, ref: str, operation: str, remote: str, download_size: int,
+                 installed_size: int, previous_size: int) -> None:
+        self.ref = ref
+        self.operation = operation
+        self.remote = remote
+        self.download_size = download_size
+        self.installed_size = installed_size
+        # Disk space the currently installed version of the ref uses, 0 if not installed
+        self.previous_size = previous_size
+
+    @property
+    def size_delta(self) -> int:
+        """Change in disk usage once the operation is applied"""
+        return self.installed_size - self.previous_size
+
+    def __str__(self) -> str:
+        delta = self.size_delta
+        sign = "-" if delta < 0 else "+"
+        return (f"{self.operation} {self.ref} ({self.remote}): download {GLib.format_size(self.download_size)}, "
+                f"disk {sign}{GLib.format_size(abs(delta))}")
+
+class TransactionPlan:
+    """Result of resolving a transaction without pulling or deploying anything"""
+
+    def __init__(self, operations: list[PlannedOperation], messages=None) -> None:
+        self.operations = operations
+        # Jobs that could not be resolved
+        self.messages = messages or []
+        # True when the plan came from the cache instead of a new resolution
+        self.cached = False
+
+    @property
+    def download_size(self) -> int:
+        return sum(op.download_size for op in self.operations)
+
+    @property
+    def installed_size(self) -> int:
+        return sum(op.installed_size for op in self.operations)
+
+    @property
+    def size_delta(self) -> int:
+        return sum(op.size_delta for op in self.operations)
+
+    def summary(self) -> str:
+        """One line total, e.g. for a confirmation dialog"""
+        if not self.operations:
+            return "Nothing to do."
+        delta = self.size_delta
+        disk = f"{GLib.format_size(delta)} more" if delta >= 0 else f"{GLib.format_size(-delta)} less"
+        return (f"{len(self.operations)} operation(s), {GLib.format_size(self.download_size)} to download, "
+                f"{disk} disk space")
+
+    def __str__(self) -> str:
+        lines = [str(op) for op in self.operations]
+        lines.extend(self.messages)
+        lines.append(self.summary())
+        return "\n".join(lines)
+
+# Plans keyed by (installation path, jobs, revision), see _plan_cache_revision()
+_plan_cache: dict[tuple, TransactionPlan] = {}
+_plan_cache_lock = threading.Lock()
+
+def _remote_summary_revision(installation: Flatpak.Installation, remote: Flatpak.Remote):
+    """Return (mtime, size) of the remote's cached summary, None if it can't be found"""
+    summary_dirs = [
+        Path(installation.get_path().get_path()) / "repo" / "tmp" / "cache" / "summaries",
+        # Where flatpak keeps summaries of the system installation for unprivileged users
+        Path(GLib.get_user_cache_dir()) / "flatpak" / "system-cache" / "summaries",
+    ]
+    for summary_dir in summary_dirs:
+        for suffix in (".idx", ".sub", ""):
+            summary = summary_dir / (remote.get_name() + suffix)
+            if summary.exists():
+                stat = summary.stat()
+                return (stat.st_mtime_ns, stat.st_size)
+    # Older flatpak, the appstream timestamp moves whenever the remote is refreshed
+    timestamp = remote.get_appstream_timestamp(None).get_path()
+    if timestamp and os.path.exists(timestamp):
+        return (os.stat(timestamp).st_mtime_ns, 0)
+    return None
+
+def _plan_cache_revision(installation: Flatpak.Installation):
+    """
+    Return what a cached plan depends on: the summary revision of every
+    enabled remote and the installation's .changed marker, which flatpak
+    touches on every deploy. None means no safe revision could be found.
+    """
+    revision = []
+    for remote in installation.list_remotes():
+        if remote.get_disabled():
+            continue
+        remote_revision = _remote_summary_revision(installation, remote)
+        if remote_revision is None:
+            return None
+        revision.append((remote.get_name(), remote_revision))
+    changed = Path(installation.get_path().get_path()) / ".changed"
+    revision.append((".changed", changed.stat().st_mtime_ns if changed.exists() else 0))
+    return tuple(revision)
+
+def _cached_plan(installation: Flatpak.Installation, key, build) -> TransactionPlan:
+    """Return the cached plan for key if nothing it depends on changed, otherwise build and cache it"""
+    revision = _plan_cache_revision(installation)
+    cache_key = (installation.get_path().get_path(), key, revision)
+    if revision is not None:
+        with _plan_cache_lock:
+            plan = _plan_cache.get(cache_key)
+        if plan:
+            plan.cached = True
+            return plan
+
+    plan = build()
+    # Building may refresh remote summaries, store the plan under the revision it was built against
+    revision = _plan_cache_revision(installation)
+    if revision is not None and not plan.messages:
+        with _plan_cache_lock:
+            _plan_cache[(installation.get_path().get_path(), key, revision)] = plan
+    return plan
+
+def _resolve_plan(installation: Flatpak.Installation, transaction: Flatpak.Transaction, messages: list[str]) -> TransactionPlan:
+    """Resolve a prepared transaction, read its operations and abort before anything is pulled"""
+    previous_sizes = {ref.format_ref(): ref.get_installed_size() for ref in installation.list_installed_refs(None)}
+    planned = []
+
+    def on_ready(transaction):
+        for operation in transaction.get_operations():
+            ref = operation.get_ref()
+            op_type = operation.get_operation_type()
+            if op_type == Flatpak.TransactionOperationType.UNINSTALL:
+                download_size, installed_size = 0, 0
+            else:
+                download_size = operation.get_download_size()
+                installed_size = operation.get_installed_size()
+            planned.append(PlannedOperation(
+                ref,
+                Flatpak.transaction_operation_type_to_string(op_type),
+                operation.get_remote(),
+                download_size,
+                installed_size,
+                previous_sizes.get(ref, 0)
+            ))
+        # Returning False aborts the transaction, this is a dry run
+        return False
+
+    transaction.connect("ready", on_ready)
+    try:
+        transaction.run()
+    except GLib.Error as e:
+        if not e.matches(Flatpak.error_quark(), Flatpak.Error.ABORTED):
+            messages.append(f"Failed to resolve transaction: {e}")
+    return TransactionPlan(planned, messages)
+
+def plan_update_all(system=False) -> TransactionPlan:
+    """
+    Estimate download size and disk usage of updating everything.
+
+    Args:
+        system (bool): Whether to use the user or system installation
+
+    Returns:
+        TransactionPlan: The resolved operations and their sizes
+    """
+    installation = get_installation(system)
+
+    def build():
+        transaction = Flatpak.Transaction.new_for_installation(installation)
+        updates = installation.list_installed_refs_for_update(None)
+        if not updates:
+            return TransactionPlan([])
+        for update in updates:
+            transaction.add_update(update.format_ref())
+        return _resolve_plan(installation, transaction, [])
+
+    return _cached_plan(installation, ("update-all",), build)
+
+def get_installation(system=False):
+    if system is False:
+        installation = Flatpak.Installation.new_user()
+    else:
+        installation = Flatpak.Installation.new_system()
+    return installation
+
+def get_reposearcher(system=False, refresh=False, backend=None):
+    installation = get_installation(system)
+    searcher = AppstreamSearcher(refresh, backend)
+    searcher.add_installation(installation)
+    return searcher
+
+def patch_installed_state(snapshot: CatalogSnapshot, refs, system=False) -> tuple[CatalogSnapshot, set[str]]:
+    """
+    Update installed and update state for the refs a transaction touched.
+
+    Each ref costs one local get_installed_ref() lookup, nothing is re-parsed
+    or re-queried from the remotes. Affected refs drop out of the update list,
+    since they were just installed, updated or removed.
+
+    Args:
+        snapshot (CatalogSnapshot): Current snapshot
+        refs (Iterable[str]): Refs the transaction installed, updated or removed
+        system (bool): Whether to use the user or system installation
+
+    Returns:
+        tuple[CatalogSnapshot, set[str]]: (new snapshot, ids of apps whose state changed)
+    """
+    installation = get_installation(system)
+    changed_names = set()
+    # ref name -> origin of the refs that are installed now
+    installed_now = {}
+    for ref in refs:
+        try:
+            parsed = Flatpak.Ref.parse(ref)
+        except GLib.Error:
+            continue
+        changed_names.add(parsed.get_name())
+        try:
+            installed = installation.get_installed_ref(parsed.get_kind(), parsed.get_name(),
+                                                       parsed.get_arch(), parsed.get_branch(), None)
+            installed_now[parsed.get_name()] = installed.get_origin()
+        except GLib.Error:
+            pass
+
+    if not changed_names:
+        return snapshot, set()
+
+    installed_results = []
+    updates_results = []
+    changed_ids = set()
+    for results, source in ((installed_results, snapshot.installed_results),
+                            (updates_results, snapshot.updates_results)):
+        for app in source:
+            if _bundle_ref_name(app) in changed_names:
+                changed_ids.add(app.id)
+            else:
+                results.append(app)
+
+    for name, origin in installed_now.items():
+        # AppStream ids are the ref name, sometimes with a .desktop suffix
+        for app_id in (name, name + ".desktop"):
+            app = snapshot.apps_by_id.get(app_id)
+            if app is not None and app.repo_name != origin:
+                app = snapshot.apps_by_remote.get((origin, app_id))
+            if app is not None and _bundle_ref_name(app) == name:
+                installed_results.append(app)
+                changed_ids.add(app.id)
+                break
+
+    return snapshot.with_installed(installed_results, updates_results), changed_ids
+
+def invalidate_installation_caches(system=False):
+    """Drop cached state that depends on what an installation has deployed"""
+    path = get_installation(system).get_path().get_path()
+    with _plan_cache_lock:
+        for key in [key for key in _plan_cache if key[0] == path]:
+            del _plan_cache[key]
+    with _update_cache_lock:
+        check = _update_cache.get(path)
+        if check:
+            # Keep serving it, the next get_pending_updates() revalidates
+            check.checked_at = 0.0
+
+# Seconds a cached update check is served before it is revalidated
+UPDATE_CHECK_TTL = 900
+
+class UpdateCheck:
+    """Result of one list_installed_refs_for_update() on an installation"""
+
+    def __init__(self, updates: list[Flatpak.InstalledRef], revision, checked_at: float) -> None:
+        self.updates = updates
+        # _plan_cache_revision() right after the check, None if unknown
+        self.revision = revision
+        self.checked_at = checked_at
+        # ref -> commit that was deployed when the check ran
+        self.deployed = {ref.format_ref(): ref.get_commit() for ref in updates}
+
+    def is_fresh(self, revision, max_age=UPDATE_CHECK_TTL) -> bool:
+        if self.revision is None or self.revision != revision:
+            return False
+        return time.time() - self.checked_at < max_age
+
+# Update checks keyed by installation path
+_update_cache: dict[str, UpdateCheck] = {}
+_update_cache_lock = threading.Lock()
+# Installation path -> running revalidation thread
+_update_revalidations: dict[str, threading.Thread] = {}
+
+def _check_updates_now(installation: Flatpak.Installation, cancellable=None) -> list[Flatpak.InstalledRef]:
+    """List pending updates from the remotes and cache the result"""
+    updates = installation.list_installed_refs_for_update(cancellable)
+    # Taken after the check, listing updates may refresh the remote summaries
+    check = UpdateCheck(list(updates), _plan_cache_revision(installation), time.time())
+    with _update_cache_lock:
+        _update_cache[installation.get_path().get_path()] = check
+    return check.updates
+
+def _prune_applied_updates(installation: Flatpak.Installation, check: UpdateCheck) -> list[Flatpak.InstalledRef]:
+    """
+    Drop cached updates that were deployed or removed since they were listed,
+    using local lookups only. An update counts as applied once the ref's
+    deployed commit differs from the one deployed when the check ran.
+    """
+    pending = []
+    for update in check.updates:
+        try:
+            installed = installation.get_installed_ref(update.get_kind(), update.get_name(),
+                                                       update.get_arch(), update.get_branch(), None)
+        except GLib.Error:
+            continue
+        if installed.get_commit() == check.deployed.get(update.format_ref()):
+            pending.append(update)
+    return pending
+
+def _revalidate_updates(system, on_revalidated=None):
+    """Re-run the update check on a background thread, at most one per installation"""
+    installation = get_installation(system)
+    path = installation.get_path().get_path()
+
+    def revalidate():
+        try:
+            if not check_internet(wait=False):
+                return
+            with _update_cache_lock:
+                before = _update_cache.get(path)
+            updates = _check_updates_now(installation)
+            if on_revalidated:
+                before_refs = {(ref.format_ref(), ref.get_latest_commit()) for ref in before.updates} if before else None
+                after_refs = {(ref.format_ref(), ref.get_latest_commit()) for ref in updates}
+                if before_refs != after_refs:
+                    on_revalidated(system, updates)
+        except GLib.Error as e:
+            logger.error(f"Failed to check for updates: {str(e)}")
+        finally:
+            with _update_cache_lock:
+                _update_revalidations.pop(path, None)
+
+    with _update_cache_lock:
+        if path in _update_revalidations:
+            return
+        thread = threading.Thread(target=revalidate, daemon=True)
+        _update_revalidations[path] = thread
+    thread.start()
+
+def get_pending_updates(system=False, max_age=UPDATE_CHECK_TTL, wait=True, on_revalidated=None) -> list[Flatpak.InstalledRef]:
+    """
+    Return pending updates, served from the cache whenever there is one.
+
+    A cached check is fresh while it is younger than max_age and no remote
+    summary or deployment changed since. A stale check is still returned
+    right away, minus updates that were applied since, and revalidated on a
+    background thread.
+
+    Args:
+        system (bool): Whether to use the user or system installation
+        max_age (float): Seconds a check is fresh for
+        wait (bool): Query the remotes when nothing is cached yet, instead of returning an empty list
+        on_revalidated (callable): Optional, called as on_revalidated(system, updates) from the
+            background thread when revalidation changed the result
+
+    Returns:
+        list[Flatpak.InstalledRef]: Installed refs with an update available
+    """
+    installation = get_installation(system)
+    with _update_cache_lock:
+        check = _update_cache.get(installation.get_path().get_path())
+
+    if check is None:
+        if wait:
+            return _check_updates_now(installation)
+        _revalidate_updates(system, on_revalidated)
+        return []
+
+    revision = _plan_cache_revision(installation)
+    if check.is_fresh(revision, max_age):
+        return check.updates
+    updates = check.updates
+    if check.revision is None or revision is None or check.revision[-1] != revision[-1]:
+        # Something was deployed since the check
+        updates = _prune_applied_updates(installation, check)
+    _revalidate_updates(system, on_revalidated)
+    return updates
+
+def apply_pending_updates(snapshot: CatalogSnapshot, updates: list[Flatpak.InstalledRef]) -> tuple[CatalogSnapshot, set[str]]:
+    """
+    Replace the snapshot's update list with packages matching the given refs.
+
+    Args:
+        snapshot (CatalogSnapshot): Current snapshot
+        updates (list[Flatpak.InstalledRef]): Pending updates, e.g. from get_pending_updates()
+
+    Returns:
+        tuple[CatalogSnapshot, set[str]]: (new snapshot, ids of apps that gained or lost an update)
+    """
+    pending = {(ref.get_name(), ref.get_origin()) for ref in updates}
+    updates_results = []
+    seen = set()
+    for app in snapshot.all_apps:
+        key = (_bundle_ref_name(app), app.repo_name)
+        if key in pending and key not in seen:
+            updates_results.append(app)
+            seen.add(key)
+    changed_ids = {app.id for app in snapshot.updates_results} ^ {app.id for app in updates_results}
+    return snapshot.with_installed(snapshot.installed_results, updates_results), changed_ids
+
+class InstallationMonitor:
+    """
+    Watches the user and system installations for changes made outside this
+    process, such as the flatpak CLI, another Flatpost or automatic updates.
+
+    Flatpak touches the installation's .changed file on every deploy, the
+    monitor waits for a burst of those to settle, diffs the installed refs
+    against what it saw last and calls callback(system, refs) with just the
+    refs that were installed, removed or moved to another commit. Nothing is
+    polled, the monitors cost nothing while idle. Signals are delivered on
+    the main context of the thread that created the monitor.
+    """
+
+    def __init__(self, callback, debounce_ms=500) -> None:
+        self.callback = callback
+        self.debounce_ms = debounce_ms
+        # system flag -> (installation, Gio.FileMonitor)
+        self._monitors = {}
+        # system flag -> {ref: deployed commit}
+        self._installed = {}
+        # system flag -> pending GLib timeout source id
+        self._pending = {}
+
+        for system in (False, True):
+            try:
+                installation = get_installation(system)
+                monitor = installation.create_monitor(None)
+            except GLib.Error as e:
+                logger.warning(f"Can't monitor the {'system' if system else 'user'} installation: {str(e)}")
+                continue
+            monitor.connect("changed", self._on_changed, system)
+            self._monitors[system] = (installation, monitor)
+            self._installed[system] = self._deployed_commits(installation)
+
+    @staticmethod
+    def _deployed_commits(installation: Flatpak.Installation) -> dict[str, str]:
+        # Flatpak.Installation caches its view of the directory
+        installation.drop_caches(None)
+        return {ref.format_ref(): ref.get_commit() for ref in installation.list_installed_refs(None)}
+
+    def _on_changed(self, monitor, file, other_file, event_type, system):
+        # One transaction touches .changed several times, handle them together
+        if self._pending.get(system):
+            return
+        self._pending[system] = GLib.timeout_add(self.debounce_ms, self._process, system)
+
+    def _process(self, system):
+        self._pending[system] = None
+        installation, _ = self._monitors[system]
+        try:
+            after = self._deployed_commits(installation)
+        except GLib.Error as e:
+            logger.error(f"Failed to list installed refs: {str(e)}")
+            return False
+        before = self._installed.get(system, {})
+        self._installed[system] = after
+        changed = {ref for ref in before.keys() | after.keys() if before.get(ref) != after.get(ref)}
+        if changed:
+            invalidate_installation_caches(system)
+            self.callback(system, changed)
+        return False
+
+    def stop(self):
+        for source_id in self._pending.values():
+            if source_id:
+                GLib.source_remove(source_id)
+        self._pending.clear()
+        for installation, monitor in self._monitors.values():
+            monitor.cancel()
+        self._monitors.clear()
+
+def benchmark_appstream_backends(system=False, runs=2) -> dict[str, dict]:
+    """
+    Time loading all enabled remotes with every AppStream backend.
+
+    Caches are left alone, so the first run only measures a cold start when
+    none exist yet. The last run is reported as the warm-start time.
+
+    Args:
+        system (bool): Whether to use the user or system installation
+        runs (int): Number of loads per backend
+
+    Returns:
+        dict[str, dict]: backend -> {"first": seconds, "warm": seconds, "packages": count,
+        "remotes": {remote: seconds}}
+    """
+    results = {}
+    for backend in APPSTREAM_BACKENDS:
+        timings = []
+        searcher = None
+        for _ in range(max(runs, 1)):
+            start = time.perf_counter()
+            searcher = get_reposearcher(system, False, backend)
+            timings.append(time.perf_counter() - start)
+        results[backend] = {
+            "first": timings[0],
+            "warm": timings[-1],
+            "packages": len(searcher.get_all_apps()),
+            "remotes": dict(searcher.load_times),
+        }
+    return results
+
+class ConnectivityMonitor:
+    """
+    Cached view of whether Flathub is reachable.
+
+    Gio.NetworkMonitor answers "is there a network at all" instantly and tells
+    us when that changes. Reachability of flathub.org itself comes from one
+    HEAD probe whose result is kept for ttl seconds and refreshed on a
+    background thread, so callers never wait on the probe once it has run.
+    """
+
+    def __init__(self, ttl=60, probe_url='https://flathub.org') -> None:
+        self.ttl = ttl
+        self.probe_url = probe_url
+        self._lock = threading.Lock()
+        self._online = None  # Result of the last probe, None until one finished
+        self._checked_at = 0.0
+        self._probe_thread = None
+        self._network_monitor = Gio.NetworkMonitor.get_default()
+        self._network_monitor.connect("network-changed", self._on_network_changed)
+
+    def _network_available(self) -> bool:
+        if not self._network_monitor.get_network_available():
+            return False
+        return self._network_monitor.get_connectivity() != Gio.NetworkConnectivity.LOCAL
+
+    def _on_network_changed(self, monitor, available):
+        with self._lock:
+            # Whatever the probe said no longer applies
+            self._checked_at = 0.0
+            if not available:
+                self._online = False
+        if available:
+            self._start_probe()
+
+    def _probe(self):
+        try:
+            requests.head(self.probe_url, timeout=3)
+            online = True
+        except requests.RequestException:
+            online = False
+        with self._lock:
+            self._online = online
+            self._checked_at = time.monotonic()
+            if self._probe_thread is threading.current_thread():
+                self._probe_thread = None
+        return online
+
+    def _start_probe(self):
+        with self._lock:
+            if self._probe_thread is not None:
+                return
+            self._probe_thread = threading.Thread(target=self._probe, daemon=True)
+            self._probe_thread.start()
+
+    def invalidate(self):
+        """Forget the cached probe result, the next query revalidates it"""
+        with self._lock:
+            self._checked_at = 0.0
+
+    def is_online(self, wait=False) -> bool:
+        """
+        Return whether Flathub is reachable.
+
+        Args:
+            wait (bool): Block on the probe if none has finished yet. Without it
+                the first answer is a guess from the network state alone.
+
+        Returns:
+            bool: True if online
+        """
+        if not self._network_available():
+            return False
+        with self._lock:
+            online = self._online
+            fresh = online is not None and time.monotonic() - self._checked_at < self.ttl
+        if fresh:
+            return online
+        if online is None and wait:
+            return self._probe()
+        # Answer from what we know, the probe refreshes it for the next caller
+        self._start_probe()
+        return True if online is None else online
+
+_connectivity_monitor = None
+_connectivity_monitor_lock = threading.Lock()
+
+def get_connectivity_monitor() -> ConnectivityMonitor:
+    """Return the process wide ConnectivityMonitor"""
+    global _connectivity_monitor
+    with _connectivity_monitor_lock:
+        if _connectivity_monitor is None:
+            _connectivity_monitor = ConnectivityMonitor()
+        return _connectivity_monitor
+
+def check_internet(wait=True):
+    """Check if internet connection is available, only the very first check can block."""
+    return get_connectivity_monitor().is_online(wait)
+
+def repotoggle(repo, toggle=True, system=False):
+    """
+    Enable or disable a Flatpak repository
 
     Args:
         repo (str): Name of the repository to toggle
@@ -1197,16 +2934,57 @@ def download_repo(url):
     except IOError as e:
         raise argparse.ArgumentTypeError(f"Failed to save repository file: {str(e)}")
 
+# system flag -> installation directory, resolved once
+_installation_dirs: dict[bool, str] = {}
+# (app_id, system) -> (metadata path, signature of the installation's .changed marker)
+_metadata_paths: dict[tuple, tuple] = {}
+# Cache key -> (path, file signature, KeyFile), see _load_key_file_cached()
+_perm_key_files: dict[tuple, tuple] = {}
+_perm_key_file_lock = threading.Lock()
+
+def _file_signature(path: str):
+    """Return (inode, mtime, size) of a file, None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def _installation_dir(system=False) -> str:
+    if system not in _installation_dirs:
+        _installation_dirs[system] = get_installation(system).get_path().get_path()
+    return _installation_dirs[system]
+
+def _resolve_app_metadata_path(app_id: str, system=False) -> str:
+    """
+    Return the deployed metadata file of an app.
+
+    The deploy dir only moves when flatpak deploys something, which touches
+    the installation's .changed marker, so the lookup is cached until then.
+    """
+    changed = _file_signature(os.path.join(_installation_dir(system), ".changed"))
+    with _perm_key_file_lock:
+        cached = _metadata_paths.get((app_id, system))
+    if cached and cached[1] == changed:
+        return cached[0]
+
+    installation = get_installation(system)
+    app_path = installation.get_current_installed_app(app_id).get_deploy_dir()
+    if not app_path:
+        return ""
+    metadata_path = app_path + "/metadata"
+    with _perm_key_file_lock:
+        _metadata_paths[(app_id, system)] = (metadata_path, changed)
+    return metadata_path
+
 def get_metadata_path(app_id: str | None, override=False, system=False) -> str:
     metadata_path = ""
     if app_id:
         # Get the application's metadata file
-        installation = get_installation(system)
-        app_path = installation.get_current_installed_app(app_id).get_deploy_dir()
-        if not app_path:
+        metadata_path = _resolve_app_metadata_path(app_id, system)
+        if not metadata_path:
             print(f"Application {app_id} not found")
             return metadata_path
-        metadata_path = app_path + "/metadata"
     elif override:
         if system:
             metadata_path = "/var/lib/flatpak/overrides/global"
@@ -1226,20 +3004,456 @@ def get_metadata_path(app_id: str | None, override=False, system=False) -> str:
         return metadata_path
     return metadata_path
 
-def get_perm_key_file(app_id: str | None,  override=False, system=False) -> GLib.KeyFile:
-    metadata_path = get_metadata_path(app_id, override, system)
-    # Create a new KeyFile object
+def _load_key_file_cached(cache_key, path: str) -> GLib.KeyFile:
+    """Return the parsed file at path, reusing the cached parse while the file is unchanged"""
+    signature = _file_signature(path)
+    with _perm_key_file_lock:
+        cached = _perm_key_files.get(cache_key)
+    if cached and signature is not None and cached[:2] == (path, signature):
+        return cached[2]
+
     key_file = GLib.KeyFile()
+    key_file.load_from_file(path, GLib.KeyFileFlags.NONE)
+    if signature is not None:
+        with _perm_key_file_lock:
+            _perm_key_files[cache_key] = (path, signature, key_file)
+    return key_file
+
+def get_perm_key_file(app_id: str | None,  override=False, system=False, writable=False) -> GLib.KeyFile:
+    """
+    Return the parsed metadata or override file of an app or the global override.
+
+    Parsed files are cached per (app, installation, override) and reused
+    until the file's inode, mtime or size changes, so building a whole
+    permissions dialog reads each file once.
 
+    Args:
+        app_id (str | None): The ID of the Flatpak application, None for the global override
+        override (bool): Whether to use the override file
+        system (bool): Whether to use the user or system installation
+        writable (bool): Return a private copy that may be modified, the cached
+            KeyFile is shared by all readers and must not be changed
+
+    Returns:
+        GLib.KeyFile: The parsed file, None if it couldn't be read
+    """
+    metadata_path = get_metadata_path(app_id, override, system)
     # Read the existing metadata
     try:
-        key_file.load_from_file(metadata_path, GLib.KeyFileFlags.NONE)
+        key_file = _load_key_file_cached((app_id, system, override), metadata_path)
     except GLib.Error as e:
         print(f"Failed to read metadata file: {str(e)}")
         return None
 
+    if writable:
+        data, _ = key_file.to_data()
+        copy = GLib.KeyFile()
+        copy.load_from_data(data, len(data.encode()), GLib.KeyFileFlags.NONE)
+        return copy
     return key_file
 
+# Milliseconds PermissionEditSession.schedule_commit() waits for more changes
+PERMISSION_COMMIT_DELAY_MS = 500
+
+def _normalize_permission_path(path: str) -> str:
+    """Return a filesystem permission as it is stored in the metadata"""
+    if path.lower() in ("host", "host-os", "host-etc", "home"):
+        return path.lower()
+    # Ensure path do not ends with a trailing slash
+    filesystem_path = path.rstrip('/')
+    # Validate absolute paths start with /
+    if filesystem_path.startswith('/'):
+        filesystem_path = '/' + filesystem_path.lstrip('/')
+    return filesystem_path
+
+def _same_permission_path(a: str, b: str) -> bool:
+    return os.path.abspath(a.rstrip('/')) == os.path.abspath(b.rstrip('/'))
+
+def _policy_section(perm_type: str) -> str | None:
+    """Map environment/session_bus/system_bus to the metadata group they live in"""
+    match perm_type.lower():
+        case "environment":
+            return "Environment"
+        case "session_bus":
+            return "Session Bus Policy"
+        case "system_bus":
+            return "System Bus Policy"
+    return None
+
+def _context_list(key_file: GLib.KeyFile, perm_type: str) -> list[str]:
+    try:
+        existing = key_file.get_string("Context", perm_type)
+    except GLib.Error:
+        return []
+    return [perm.strip() for perm in (existing or "").split(';') if perm.strip()]
+
+def _set_context_list(key_file: GLib.KeyFile, perm_type: str, values: list[str]):
+    if values:
+        key_file.set_string("Context", perm_type, ";".join(values))
+    elif key_file.has_group("Context") and perm_type in key_file.get_keys("Context")[0]:
+        key_file.remove_key("Context", perm_type)
+
+def _edit_add_path(key_file: GLib.KeyFile, perm_type: str, path: str) -> bool:
+    paths = _context_list(key_file, perm_type)
+    if any(_same_permission_path(path, existing) for existing in paths):
+        return False
+    _set_context_list(key_file, perm_type, paths + [path])
+    return True
+
+def _edit_remove_path(key_file: GLib.KeyFile, perm_type: str, path: str) -> bool:
+    paths = _context_list(key_file, perm_type)
+    remaining = [existing for existing in paths if not _same_permission_path(path, existing)]
+    if len(remaining) == len(paths):
+        return False
+    _set_context_list(key_file, perm_type, remaining)
+    return True
+
+def _edit_toggle(key_file: GLib.KeyFile, perm_type: str, option: str, enable: bool) -> bool:
+    perms = _context_list(key_file, perm_type)
+    if (option in perms) == enable:
+        return False
+    if enable:
+        perms.append(option)
+    else:
+        perms.remove(option)
+    _set_context_list(key_file, perm_type, perms)
+    return True
+
+def _edit_set_value(key_file: GLib.KeyFile, section: str, key: str, value: str) -> bool:
+    key_file.set_string(section, key, value)
+    return True
+
+def _edit_remove_value(key_file: GLib.KeyFile, section: str, key: str) -> bool:
+    key_file.remove_key(section, key)
+    return True
+
+def _stage_key_file(key_file: GLib.KeyFile, path: str) -> str:
+    """Write a KeyFile to a temp file next to path, returns the temp file to rename over path"""
+    data, _ = key_file.to_data()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        mode = os.stat(path).st_mode & 0o7777 if os.path.exists(path) else 0o644
+        os.chmod(tmp_path, mode)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+def _write_key_file_atomic(key_file: GLib.KeyFile, path: str):
+    """Write a KeyFile to a temp file next to path and rename it over path"""
+    os.replace(_stage_key_file(key_file, path), path)
+
+class PermissionEditSession:
+    """
+    Batch of permission changes to one app or to a global override file.
+
+    Changes are applied to a private copy of the file as they are made and
+    written once by commit(), to a temp file that is renamed over the
+    original. If the file changed on disk in the meantime, the changes are
+    replayed on its new contents instead of overwriting them.
+    schedule_commit() coalesces a burst of changes, e.g. switches flipped in
+    the permissions window, into a single write.
+    """
+
+    def __init__(self, app_id: str | None = None, override=False, system=False, path=None) -> None:
+        self.app_id = app_id
+        self.override = override
+        self.system = system
+        # Optional, edit this file (e.g. overrides/<app_id>) instead of the
+        # app's metadata or the global override, it is created if missing
+        self.path = path
+        # (edit function, args) applied since the last commit
+        self._edits = []
+        self._key_file = None
+        self._signature = None
+        self._commit_source = None
+        self._commit_callback = None
+        self._target = f"for {app_id}" if app_id else "globally"
+
+    @property
+    def pending(self) -> int:
+        """Number of changes that haven't been written yet"""
+        return len(self._edits)
+
+    def target_path(self) -> str:
+        """The file commit() writes"""
+        return self.path or get_metadata_path(self.app_id, self.override, self.system)
+
+    def _load(self) -> GLib.KeyFile:
+        self._signature = _file_signature(self.target_path())
+        if self.path is None:
+            self._key_file = get_perm_key_file(self.app_id, self.override, self.system, writable=True)
+            return self._key_file
+        key_file = GLib.KeyFile()
+        if self._signature is not None:
+            key_file.load_from_file(self.path, GLib.KeyFileFlags.NONE)
+        self._key_file = key_file
+        return self._key_file
+
+    def apply_edit(self, edit, *args) -> bool:
+        """
+        Apply one edit to the working copy, returns whether it changed anything.
+
+        edit(key_file, *args) changes the KeyFile in place and returns whether
+        it did, it is replayed if the file changes on disk before commit().
+
+        Raises:
+            GLib.Error: If the file can't be loaded
+        """
+        changed = edit(self.pending_key_file(), *args)
+        if changed:
+            self._edits.append((edit, args))
+        return changed
+
+    def pending_key_file(self) -> GLib.KeyFile:
+        """
+        The working copy with every pending change applied, loaded on first use.
+
+        It belongs to the session, callers may read it but must change it
+        through apply_edit() only.
+
+        Raises:
+            GLib.Error: If the file can't be loaded
+        """
+        if self._key_file is None and self._load() is None:
+            raise GLib.Error(f"Failed to get permissions {self._target}")
+        return self._key_file
+
+    def add_path(self, path: str, perm_type=None) -> tuple[bool, str]:
+        """Grant access to a path, perm_type is "filesystems" (default) or "persistent" """
+        try:
+            self.apply_edit(_edit_add_path, perm_type or "filesystems", _normalize_permission_path(path))
+        except GLib.Error as e:
+            return False, f"Failed to modify permissions: {str(e)}"
+        return True, f"Successfully granted access to {path} {self._target}"
+
+    def remove_path(self, path: str, perm_type=None) -> tuple[bool, str]:
+        """Revoke access to a path, perm_type is "filesystems" (default) or "persistent" """
+        try:
+            changed = self.apply_edit(_edit_remove_path, perm_type or "filesystems", _normalize_permission_path(path))
+        except GLib.Error as e:
+            return False, f"Failed to modify permissions: {str(e)}"
+        if not changed:
+            where = f"in {self.app_id}" if self.app_id else "globally"
+            return True, f"No permission found for {path} {where}"
+        return True, f"Successfully removed access to {path} {self._target}"
+
+    def toggle(self, perm_type: str, option: str, enable: bool) -> tuple[bool, str]:
+        """Enable or disable an option of a Context key (shared, sockets, devices, features)"""
+        try:
+            self.apply_edit(_edit_toggle, perm_type, option, enable)
+        except GLib.Error:
+            return False, f"Failed to toggle {option} {self._target}"
+        return True, f"Successfully {'enabled' if enable else 'disabled'} {option} {self._target}"
+
+    def add_value(self, perm_type: str, value: str) -> tuple[bool, str]:
+        """Set a key=value in the environment, session_bus or system_bus section"""
+        section = _policy_section(perm_type)
+        if section is None:
+            return False, "Invalid permission type"
+        parts = value.split('=', 1)
+        if len(parts) != 2:
+            return False, "Value must be in format 'key=value'"
+        key, val = parts
+        if section in ['Session Bus Policy', 'System Bus Policy'] and val not in ['talk', 'own']:
+            return False, "Value must be in format 'key=value' with value as 'talk' or 'own'"
+        try:
+            self.apply_edit(_edit_set_value, section, key, val)
+        except GLib.Error as e:
+            return False, f"Error adding permission: {str(e)}"
+        return True, f"Successfully added {value} to {section} section"
+
+    def remove_value(self, perm_type: str, value: str) -> tuple[bool, str]:
+        """Remove a key=value from the environment, session_bus or system_bus section"""
+        section = _policy_section(perm_type)
+        if section is None:
+            return False, "Invalid permission type"
+        parts = value.split('=', 1)
+        if len(parts) != 2:
+            return False, "Value must be in format 'key=value'"
+        try:
+            if not self.pending_key_file().has_group(section):
+                return False, f"Section {section} does not exist"
+            self.apply_edit(_edit_remove_value, section, parts[0])
+        except GLib.Error as e:
+            return False, f"Error removing permission: {str(e)}"
+        return True, f"Successfully removed {value} from {section} section"
+
+    def commit(self) -> tuple[bool, str]:
+        """
+        Write all pending changes at once.
+
+        Returns:
+            tuple[bool, str]: (success, message), on failure the pending changes are dropped
+        """
+        if not self._edits:
+            self._cancel_scheduled()
+            return True, "No changes to save"
+        count = len(self._edits)
+        try:
+            path, tmp_path = self.stage()
+            os.replace(tmp_path, path)
+        except (GLib.Error, OSError) as e:
+            self.discard()
+            return False, f"Failed to save metadata file: {str(e)}"
+        self.finalize(path)
+        return True, f"Saved {count} permission change{'s' if count != 1 else ''} {self._target}"
+
+    def stage(self) -> tuple[str, str]:
+        """
+        Write the pending changes to a temp file next to the target.
+
+        A scheduled commit is cancelled, the caller renames the temp file over
+        the target and then calls finalize(), or unlinks it and calls discard().
+
+        Returns:
+            tuple[str, str]: (target path, temp file)
+
+        Raises:
+            GLib.Error, OSError: If the file can't be read or the temp file written
+        """
+        self._cancel_scheduled()
+        path = self.target_path()
+        if _file_signature(path) != self._signature:
+            # Changed on disk since it was loaded, replay on the current contents
+            edits = self._edits
+            if self._load() is None:
+                raise GLib.Error(f"Failed to get permissions {self._target}")
+            for edit, args in edits:
+                edit(self._key_file, *args)
+        return path, _stage_key_file(self._key_file, path)
+
+    def finalize(self, path: str):
+        """Mark the changes staged by stage() as written once the temp file replaced path"""
+        self._edits = []
+        self._signature = _file_signature(path)
+
+    def discard(self):
+        """Drop pending changes, the next change reloads the file"""
+        self._cancel_scheduled()
+        self._edits = []
+        self._key_file = None
+
+    def schedule_commit(self, delay_ms=PERMISSION_COMMIT_DELAY_MS, callback=None):
+        """
+        Commit once no further change was scheduled for delay_ms.
+
+        Runs on the GLib main context, callback receives commit()'s (success, message).
+        """
+        if self._commit_source:
+            GLib.source_remove(self._commit_source)
+        self._commit_callback = callback
+        self._commit_source = GLib.timeout_add(delay_ms, self._on_commit_timeout)
+
+    def _on_commit_timeout(self):
+        self._commit_source = None
+        self._run_commit()
+        return False
+
+    def _run_commit(self) -> tuple[bool, str]:
+        callback, self._commit_callback = self._commit_callback, None
+        result = self.commit()
+        if callback:
+            callback(*result)
+        return result
+
+    def flush(self) -> tuple[bool, str]:
+        """Commit a scheduled commit right away, e.g. before the window closes"""
+        if self._commit_source:
+            GLib.source_remove(self._commit_source)
+            self._commit_source = None
+        return self._run_commit()
+
+    def _cancel_scheduled(self):
+        if self._commit_source:
+            GLib.source_remove(self._commit_source)
+            self._commit_source = None
+
+def commit_permission_sessions(sessions: list[PermissionEditSession]) -> tuple[bool, str]:
+    """
+    Commit several sessions as one operation.
+
+    Every session is staged to a temp file and the current contents of its
+    target are kept, only once all of them staged are the temp files renamed
+    over the originals. If staging or any rename fails, the targets already
+    replaced are restored, the remaining temp files removed and all sessions
+    discarded, so either every file is written or none is.
+
+    Returns:
+        tuple[bool, str]: (success, message)
+    """
+    # (session, path, temp file, original bytes or None if path didn't exist)
+    staged = []
+    replaced = []
+    try:
+        for session in sessions:
+            if session.pending:
+                path, tmp_path = session.stage()
+                staged.append((session, path, tmp_path, None))
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        staged[-1] = (session, path, tmp_path, f.read())
+        for session, path, tmp_path, original in staged:
+            os.replace(tmp_path, path)
+            replaced.append((path, original))
+    except (GLib.Error, OSError) as e:
+        failed_restores = _restore_files(replaced)
+        for _, _, tmp_path, _ in staged:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        for session in sessions:
+            session.discard()
+        if failed_restores:
+            return False, (f"Failed to save permission changes: {str(e)}, "
+                           f"could not restore {', '.join(failed_restores)}")
+        return False, f"Failed to save permission changes, nothing was applied: {str(e)}"
+
+    for session, path, _, _ in staged:
+        session.finalize(path)
+    return True, f"Saved permission changes to {len(staged)} file{'s' if len(staged) != 1 else ''}"
+
+def _restore_files(replaced: list[tuple[str, bytes | None]]) -> list[str]:
+    """Put back the original contents of files a failed batch replaced, returns the paths that couldn't be restored"""
+    failed = []
+    for path, original in reversed(replaced):
+        try:
+            if original is None:
+                os.unlink(path)
+                continue
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(original)
+                    f.flush()
+                    os.fsync(f.fileno())
+                # The staged file kept the original's mode
+                os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+                os.replace(tmp_path, path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.error(f"Failed to restore {path}: {str(e)}")
+            failed.append(path)
+    return failed
+
+def _commit_single_edit(session: PermissionEditSession, result: tuple[bool, str]) -> tuple[bool, str]:
+    """Commit a session holding one edit, keeping the edit's message on success"""
+    success, message = result
+    if not success or not session.pending:
+        return success, message
+    committed, error = session.commit()
+    if not committed:
+        return False, error
+    return True, message
+
 def add_file_permissions(app_id: str, path: str, perm_type=None, system=False) -> tuple[bool, str]:
     """
     Add filesystem permissions to a Flatpak application.
@@ -1255,58 +3469,8 @@ def add_file_permissions(app_id: str, path: str, perm_type=None, system=False) -
     Returns:
         tuple[bool, str]: (success, message)
     """
-    try:
-        key_file = get_perm_key_file(app_id, False, system)
-        perm_type = perm_type or "filesystems"
-        # Handle special case for home directory
-        if path.lower() == "host":
-            filesystem_path = "host"
-        elif path.lower() == "host-os":
-            filesystem_path = "host-os"
-        elif path.lower() == "host-etc":
-            filesystem_path = "host-etc"
-        elif path.lower() == "home":
-            filesystem_path = "home"
-        else:
-            # Ensure path do not ends with a trailing slash
-            filesystem_path = path.rstrip('/')
-
-            # Validate absolute paths start with /
-            if filesystem_path.startswith('/'):
-                filesystem_path = '/' + filesystem_path.lstrip('/')
-
-        if not key_file.has_group("Context"):
-            key_file.set_string("Context", perm_type, "")
-
-        context_keys = key_file.get_keys("Context")
-        if perm_type not in str(context_keys):
-            key_file.set_string("Context", perm_type, "")
-
-        existing_paths = key_file.get_string("Context", perm_type)
-        if existing_paths is None or existing_paths == "":
-            # If no filesystems exist, set the exact path provided
-            key_file.set_string("Context", perm_type, filesystem_path)
-        else:
-            existing_paths_list = existing_paths.split(';')
-            normalized_new_path = os.path.abspath(filesystem_path.rstrip('/'))
-            normalized_existing_paths = [os.path.abspath(p.rstrip('/')) for p in existing_paths_list]
-
-            if normalized_new_path not in normalized_existing_paths:
-                # Add new path with proper separator
-                separator = ';' if existing_paths.endswith(';') else ';'
-                key_file.set_string("Context", perm_type,
-                                    existing_paths + separator + filesystem_path)
-
-        # Write the modified metadata back
-        try:
-            key_file.save_to_file(get_metadata_path(app_id, False, system))
-        except GLib.Error as e:
-            return False, f"Failed to save metadata file: {str(e)}"
-
-        return True, f"Successfully granted access to {path} for {app_id}"
-
-    except GLib.Error as e:
-        return False, f"Failed to modify permissions: {str(e)}"
+    session = PermissionEditSession(app_id, False, system)
+    return _commit_single_edit(session, session.add_path(path, perm_type))
 
 
 def remove_file_permissions(app_id: str, path: str, perm_type=None, system=False) -> tuple[bool, str]:
@@ -1324,60 +3488,8 @@ def remove_file_permissions(app_id: str, path: str, perm_type=None, system=False
     Returns:
         tuple[bool, str]: (success, message)
     """
-    try:
-        key_file = get_perm_key_file(app_id, False, system)
-        perm_type = perm_type or "filesystems"
-
-        # Handle special case for home directory
-        if path.lower() == "host":
-            filesystem_path = "host"
-        elif path.lower() == "host-os":
-            filesystem_path = "host-os"
-        elif path.lower() == "host-etc":
-            filesystem_path = "host-etc"
-        elif path.lower() == "home":
-            filesystem_path = "home"
-        else:
-            # Ensure path do not ends with a trailing slash
-            filesystem_path = path.rstrip('/')
-
-        # Get existing filesystem paths
-        existing_paths = key_file.get_string("Context", perm_type)
-
-        if existing_paths is None:
-            return True, f"No filesystem permissions to remove for {app_id}"
-
-        # Split existing paths and normalize them for comparison
-        existing_paths_list = existing_paths.split(';')
-        normalized_new_path = os.path.abspath(filesystem_path.rstrip('/'))
-        normalized_existing_paths = [os.path.abspath(p.rstrip('/')) for p in existing_paths_list]
-
-        # Only remove if the path exists
-        if normalized_new_path not in normalized_existing_paths:
-            return True, f"No permission found for {path} in {app_id}"
-
-        # Remove the path from the existing paths
-        filtered_paths_list = [p for p in existing_paths_list
-                             if os.path.abspath(p.rstrip('/')) != normalized_new_path]
-
-        # Join remaining paths back together
-        new_permissions = ";".join(filtered_paths_list)
-        if new_permissions:
-        # Save changes
-            key_file.set_string("Context", perm_type, new_permissions)
-        else:
-            key_file.remove_key("Context", perm_type)
-
-        # Write the modified metadata back
-        try:
-            key_file.save_to_file(get_metadata_path(app_id, False, system))
-        except GLib.Error as e:
-            return False, f"Failed to save metadata file: {str(e)}"
-
-        return True, f"Successfully removed access to {path} for {app_id}"
-
-    except GLib.Error as e:
-        return False, f"Failed to modify permissions: {str(e)}"
+    session = PermissionEditSession(app_id, False, system)
+    return _commit_single_edit(session, session.remove_path(path, perm_type))
 
 def list_file_perms(app_id: str, system=False) -> tuple[bool, dict[str, list[str]]]|tuple[bool, dict[str, list[str]]]:
     """
@@ -1479,56 +3591,8 @@ def toggle_other_perms(app_id: str, perm_type: str, option: str, enable: bool, s
     Returns:
         bool: True if successful, False if operation failed
     """
-    # Get the KeyFile object
-    key_file = get_perm_key_file(app_id, False, system)
-
-    if not key_file:
-        return False, f"Failed to get permissions for {app_id}"
-
-    try:
-        perms_list = []
-        # Get all keys in the Context section
-        # Check if Context section exists
-        if not key_file.has_group("Context"):
-            key_file.set_string("Context", perm_type, "")
-
-        # Now get the keys
-        context_keys = key_file.get_keys("Context")
-
-        # Check if perm_type exists in the section
-        if perm_type not in str(context_keys):
-            # Create the key with an empty string
-            key_file.set_string("Context", perm_type, "")
-
-        # Get the existing permissions
-        existing_perms = key_file.get_string("Context", perm_type)
-
-        if existing_perms:
-            # Split into individual permissions
-            perms_list = [perm.strip() for perm in existing_perms.split(';') if perm.strip()]
-
-        # Toggle permission
-        if enable:
-            if option not in perms_list:
-                perms_list.append(option)
-        else:
-            if option in perms_list:
-                perms_list.remove(option)
-
-        # Join back with semicolons
-        new_perms = ";".join(perms_list)
-
-        # Save changes
-        if new_perms:
-            key_file.set_string("Context", perm_type, new_perms)
-        else:
-            key_file.remove_key("Context", perm_type)
-        key_file.save_to_file(get_metadata_path(app_id, False, system))
-
-        return True, f"Successfully {'enabled' if enable else 'disabled'} {option} for {app_id}"
-
-    except GLib.Error:
-        return False, f"Failed to toggle {option} for {app_id}"
+    session = PermissionEditSession(app_id, False, system)
+    return _commit_single_edit(session, session.toggle(perm_type, option, enable))
 
 
 def list_other_perm_values(app_id: str, perm_type: str, system=False) -> tuple[bool, dict[str, list[str]]]:
@@ -1598,40 +3662,8 @@ def add_permission_value(app_id: str, perm_type: str, value: str, system=False)
     Returns:
         tuple[bool, str]: (success, message)
     """
-    try:
-        key_file = get_perm_key_file(app_id, False, system)
-
-        # Convert perm_type to the correct format
-        match perm_type.lower():
-            case "environment":
-                perm_type = "Environment"
-            case "session_bus":
-                perm_type = "Session Bus Policy"
-            case "system_bus":
-                perm_type = "System Bus Policy"
-            case _:
-                return False, "Invalid permission type"
-
-        # Split the value into key and actual value
-        parts = value.split('=', 1)
-        if len(parts) != 2:
-            return False, "Value must be in format 'key=value'"
-
-        key, val = parts
-
-        if perm_type in ['Session Bus Policy', 'System Bus Policy']:
-            if val not in ['talk', 'own']:
-                return False, "Value must be in format 'key=value' with value as 'talk' or 'own'"
-
-        # Set the value
-        key_file.set_string(perm_type, key, val)
-
-        # Save the changes
-        key_file.save_to_file(get_metadata_path(app_id, False, system))
-
-        return True, f"Successfully added {value} to {perm_type} section"
-    except GLib.Error as e:
-        return False, f"Error adding permission: {str(e)}"
+    session = PermissionEditSession(app_id, False, system)
+    return _commit_single_edit(session, session.add_value(perm_type, value))
 
 def remove_permission_value(app_id: str, perm_type: str, value: str, system=False) -> tuple[bool, str]:
     """
@@ -1646,39 +3678,8 @@ def remove_permission_value(app_id: str, perm_type: str, value: str, system=Fals
     Returns:
         tuple[bool, str]: (success, message)
     """
-    try:
-        key_file = get_perm_key_file(app_id, False, system)
-
-        # Convert perm_type to the correct format
-        match perm_type.lower():
-            case "environment":
-                perm_type = "Environment"
-            case "session_bus":
-                perm_type = "Session Bus Policy"
-            case "system_bus":
-                perm_type = "System Bus Policy"
-            case _:
-                return False, "Invalid permission type"
-
-        # Split the value into key and actual value
-        parts = value.split('=', 1)
-        if len(parts) != 2:
-            return False, "Value must be in format 'key=value'"
-
-        key, val = parts
-        # Check if section exists
-        if not key_file.has_group(perm_type):
-            return False, f"Section {perm_type} does not exist"
-
-        # Remove the value
-        key_file.remove_key(perm_type, key)
-
-        # Save the changes
-        key_file.save_to_file(get_metadata_path(app_id, False, system))
-
-        return True, f"Successfully removed {value} from {perm_type} section"
-    except GLib.Error as e:
-        return False, f"Error removing permission: {str(e)}"
+    session = PermissionEditSession(app_id, False, system)
+    return _commit_single_edit(session, session.remove_value(perm_type, value))
 
 def global_add_file_permissions(path: str, perm_type=None, override=True, system=False) -> tuple[bool, str]:
     """
@@ -1687,67 +3688,16 @@ def global_add_file_permissions(path: str, perm_type=None, override=True, system
     Args:
         path (str): The path to grant access to. Can be:
             - "home" for home directory access
-            - "/path/to/directory" for custom directory access
-        perm_type (str): The type of permissions to remove (e.g. "filesystems", "persistent") default is "filesystems"
-        override (bool): Whether to use global metadata file instead of per-app.
-        system (bool): Whether to modify system-wide or user installation
-
-    Returns:
-        tuple[bool, str]: (success, message)
-    """
-
-    try:
-        key_file = get_perm_key_file(None, override, system)
-        perm_type = perm_type or "filesystems"
-        # Handle special case for home directory
-        if path.lower() == "host":
-            filesystem_path = "host"
-        elif path.lower() == "host-os":
-            filesystem_path = "host-os"
-        elif path.lower() == "host-etc":
-            filesystem_path = "host-etc"
-        elif path.lower() == "home":
-            filesystem_path = "home"
-        else:
-            # Ensure path do not ends with a trailing slash
-            filesystem_path = path.rstrip('/')
-
-            # Validate absolute paths start with /
-            if filesystem_path.startswith('/'):
-                filesystem_path = '/' + filesystem_path.lstrip('/')
-
-        if not key_file.has_group("Context"):
-            key_file.set_string("Context", perm_type, "")
-
-        context_keys = key_file.get_keys("Context")
-        if perm_type not in str(context_keys):
-            key_file.set_string("Context", perm_type, "")
-
-        existing_paths = key_file.get_string("Context", perm_type)
-        if existing_paths is None or existing_paths == "":
-            # If no filesystems exist, set the exact path provided
-            key_file.set_string("Context", perm_type, filesystem_path)
-        else:
-            existing_paths_list = existing_paths.split(';')
-            normalized_new_path = os.path.abspath(filesystem_path.rstrip('/'))
-            normalized_existing_paths = [os.path.abspath(p.rstrip('/')) for p in existing_paths_list]
-
-            if normalized_new_path not in normalized_existing_paths:
-                # Add new path with proper separator
-                separator = ';' if existing_paths.endswith(';') else ';'
-                key_file.set_string("Context", perm_type,
-                                    existing_paths + separator + filesystem_path)
-
-        # Write the modified metadata back
-        try:
-            key_file.save_to_file(get_metadata_path(None, override, system))
-        except GLib.Error as e:
-            return False, f"Failed to save metadata file: {str(e)}"
-
-        return True, f"Successfully granted access to {path} globally"
+            - "/path/to/directory" for custom directory access
+        perm_type (str): The type of permissions to remove (e.g. "filesystems", "persistent") default is "filesystems"
+        override (bool): Whether to use global metadata file instead of per-app.
+        system (bool): Whether to modify system-wide or user installation
 
-    except GLib.Error as e:
-        return False, f"Failed to modify permissions: {str(e)}"
+    Returns:
+        tuple[bool, str]: (success, message)
+    """
+    session = PermissionEditSession(None, override, system)
+    return _commit_single_edit(session, session.add_path(path, perm_type))
 
 
 def global_remove_file_permissions(path: str, perm_type=None, override=True, system=False) -> tuple[bool, str]:
@@ -1765,59 +3715,8 @@ def global_remove_file_permissions(path: str, perm_type=None, override=True, sys
     Returns:
         tuple[bool, str]: (success, message)
     """
-    try:
-        key_file = get_perm_key_file(None, override, system)
-        perm_type = perm_type or "filesystems"
-        # Handle special case for home directory
-        if path.lower() == "host":
-            filesystem_path = "host"
-        elif path.lower() == "host-os":
-            filesystem_path = "host-os"
-        elif path.lower() == "host-etc":
-            filesystem_path = "host-etc"
-        elif path.lower() == "home":
-            filesystem_path = "home"
-        else:
-            # Ensure path do not ends with a trailing slash
-            filesystem_path = path.rstrip('/')
-
-        # Get existing filesystem paths
-        existing_paths = key_file.get_string("Context", perm_type)
-
-        if existing_paths is None:
-            return True, "No filesystem permissions to remove globally"
-
-        # Split existing paths and normalize them for comparison
-        existing_paths_list = existing_paths.split(';')
-        normalized_new_path = os.path.abspath(filesystem_path.rstrip('/'))
-        normalized_existing_paths = [os.path.abspath(p.rstrip('/')) for p in existing_paths_list]
-
-        # Only remove if the path exists
-        if normalized_new_path not in normalized_existing_paths:
-            return True, f"No permission found for {path} globally"
-
-        # Remove the path from the existing paths
-        filtered_paths_list = [p for p in existing_paths_list
-                             if os.path.abspath(p.rstrip('/')) != normalized_new_path]
-
-        # Join remaining paths back together
-        new_permissions = ";".join(filtered_paths_list)
-        if new_permissions:
-        # Save changes
-            key_file.set_string("Context", perm_type, new_permissions)
-        else:
-            key_file.remove_key("Context", perm_type)
-
-        # Write the modified metadata back
-        try:
-            key_file.save_to_file(get_metadata_path(None, override, system))
-        except GLib.Error as e:
-            return False, f"Failed to save metadata file: {str(e)}"
-
-        return True, f"Successfully removed access to {path} globally"
-
-    except GLib.Error as e:
-        return False, f"Failed to modify permissions: {str(e)}"
+    session = PermissionEditSession(None, override, system)
+    return _commit_single_edit(session, session.remove_path(path, perm_type))
 
 def global_list_file_perms(override=True, system=False) -> tuple[bool, dict[str, list[str]]]|tuple[bool, dict[str, list[str]]]:
     """
@@ -1919,56 +3818,8 @@ def global_toggle_other_perms(perm_type: str, option: str, enable: bool, overrid
     Returns:
         bool: True if successful, False if operation failed
     """
-    # Get the KeyFile object
-    key_file = get_perm_key_file(None, override, system)
-
-    if not key_file:
-        return False, "Failed to get permissions globally"
-
-    try:
-        perms_list = []
-        # Get all keys in the Context section
-        # Check if Context section exists
-        if not key_file.has_group("Context"):
-            key_file.set_string("Context", perm_type, "")
-
-        # Now get the keys
-        context_keys = key_file.get_keys("Context")
-
-        # Check if perm_type exists in the section
-        if perm_type not in str(context_keys):
-            # Create the key with an empty string
-            key_file.set_string("Context", perm_type, "")
-
-        # Get the existing permissions
-        existing_perms = key_file.get_string("Context", perm_type)
-
-        if existing_perms:
-            # Split into individual permissions
-            perms_list = [perm.strip() for perm in existing_perms.split(';') if perm.strip()]
-
-        # Toggle permission
-        if enable:
-            if option not in perms_list:
-                perms_list.append(option)
-        else:
-            if option in perms_list:
-                perms_list.remove(option)
-
-        # Join back with semicolons
-        new_perms = ";".join(perms_list)
-
-        # Save changes
-        if new_perms:
-            key_file.set_string("Context", perm_type, new_perms)
-        else:
-            key_file.remove_key("Context", perm_type)
-        key_file.save_to_file(get_metadata_path(None, override, system))
-
-        return True, f"Successfully {'enabled' if enable else 'disabled'} {option} globally"
-
-    except GLib.Error:
-        return False, f"Failed to toggle {option} globally"
+    session = PermissionEditSession(None, override, system)
+    return _commit_single_edit(session, session.toggle(perm_type, option, enable))
 
 
 def global_list_other_perm_values(perm_type: str, override=True, system=False) -> tuple[bool, dict[str, list[str]]]:
@@ -2038,40 +3889,8 @@ def global_add_permission_value(perm_type: str, value: str, override=True, syste
     Returns:
         tuple[bool, str]: (success, message)
     """
-    try:
-        key_file = get_perm_key_file(None, override, system)
-
-        # Convert perm_type to the correct format
-        match perm_type.lower():
-            case "environment":
-                perm_type = "Environment"
-            case "session_bus":
-                perm_type = "Session Bus Policy"
-            case "system_bus":
-                perm_type = "System Bus Policy"
-            case _:
-                return False, "Invalid permission type"
-
-        # Split the value into key and actual value
-        parts = value.split('=', 1)
-        if len(parts) != 2:
-            return False, "Value must be in format 'key=value'"
-
-        key, val = parts
-
-        if perm_type in ['Session Bus Policy', 'System Bus Policy']:
-            if val not in ['talk', 'own']:
-                return False, "Value must be in format 'key=value' with value as 'talk' or 'own'"
-
-        # Set the value
-        key_file.set_string(perm_type, key, val)
-
-        # Save the changes
-        key_file.save_to_file(get_metadata_path(None, override, system))
-
-        return True, f"Successfully added {value} to {perm_type} section"
-    except GLib.Error as e:
-        return False, f"Error adding permission: {str(e)}"
+    session = PermissionEditSession(None, override, system)
+    return _commit_single_edit(session, session.add_value(perm_type, value))
 
 
 def global_remove_permission_value(perm_type: str, value: str, override=True, system=False) -> tuple[bool, str]:
@@ -2087,107 +3906,819 @@ def global_remove_permission_value(perm_type: str, value: str, override=True, sy
     Returns:
         tuple[bool, str]: (success, message)
     """
-    try:
-        key_file = get_perm_key_file(None, override, system)
+    session = PermissionEditSession(None, override, system)
+    return _commit_single_edit(session, session.remove_value(perm_type, value))
+
+# Context keys that hold ;-separated lists
+PERMISSION_CONTEXT_KEYS = ("shared", "sockets", "devices", "features", "filesystems", "persistent")
+# Permission type -> metadata group holding key=value entries
+PERMISSION_POLICY_GROUPS = {
+    "environment": "Environment",
+    "session_bus": "Session Bus Policy",
+    "system_bus": "System Bus Policy",
+}
+
+def _overrides_path(name: str, system=False) -> str:
+    """Path of overrides/<name> in an installation, name is an app id or "global" """
+    return os.path.join(_installation_dir(system), "overrides", name)
+
+def _permission_name(entry: str, perm_type: str) -> str:
+    """What an entry grants, without the :ro/:rw/:create mode of filesystem entries"""
+    if perm_type == "filesystems":
+        return entry.rsplit(':', 1)[0] if entry.endswith((":ro", ":rw", ":create")) else entry
+    return entry
+
+def _empty_permissions() -> dict:
+    permissions = {perm_type: [] for perm_type in PERMISSION_CONTEXT_KEYS}
+    permissions.update({perm_type: {} for perm_type in PERMISSION_POLICY_GROUPS})
+    return permissions
+
+def _merge_permissions(permissions: dict, key_file: GLib.KeyFile, sources=None, source=None):
+    """
+    Apply one metadata or override file on top of permissions, the way flatpak
+    layers them: "!entry" revokes, a filesystem entry replaces the mode of the
+    same path, a bus policy of "none" or an empty environment value unsets.
+    With sources given, sources[perm_type][name] records that source decided it.
+    """
+    for perm_type in PERMISSION_CONTEXT_KEYS:
+        current = permissions[perm_type]
+        for entry in _context_list(key_file, perm_type):
+            name = _permission_name(entry.lstrip('!'), perm_type)
+            current[:] = [e for e in current if _permission_name(e, perm_type) != name]
+            if not entry.startswith('!'):
+                current.append(entry)
+            if sources is not None:
+                sources[perm_type][name] = source
+    for perm_type, group in PERMISSION_POLICY_GROUPS.items():
+        if not key_file.has_group(group):
+            continue
+        current = permissions[perm_type]
+        for key in key_file.get_keys(group)[0]:
+            value = key_file.get_string(group, key)
+            if value in ("", "none"):
+                current.pop(key, None)
+            else:
+                current[key] = value
+            if sources is not None:
+                sources[perm_type][key] = source
 
-        # Convert perm_type to the correct format
-        match perm_type.lower():
-            case "environment":
-                perm_type = "Environment"
-            case "session_bus":
-                perm_type = "Session Bus Policy"
-            case "system_bus":
-                perm_type = "System Bus Policy"
-            case _:
-                return False, "Invalid permission type"
+# Layers an app's permissions are resolved from, in the order flatpak applies them
+PERMISSION_SOURCES = ("metadata", "global", "override")
+SPECIAL_FILESYSTEMS = ("home", "host", "host-os", "host-etc")
 
-        # Split the value into key and actual value
-        parts = value.split('=', 1)
-        if len(parts) != 2:
-            return False, "Value must be in format 'key=value'"
+class EffectivePermissions:
+    """
+    Permissions an app runs with and the layer each of them comes from.
 
-        key, val = parts
-        # Check if section exists
-        if not key_file.has_group(perm_type):
-            return False, f"Section {perm_type} does not exist"
+    permissions holds the merged grants, perm_type -> list of entries for
+    Context keys and perm_type -> {key: value} for environment and bus
+    policies. sources maps perm_type -> {name: source} for every grant or
+    revocation, source being one of PERMISSION_SOURCES.
+    """
+
+    def __init__(self, app_id: str, permissions: dict, sources: dict, signatures: tuple) -> None:
+        self.app_id = app_id
+        self.permissions = permissions
+        self.sources = sources
+        # (path, file signature) of every layer, see resolve_permissions()
+        self.signatures = signatures
+
+    def granted(self, perm_type: str, name: str) -> bool:
+        value = self.permissions[perm_type]
+        if isinstance(value, dict):
+            return name in value
+        return any(_permission_name(entry, perm_type) == name for entry in value)
+
+    def source(self, perm_type: str, name: str) -> str | None:
+        """Layer that granted or revoked name last, None if no layer mentions it"""
+        return self.sources[perm_type].get(name)
+
+    def entries(self, perm_type: str, sources=PERMISSION_SOURCES) -> list[str]:
+        """Granted entries that come from the given layers, key=value for environment and bus policies"""
+        value = self.permissions[perm_type]
+        if isinstance(value, dict):
+            return [f"{key}={val}" for key, val in value.items() if self.sources[perm_type].get(key) in sources]
+        return [entry for entry in value
+                if self.sources[perm_type].get(_permission_name(entry, perm_type)) in sources]
+
+    def revoked(self, perm_type: str, sources=PERMISSION_SOURCES) -> list[str]:
+        """Names the given layers revoked ("!entry", "none" or an empty value) and no later layer granted again"""
+        return [name for name, source in self.sources[perm_type].items()
+                if source in sources and not self.granted(perm_type, name)]
+
+    def listing(self, perm_type: str, sources=PERMISSION_SOURCES) -> dict[str, list[str]]:
+        """
+        entries() in the format of list_file_perms() for "filesystems" and of
+        list_other_perm_toggles()/list_other_perm_values() for everything else.
+        """
+        entries = self.entries(perm_type, sources)
+        if perm_type != "filesystems":
+            return {"paths": entries}
+        return {
+            "paths": [entry for entry in entries if entry not in SPECIAL_FILESYSTEMS],
+            "special_paths": [entry for entry in entries if entry in SPECIAL_FILESYSTEMS],
+        }
 
-        # Remove the value
-        key_file.remove_key(perm_type, key)
+# (app_id, system) -> EffectivePermissions
+_effective_permissions: dict[tuple, EffectivePermissions] = {}
+
+def _permission_layers(app_id: str, system=False, metadata_path=None) -> list[tuple]:
+    """Return (source, cache key, path) of the files an app's permissions are layered from"""
+    return [
+        ("metadata", (app_id, system, False), metadata_path or get_metadata_path(app_id, False, system)),
+        ("global", ("overrides", "global", system), _overrides_path("global", system)),
+        ("override", ("overrides", app_id, system), _overrides_path(app_id, system)),
+    ]
+
+def _merge_layers(key_files: list[tuple[str, GLib.KeyFile]]) -> tuple[dict, dict]:
+    """Merge (source, KeyFile) layers in order, returns (permissions, sources)"""
+    permissions = _empty_permissions()
+    sources = {perm_type: {} for perm_type in permissions}
+    for source, key_file in key_files:
+        _merge_permissions(permissions, key_file, sources, source)
+    return permissions, sources
+
+def resolve_permissions(app_id: str, system=False, metadata_path=None) -> EffectivePermissions:
+    """
+    Resolve the effective permissions of an app from its metadata,
+    overrides/global and overrides/<app_id>.
 
-        # Save the changes
-        key_file.save_to_file(get_metadata_path(None, override, system))
+    Each file is parsed once through the KeyFile cache and the result is
+    cached until one of the three files changes.
 
-        return True, f"Successfully removed {value} from {perm_type} section"
-    except GLib.Error as e:
-        return False, f"Error removing permission: {str(e)}"
+    Args:
+        app_id (str): The ID of the Flatpak application
+        system (bool): Whether to use the user or system installation
+        metadata_path (str): Optional, the deployed metadata file if the caller already knows it
+
+    Returns:
+        EffectivePermissions: The merged permissions with source attribution
+    """
+    layers = _permission_layers(app_id, system, metadata_path)
+    signatures = tuple((path, _file_signature(path)) for _, _, path in layers)
+    with _perm_key_file_lock:
+        cached = _effective_permissions.get((app_id, system))
+    if cached and cached.signatures == signatures:
+        return cached
+
+    key_files = []
+    for (source, cache_key, path), (_, signature) in zip(layers, signatures):
+        if not path or signature is None:
+            continue
+        try:
+            key_files.append((source, _load_key_file_cached(cache_key, path)))
+        except GLib.Error as e:
+            logger.error(f"Failed to read {path}: {str(e)}")
+
+    effective = EffectivePermissions(app_id, *_merge_layers(key_files), signatures)
+    with _perm_key_file_lock:
+        _effective_permissions[(app_id, system)] = effective
+    return effective
+
+def permission_findings(permissions: dict) -> list[str]:
+    """Return the grants an audit flags: host filesystem access, network, all devices and session bus talk names"""
+    findings = []
+    for entry in permissions["filesystems"]:
+        if _permission_name(entry, "filesystems") in ("host", "host-os", "host-etc"):
+            findings.append(f"filesystem={entry}")
+    if "network" in permissions["shared"]:
+        findings.append("network")
+    if "all" in permissions["devices"]:
+        findings.append("device=all")
+    findings.extend(f"talk-name={name}" for name, policy in permissions["session_bus"].items() if policy == "talk")
+    return findings
+
+def audit_permissions(system=False, app_ids=None, max_workers=8) -> list[dict]:
+    """
+    Compute the effective permissions of installed apps in one pass.
 
-def portal_get_permission_store():
-    bus = dbus.SessionBus()
-    portal_service = bus.get_object("org.freedesktop.impl.portal.PermissionStore", "/org/freedesktop/impl/portal/PermissionStore")
-    permission_store = dbus.Interface(portal_service, "org.freedesktop.impl.portal.PermissionStore")
-    return permission_store
+    Each app's metadata is layered with overrides/global and overrides/<app>
+    of its installation by resolve_permissions(), on a thread pool. Files go
+    through the shared KeyFile cache, so the global override is parsed once.
 
-def portal_set_app_permissions(portal: str, app_id: str, status_str: str):
+    Args:
+        system (bool): Whether to use the user or system installation
+        app_ids (Iterable[str]): Optional, only audit these apps
+        max_workers (int): Number of reader threads
+
+    Returns:
+        list[dict]: One {"app_id", "origin", "permissions", "sources", "findings"} per app, sorted by app id
+    """
+    installation = get_installation(system)
+    refs = installation.list_installed_refs_by_kind(Flatpak.RefKind.APP, None)
+    if app_ids is not None:
+        wanted = set(app_ids)
+        refs = [ref for ref in refs if ref.get_name() in wanted]
+
+    def audit(ref):
+        effective = resolve_permissions(ref.get_name(), system, os.path.join(ref.get_deploy_dir(), "metadata"))
+        return {
+            "app_id": ref.get_name(),
+            "origin": ref.get_origin(),
+            "permissions": effective.permissions,
+            "sources": effective.sources,
+            "findings": permission_findings(effective.permissions),
+        }
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+        report = list(pool.map(audit, refs))
+    return sorted(report, key=lambda entry: entry["app_id"])
+
+def write_permission_audit(report: list[dict], output_format="text", out=None):
+    """
+    Print an audit_permissions() report.
+
+    Args:
+        report (list[dict]): The report
+        output_format (str): "text" lists flagged apps, "json" and "csv" emit the whole matrix
+        out (file): Optional, defaults to stdout
+    """
+    out = out or sys.stdout
+    if output_format == "json":
+        json.dump(report, out, indent=2)
+        out.write("\n")
+    elif output_format == "csv":
+        columns = list(PERMISSION_CONTEXT_KEYS) + list(PERMISSION_POLICY_GROUPS)
+        writer = csv.writer(out)
+        writer.writerow(["app_id", "origin"] + columns + ["findings"])
+        for entry in report:
+            permissions = entry["permissions"]
+            row = [entry["app_id"], entry["origin"]]
+            for column in columns:
+                value = permissions[column]
+                if isinstance(value, dict):
+                    value = [f"{key}={val}" for key, val in value.items()]
+                row.append(";".join(value))
+            row.append(";".join(entry["findings"]))
+            writer.writerow(row)
+    else:
+        flagged = [entry for entry in report if entry["findings"]]
+        print(f"{len(flagged)} of {len(report)} apps have flagged permissions", file=out)
+        for entry in flagged:
+            print(f"{entry['app_id']} ({entry['origin']}):", file=out)
+            for finding in entry["findings"]:
+                print(f"  - {finding}", file=out)
+
+def _edit_set_context_entry(key_file: GLib.KeyFile, perm_type: str, entry: str) -> bool:
+    """Set a Context entry, replacing grants and revocations of the same name"""
+    name = _permission_name(entry.lstrip('!'), perm_type)
+    current = _context_list(key_file, perm_type)
+    updated = [e for e in current if _permission_name(e.lstrip('!'), perm_type) != name] + [entry]
+    if updated == current:
+        return False
+    _set_context_list(key_file, perm_type, updated)
+    return True
+
+def _edit_set_policy(key_file: GLib.KeyFile, section: str, key: str, value: str) -> bool:
+    try:
+        if key_file.get_string(section, key) == value:
+            return False
+    except GLib.Error:
+        pass
+    key_file.set_string(section, key, value)
+    return True
+
+def _validate_permission_profile(profile: dict):
+    """Raise ValueError unless profile has the layout export_permission_profile() writes"""
+    if not isinstance(profile, dict):
+        raise ValueError("A permission profile must be a JSON object")
+    context = profile.get("context", {})
+    if not isinstance(context, dict):
+        raise ValueError("context must map permission types to lists of entries")
+    for perm_type, entries in context.items():
+        if perm_type not in PERMISSION_CONTEXT_KEYS:
+            raise ValueError(f"Unknown permission type in context: {perm_type}")
+        if not isinstance(entries, list) or not all(isinstance(entry, str) for entry in entries):
+            raise ValueError(f"context.{perm_type} must be a list of strings")
+    for perm_type in PERMISSION_POLICY_GROUPS:
+        values = profile.get(perm_type, {})
+        if not isinstance(values, dict) or not all(isinstance(value, str) for value in values.values()):
+            raise ValueError(f"{perm_type} must map names to strings")
+
+def export_permission_profile(app_id: str, system=False, effective=False) -> dict:
+    """
+    Export an app's permission overrides as a profile.
 
-    portal_id = ""
+    A profile holds flatpak override entries: "context" maps Context keys to
+    lists of entries, "!entry" revoking, and "environment", "session_bus" and
+    "system_bus" map names to values.
+
+    Args:
+        app_id (str): The ID of the Flatpak application
+        system (bool): Whether to use the user or system installation
+        effective (bool): Export everything the app is granted instead of just overrides/<app_id>
+
+    Returns:
+        dict: The profile
+    """
+    profile = {"exported_from": app_id, "context": {}}
+    if effective:
+        permissions = resolve_permissions(app_id, system).permissions
+        for perm_type in PERMISSION_CONTEXT_KEYS:
+            if permissions[perm_type]:
+                profile["context"][perm_type] = list(permissions[perm_type])
+        for perm_type in PERMISSION_POLICY_GROUPS:
+            profile[perm_type] = dict(permissions[perm_type])
+        return profile
+
+    path = _overrides_path(app_id, system)
+    key_file = _load_key_file_cached(("overrides", app_id, system), path) if os.path.exists(path) else GLib.KeyFile()
+    for perm_type in PERMISSION_CONTEXT_KEYS:
+        entries = _context_list(key_file, perm_type)
+        if entries:
+            profile["context"][perm_type] = entries
+    for perm_type, group in PERMISSION_POLICY_GROUPS.items():
+        profile[perm_type] = {}
+        if key_file.has_group(group):
+            for key in key_file.get_keys(group)[0]:
+                profile[perm_type][key] = key_file.get_string(group, key)
+    return profile
+
+def load_permission_profile(path: str) -> dict:
+    """Read and validate a profile file, raises OSError or ValueError"""
+    with open(path, 'r', encoding='utf-8') as f:
+        profile = json.load(f)
+    _validate_permission_profile(profile)
+    return profile
+
+def _permission_diff(before: dict, after: dict) -> list[str]:
+    """Describe how two permission sets differ, one "+ type=entry" or "- type=entry" line per change"""
+    lines = []
+    for perm_type in PERMISSION_CONTEXT_KEYS + tuple(PERMISSION_POLICY_GROUPS):
+        old, new = before[perm_type], after[perm_type]
+        if isinstance(old, dict):
+            old = [f"{key}={value}" for key, value in old.items()]
+            new = [f"{key}={value}" for key, value in new.items()]
+        lines.extend(f"- {perm_type}={entry}" for entry in old if entry not in new)
+        lines.extend(f"+ {perm_type}={entry}" for entry in new if entry not in old)
+    return lines
+
+def apply_permission_profile(profile: dict, patterns: list[str], system=False, dry_run=False) -> tuple[bool, str, dict[str, list[str]]]:
+    """
+    Apply a profile to the overrides of every installed app matching patterns.
+
+    The overrides of all matching apps are written together through
+    commit_permission_sessions(), either every app gets the profile or none.
+
+    Args:
+        profile (dict): A profile, see export_permission_profile()
+        patterns (list[str]): App ids or shell-style globs such as "org.gnome.*"
+        system (bool): Whether to use the user or system installation
+        dry_run (bool): Only compute the preview
+
+    Returns:
+        tuple[bool, str, dict[str, list[str]]]: (success, message, app id -> effective permission
+            changes, see _permission_diff()), apps that wouldn't change are left out
+    """
+    installation = get_installation(system)
+    refs = [ref for ref in installation.list_installed_refs_by_kind(Flatpak.RefKind.APP, None)
+            if any(fnmatch.fnmatchcase(ref.get_name(), pattern) for pattern in patterns)]
+    if not refs:
+        return False, f"No installed apps match {' '.join(patterns)}", {}
+
+    sessions = []
+    diffs = {}
+    for ref in refs:
+        app_id = ref.get_name()
+        metadata_path = os.path.join(ref.get_deploy_dir(), "metadata")
+        session = PermissionEditSession(app_id, system=system, path=_overrides_path(app_id, system))
+        try:
+            for perm_type, entries in profile.get("context", {}).items():
+                for entry in entries:
+                    session.apply_edit(_edit_set_context_entry, perm_type, entry)
+            for perm_type, group in PERMISSION_POLICY_GROUPS.items():
+                for key, value in profile.get(perm_type, {}).items():
+                    session.apply_edit(_edit_set_policy, group, key, value)
+            if not session.pending:
+                continue
+
+            # Preview: the other layers as they are, the overrides as they would be written
+            key_files = []
+            for source, cache_key, path in _permission_layers(app_id, system, metadata_path):
+                if source == "override":
+                    key_files.append((source, session.pending_key_file()))
+                elif os.path.exists(path):
+                    key_files.append((source, _load_key_file_cached(cache_key, path)))
+            before = resolve_permissions(app_id, system, metadata_path).permissions
+            after, _ = _merge_layers(key_files)
+        except GLib.Error as e:
+            return False, f"Failed to read the permissions of {app_id}: {str(e)}", {}
+        diffs[app_id] = _permission_diff(before, after)
+        sessions.append(session)
+
+    if not sessions:
+        return True, f"All {len(refs)} matching apps already have this profile", diffs
+    if dry_run:
+        return True, f"{len(sessions)} of {len(refs)} matching apps would change", diffs
+    success, message = commit_permission_sessions(sessions)
+    if not success:
+        return False, message, diffs
+    return True, f"Applied the profile to {len(sessions)} of {len(refs)} matching apps", diffs
+
+# User facing portal name -> (PermissionStore table, entry id)
+PORTAL_PERMISSIONS = {
+    "background": ("background", "background"),
+    "notifications": ("notifications", "notification"),
+    "microphone": ("devices", "microphone"),
+    "speakers": ("devices", "speakers"),
+    "camera": ("devices", "camera"),
+    "location": ("location", "location"),
+}
+
+def _portal_table_and_id(portal: str) -> tuple[str, str]:
+    """Return (table, id) of a portal name, ("", "") if it isn't one of PORTAL_PERMISSIONS"""
     # This is done separately incase user types "notification" instead of "notifications"
     if portal.lower() in "notifications":
         portal = "notifications"
+    return PORTAL_PERMISSIONS.get(portal.lower(), ("", ""))
+
+# Seconds the portal permission index is trusted before it is looked up again
+PORTAL_INDEX_TTL = 30
+
+class PortalPermissionIndex:
+    """
+    Portal permissions of every app, app id -> {portal: value}.
+
+    One Lookup per portal fills the whole index, per-app questions are then
+    answered from memory. Changes made through portal_set_app_permissions()
+    are applied to the index directly. While a PortalPermissionMonitor keeps
+    it live, changes made by other programs are applied as they happen and
+    the ttl no longer applies.
+    """
+
+    def __init__(self, ttl=PORTAL_INDEX_TTL) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._apps = {}
+        self._loaded_at = None
+        self._live = False
+
+    def refresh(self):
+        """Look up every portal once and rebuild the index"""
+        self.load(portal_lookup_all())
+
+    def load(self, lookups: list[tuple[str, tuple]]):
+        """Rebuild the index from (portal, Lookup result) pairs"""
+        apps = {}
+        for portal, permissions in lookups:
+            # Lookup returns (app id -> values, data), the first value is yes/no
+            for app_id, values in permissions[0].items():
+                if len(values) > 0:
+                    apps.setdefault(str(app_id), {})[portal] = str(values[0])
+        with self._lock:
+            self._apps = apps
+            self._loaded_at = time.monotonic()
+
+    def is_fresh(self) -> bool:
+        with self._lock:
+            loaded_at = self._loaded_at
+            live = self._live
+        return loaded_at is not None and (live or time.monotonic() - loaded_at <= self.ttl)
+
+    def set_live(self, live: bool):
+        """Mark whether PermissionStore change signals are being applied to the index"""
+        with self._lock:
+            self._live = live
+
+    def _ensure_loaded(self):
+        if not self.is_fresh():
+            self.refresh()
+
+    def app_permissions(self, app_id: str) -> dict[str, str]:
+        self._ensure_loaded()
+        with self._lock:
+            return dict(self._apps.get(app_id, {}))
+
+    def all_permissions(self) -> dict[str, dict[str, str]]:
+        self._ensure_loaded()
+        with self._lock:
+            return {app_id: dict(portals) for app_id, portals in self._apps.items()}
+
+    def update(self, app_id: str, portal: str, value: str):
+        """Record a change that was just written to the PermissionStore"""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._apps.setdefault(app_id, {})[portal] = value
+
+    def apply_change(self, portal: str, permissions: dict[str, list[str]]) -> set[str]:
+        """
+        Replace one portal's entries with what a Changed signal reported.
+
+        Args:
+            portal (str): PORTAL_PERMISSIONS name of the changed entry
+            permissions (dict): app id -> permissions, empty if the entry was deleted
+
+        Returns:
+            set[str]: Ids of the apps whose value for the portal changed
+        """
+        new_values = {str(app_id): str(values[0]) for app_id, values in permissions.items() if len(values) > 0}
+        with self._lock:
+            if self._loaded_at is None:
+                # Nothing cached yet, the next load reads the new state anyway
+                return set(new_values)
+            changed = set()
+            for app_id in set(self._apps) | set(new_values):
+                portals = self._apps.get(app_id, {})
+                if portals.get(portal) == new_values.get(app_id):
+                    continue
+                changed.add(app_id)
+                if app_id in new_values:
+                    self._apps.setdefault(app_id, {})[portal] = new_values[app_id]
+                else:
+                    portals.pop(portal, None)
+                    if not portals:
+                        self._apps.pop(app_id, None)
+            return changed
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+_portal_index = None
+
+def get_portal_index() -> PortalPermissionIndex:
+    """Return the shared PortalPermissionIndex"""
+    global _portal_index
+    if _portal_index is None:
+        _portal_index = PortalPermissionIndex()
+    return _portal_index
+
+PERMISSION_STORE_BUS_NAME = "org.freedesktop.impl.portal.PermissionStore"
+PERMISSION_STORE_OBJECT_PATH = "/org/freedesktop/impl/portal/PermissionStore"
+PERMISSION_STORE_INTERFACE = "org.freedesktop.impl.portal.PermissionStore"
+
+class PermissionStoreClient:
+    """
+    Reused connection to the portal PermissionStore.
+
+    The Gio.DBusProxy is created on first use and kept for every later call.
+    If the bus connection closes, or a call fails because the connection or
+    the service went away, the proxy is dropped and the call is retried once
+    on a fresh connection. The proxy doesn't start the service when it is
+    created, the first method call activates it, so call_async() never waits
+    for a slow PermissionStore to come up.
+    """
+
+    # A private connection, so a closed one can be replaced
+    _CONNECTION_FLAGS = Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT | Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION
+    _PROXY_FLAGS = Gio.DBusProxyFlags.DO_NOT_LOAD_PROPERTIES | Gio.DBusProxyFlags.DO_NOT_AUTO_START_AT_CONSTRUCTION
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._proxy = None
+        # Callbacks waiting for the proxy call_async() is creating
+        self._proxy_waiters = []
+
+    def _get_proxy(self) -> Gio.DBusProxy:
+        with self._lock:
+            if self._proxy is None:
+                address = Gio.dbus_address_get_for_bus_sync(Gio.BusType.SESSION, None)
+                connection = Gio.DBusConnection.new_for_address_sync(address, self._CONNECTION_FLAGS, None, None)
+                connection.connect("closed", self._on_closed)
+                self._proxy = Gio.DBusProxy.new_sync(
+                    connection,
+                    self._PROXY_FLAGS,
+                    None,
+                    PERMISSION_STORE_BUS_NAME,
+                    PERMISSION_STORE_OBJECT_PATH,
+                    PERMISSION_STORE_INTERFACE,
+                    None
+                )
+            return self._proxy
+
+    def _get_proxy_async(self, callback):
+        """
+        Call callback(proxy, error) once the proxy exists, creating it without blocking.
+
+        Calls made while the connection is being set up are queued and all
+        answered by the one connection attempt.
+        """
+        with self._lock:
+            proxy = self._proxy
+            if proxy is None:
+                self._proxy_waiters.append(callback)
+                if len(self._proxy_waiters) > 1:
+                    return
+        if proxy is not None:
+            callback(proxy, None)
+            return
+
+        def finish(proxy, error):
+            with self._lock:
+                if proxy is not None:
+                    self._proxy = proxy
+                waiters, self._proxy_waiters = self._proxy_waiters, []
+            for waiter in waiters:
+                waiter(proxy, error)
+
+        def on_proxy(source, async_result):
+            try:
+                proxy = Gio.DBusProxy.new_finish(async_result)
+            except GLib.Error as e:
+                finish(None, e)
+                return
+            finish(proxy, None)
+
+        def on_connection(source, async_result):
+            try:
+                connection = Gio.DBusConnection.new_for_address_finish(async_result)
+            except GLib.Error as e:
+                finish(None, e)
+                return
+            connection.connect("closed", self._on_closed)
+            Gio.DBusProxy.new(
+                connection,
+                self._PROXY_FLAGS,
+                None,
+                PERMISSION_STORE_BUS_NAME,
+                PERMISSION_STORE_OBJECT_PATH,
+                PERMISSION_STORE_INTERFACE,
+                None,
+                on_proxy
+            )
+
+        try:
+            address = Gio.dbus_address_get_for_bus_sync(Gio.BusType.SESSION, None)
+        except GLib.Error as e:
+            finish(None, e)
+            return
+        Gio.DBusConnection.new_for_address(address, self._CONNECTION_FLAGS, None, None, on_connection)
+
+    def _on_closed(self, connection, remote_peer_vanished, error):
+        with self._lock:
+            if self._proxy is not None and self._proxy.get_connection() is connection:
+                self._proxy = None
+
+    def reset(self):
+        """Drop the proxy, the next call reconnects"""
+        with self._lock:
+            self._proxy = None
+
+    @staticmethod
+    def _is_connection_error(error: GLib.Error) -> bool:
+        if error.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CLOSED):
+            return True
+        return any(error.matches(Gio.dbus_error_quark(), code) for code in (
+            Gio.DBusError.DISCONNECTED,
+            Gio.DBusError.NO_REPLY,
+            Gio.DBusError.SERVICE_UNKNOWN,
+            Gio.DBusError.NAME_HAS_NO_OWNER,
+        ))
+
+    def call(self, method: str, parameters: GLib.Variant) -> GLib.Variant:
+        """Call a PermissionStore method, raises GLib.Error if it fails"""
+        for attempt in range(2):
+            proxy = self._get_proxy()
+            try:
+                return proxy.call_sync(method, parameters, Gio.DBusCallFlags.NONE, -1, None)
+            except GLib.Error as e:
+                if attempt or not self._is_connection_error(e):
+                    raise
+                self.reset()
+
+    def call_async(self, method: str, parameters: GLib.Variant, callback, cancellable=None):
+        """
+        Call a PermissionStore method without blocking.
+
+        callback(result, error) runs on the thread-default main context with
+        the reply GLib.Variant or the GLib.Error, the other one being None.
+        """
+        def on_reply(proxy, async_result, retried):
+            try:
+                result = proxy.call_finish(async_result)
+            except GLib.Error as e:
+                if not retried and self._is_connection_error(e):
+                    self.reset()
+                    start(True)
+                    return
+                callback(None, e)
+                return
+            callback(result, None)
+
+        def start(retried):
+            def on_proxy(proxy, error):
+                if error is not None:
+                    callback(None, error)
+                    return
+                proxy.call(method, parameters, Gio.DBusCallFlags.NONE, -1, cancellable, on_reply, retried)
+            self._get_proxy_async(on_proxy)
+
+        start(False)
+
+    def lookup(self, table: str, entry_id: str) -> tuple[dict[str, list[str]], object]:
+        """Return (app id -> permissions, data) of one entry"""
+        return self.call("Lookup", GLib.Variant("(ss)", (table, entry_id))).unpack()
+
+    def set_permission(self, table: str, create: bool, entry_id: str, app_id: str, permissions: list[str]):
+        self.call("SetPermission", GLib.Variant("(sbssas)", (table, create, entry_id, app_id, permissions)))
+
+_permission_store_client = None
+
+def portal_get_permission_store() -> PermissionStoreClient:
+    """Return the shared PermissionStoreClient"""
+    global _permission_store_client
+    if _permission_store_client is None:
+        _permission_store_client = PermissionStoreClient()
+    return _permission_store_client
+
+class PortalPermissionMonitor:
+    """
+    Keeps the portal permission index current while the app is running.
+
+    Subscribes to the PermissionStore Changed signal, so changes made by GNOME
+    Settings, the flatpak CLI or the apps themselves are applied to the index
+    as deltas and callback(portal, app_ids) is told which apps changed. If the
+    PermissionStore service goes away or restarts, changes may have been
+    missed, the index is invalidated and the ttl applies again until the
+    service is back. Signals are delivered on the main context of the thread
+    that created the monitor.
+    """
+
+    def __init__(self, callback=None) -> None:
+        self.callback = callback
+        self._index = get_portal_index()
+        self._connection = None
+        self._subscription_id = 0
+        self._watch_id = 0
+        try:
+            self._connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        except GLib.Error as e:
+            logger.warning(f"Can't watch portal permission changes: {str(e)}")
+            return
+        self._subscription_id = self._connection.signal_subscribe(
+            PERMISSION_STORE_BUS_NAME,
+            PERMISSION_STORE_INTERFACE,
+            "Changed",
+            PERMISSION_STORE_OBJECT_PATH,
+            None,
+            Gio.DBusSignalFlags.NONE,
+            self._on_changed
+        )
+        self._watch_id = Gio.bus_watch_name_on_connection(
+            self._connection,
+            PERMISSION_STORE_BUS_NAME,
+            Gio.BusNameWatcherFlags.NONE,
+            self._on_name_appeared,
+            self._on_name_vanished
+        )
+
+    def _on_name_appeared(self, connection, name, owner):
+        # A new owner starts with whatever is on disk, which may differ from the index
+        self._index.invalidate()
+        self._index.set_live(True)
+
+    def _on_name_vanished(self, connection, name):
+        self._index.set_live(False)
+
+    def _on_changed(self, connection, sender, object_path, interface, signal, parameters):
+        table, entry_id, deleted, data, permissions = parameters.unpack()
+        portal = _portal_name(table, entry_id)
+        if portal not in PORTAL_PERMISSIONS:
+            return
+        app_ids = self._index.apply_change(portal, {} if deleted else permissions)
+        if app_ids and self.callback is not None:
+            self.callback(portal, app_ids)
+
+    def stop(self):
+        if self._watch_id:
+            Gio.bus_unwatch_name(self._watch_id)
+            self._watch_id = 0
+        if self._subscription_id:
+            self._connection.signal_unsubscribe(self._subscription_id)
+            self._subscription_id = 0
+        self._index.set_live(False)
+
+def portal_set_app_permissions(portal: str, app_id: str, status_str: str):
+    portal, portal_id = _portal_table_and_id(portal)
 
     status = "no"
     if status_str in ["yes", "true", "1", "enable"]:
         status = "yes"
 
-    match portal.lower():
-        case "background":
-            portal_id = "background"
-        case "notifications":
-            portal_id = "notification"
-        case "microphone":
-            portal = "devices"
-            portal_id = "microphone"
-        case "speakers":
-            portal = "devices"
-            portal_id = "speakers"
-        case "camera":
-            portal = "devices"
-            portal_id = "camera"
-        case "location":
-            portal_id = "location"
     try:
         permission_store = portal_get_permission_store()
-        permission_store.SetPermission(
+        permission_store.set_permission(
             portal,   # Category (string)
-            False,             # Permission status (boolean: False means 'no')
+            False,             # Create the entry if missing (boolean)
             portal_id,    # Permission type (string)
             app_id, # App ID (string)
-            [dbus.String(status)] # Array of permissions (string array)
+            [status] # Array of permissions (string array)
         )
-        return True, f"Permission set to {status} for {app_id} in {portal_id} portal"
-    except:
+    except GLib.Error:
         return False, f"Failed to set permission for {app_id} in {portal_id} portal"
+    get_portal_index().update(app_id, _portal_name(portal, portal_id), status)
+    return True, f"Permission set to {status} for {app_id} in {portal_id} portal"
 
-def portal_get_app_permissions(app_id: str):
-    permissions = portal_lookup_all()
-    if not permissions:
-        return False, f"Permission not found for {app_id} in any portal"
-
-    # Store results for each portal where we find the app
-    app_permissions = {}
-
-    # Iterate through all portal entries
-    for portal_id, permission_data in permissions:
-        # Extract the DBus Dictionary containing app permissions
-        dbus_dict = permission_data[0]  # First element contains the dictionary
-
-        # Check if our target app_id exists in the dictionary
-        if app_id in dbus_dict:
-            # Get the array of values for this app
-            value_array = dbus_dict[app_id]
+def _portal_name(table: str, portal_id: str) -> str:
+    """Map a (table, id) pair back to its PORTAL_PERMISSIONS name"""
+    for name, entry in PORTAL_PERMISSIONS.items():
+        if entry == (table, portal_id):
+            return name
+    return portal_id
 
-            # Return the first string value (typically 'yes' or 'no')
-            if len(value_array) > 0:
-                app_permissions[portal_id] = str(value_array[0])
+def portal_get_app_permissions(app_id: str):
+    # Answered from the index, which looks every portal up once for all apps
+    app_permissions = get_portal_index().app_permissions(app_id)
 
     # Format and return the results
     if app_permissions:
@@ -2198,56 +4729,89 @@ def portal_get_app_permissions(app_id: str):
 
 def portal_lookup(portal: str):
     try:
-        portal_id = ""
-        # This is done separately incase user types "notification" instead of "notifications"
-        if portal.lower() in "notifications":
-            portal = "notifications"
-
-        match portal.lower():
-            case "background":
-                portal_id = "background"
-            case "notifications":
-                portal_id = "notification"
-            case "microphone":
-                portal = "devices"
-                portal_id = "microphone"
-            case "speakers":
-                portal = "devices"
-                portal_id = "speakers"
-            case "camera":
-                portal = "devices"
-                portal_id = "camera"
-            case "location":
-                portal_id = "location"
+        portal, portal_id = _portal_table_and_id(portal)
 
         permission_store = portal_get_permission_store()
-        permissions = permission_store.Lookup(
+        permissions = permission_store.lookup(
             portal,   # Category (string)
             portal_id    # Permission type (string)
         )
         if permissions:
             return permissions
-    except dbus.exceptions.DBusException:
+    except GLib.Error:
         # We don't care if a lookup fails, that just means no options were set for the portal
         return []
 
 def portal_lookup_all():
     portal_permissions = []
-    # This is done separately incase user types "notification" instead of "notifications"
 
-    portal_names = ["background", "notifications", "microphone", "speakers", "camera", "location"]
-    for portal in portal_names:
+    for portal in PORTAL_PERMISSIONS:
         try:
             permissions = portal_lookup(
                 portal   # Category (string)
             )
             if permissions:
                 portal_permissions.append((portal, permissions))
-        except dbus.exceptions.DBusException:
+        except GLib.Error:
             # We don't care if a lookup fails, that just means no options were set for the portal
             return []
     return portal_permissions
 
+def portal_get_app_permissions_async(app_id: str, callback, cancellable=None):
+    """
+    Non-blocking portal_get_app_permissions().
+
+    Answers from the index when it is fresh, otherwise looks up every portal
+    in parallel and refreshes the index once all replies are in. callback
+    receives portal_get_app_permissions()'s (success, result) on the
+    thread-default main context.
+    """
+    index = get_portal_index()
+
+    def reply():
+        app_permissions = index.app_permissions(app_id)
+        if app_permissions:
+            callback(True, app_permissions)
+        else:
+            callback(False, f"No permissions found for {app_id} in any portal")
+
+    if index.is_fresh():
+        def reply_idle():
+            reply()
+            return False
+        GLib.idle_add(reply_idle)
+        return
+
+    lookups = {}
+    def on_lookup(portal, result, error):
+        if error is not None and error.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+            return
+        # A failed lookup just means no options were set for the portal
+        lookups[portal] = result.unpack() if result is not None else None
+        if len(lookups) == len(PORTAL_PERMISSIONS):
+            index.load([(name, lookups[name]) for name in PORTAL_PERMISSIONS if lookups[name]])
+            reply()
+
+    client = portal_get_permission_store()
+    for portal, (table, entry_id) in PORTAL_PERMISSIONS.items():
+        client.call_async("Lookup", GLib.Variant("(ss)", (table, entry_id)),
+                          lambda result, error, portal=portal: on_lookup(portal, result, error), cancellable)
+
+def portal_set_app_permissions_async(portal: str, app_id: str, status_str: str, callback, cancellable=None):
+    """Non-blocking portal_set_app_permissions(), callback receives its (success, message)"""
+    table, portal_id = _portal_table_and_id(portal)
+    status = "yes" if status_str in ["yes", "true", "1", "enable"] else "no"
+
+    def on_reply(result, error):
+        if error is not None:
+            callback(False, f"Failed to set permission for {app_id} in {portal_id} portal")
+            return
+        get_portal_index().update(app_id, _portal_name(table, portal_id), status)
+        callback(True, f"Permission set to {status} for {app_id} in {portal_id} portal")
+
+    portal_get_permission_store().call_async(
+        "SetPermission", GLib.Variant("(sbssas)", (table, False, portal_id, app_id, [status])), on_reply, cancellable)
+
 def screenshot_details(screenshot):
     # Try to get the image with required parameters
     try:
@@ -2278,17 +4842,33 @@ def main():
     parser.add_argument('--toggle-repo', type=str,
                        metavar=('ENABLE/DISABLE'),
                        help='Enable or disable a repository')
-    parser.add_argument('--install', type=str, metavar='APP_ID',
-                       help='Install a Flatpak package')
+    parser.add_argument('--install', type=str, metavar='APP_ID', nargs='+',
+                       help='Install one or more Flatpak packages in a single transaction')
     parser.add_argument('--remove', type=str, metavar='APP_ID',
                        help='Remove a Flatpak package')
     parser.add_argument('--update', type=str, metavar='APP_ID',
                        help='Update a Flatpak package')
     parser.add_argument('--update-all', action='store_true',
                        help='Update all Flatpak packages')
+    parser.add_argument('--update-order', type=str, choices=UPDATE_ORDERS, default='default',
+                        help='Order to apply --update-all in')
+    parser.add_argument('--update-batch-size', type=int, metavar='N',
+                        help='Split --update-all into transactions of at most N refs')
+    parser.add_argument('--stage-updates', action='store_true',
+                        help='Download pending updates without deploying them, so a later --update-all only deploys')
+    parser.add_argument('--bandwidth-limit', type=int, metavar='KIB_PER_SEC',
+                        help='Average download rate limit for --stage-updates')
+    parser.add_argument('--staging-status', action='store_true',
+                        help='Show which pending updates are already downloaded')
+    parser.add_argument('--plan', action='store_true',
+                        help='With --install, --remove, --update or --update-all: show download and disk usage estimates instead of running')
     parser.add_argument('--system', action='store_true', help='Install as system instead of user')
     parser.add_argument('--refresh', action='store_true', help='Install as system instead of user')
     parser.add_argument('--refresh-local', action='store_true', help='Install as system instead of user')
+    parser.add_argument('--appstream-backend', type=str, choices=APPSTREAM_BACKENDS,
+                        help='AppStream metadata loader to use (xml parses appstream.xml.gz, pool uses the AppStream.Pool cache)')
+    parser.add_argument('--benchmark-load', action='store_true',
+                        help='Report first-run and warm-start metadata load times for every AppStream backend')
     parser.add_argument('--add-file-perms', type=str, metavar='PATH',
                         help='Add file permissions to an app (e.g. any defaults: host, host-os, host-etc, home, or "/path/to/directory" for custom paths)')
     parser.add_argument('--remove-file-perms', type=str, metavar='PATH',
@@ -2328,6 +4908,20 @@ def main():
                         help='Add a permission value (e.g. "environment", "session_bus", "system_bus")')
     parser.add_argument('--global-remove-other-perm-values', type=str, metavar='TYPE',
                         help='Remove a permission value (e.g. "environment", "session_bus", "system_bus")')
+    parser.add_argument('--audit-permissions', action='store_true',
+                        help='Report the effective permissions of all installed apps, including overrides')
+    parser.add_argument('--output-format', type=str, choices=['text', 'json', 'csv'], default='text',
+                        help='Output format of --audit-permissions (default: text, lists flagged apps only)')
+    parser.add_argument('--export-profile', type=str, metavar='FILE',
+                        help='Export the permission overrides of the app given by --id as a profile')
+    parser.add_argument('--profile-effective', action='store_true',
+                        help='With --export-profile, export everything the app is granted, not just its overrides')
+    parser.add_argument('--apply-profile', type=str, metavar='FILE',
+                        help='Apply a permission profile to the apps given by --profile-apps')
+    parser.add_argument('--profile-apps', type=str, metavar='APP_ID', nargs='+',
+                        help='App ids or globs (e.g. "org.gnome.*") to apply --apply-profile to')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='With --apply-profile, only preview the changes')
     parser.add_argument('--get-app-portal-permissions', action='store_true',
                         help='Check specified portal permissions  (e.g. "background", "notifications", "microphone", "speakers", "camera", "location") for a specified application ID.')
     parser.add_argument('--get-portal-permissions',  type=str, metavar='TYPE',
@@ -2358,8 +4952,45 @@ def main():
         handle_remove_repo(args)
         return
 
+    if args.benchmark_load:
+        handle_benchmark_load(args)
+        return
+
+    if args.stage_updates:
+        handle_stage_updates(args)
+        return
+
+    if args.staging_status:
+        handle_staging_status(args)
+        return
+
+    if args.audit_permissions:
+        handle_audit_permissions(args)
+        return
+
+    if args.get_all_portal_permissions:
+        # One lookup per portal, pivoted to one line per app
+        result = get_portal_index().all_permissions()
+        if result:
+            print("\nPortal Permissions:")
+            print("-" * 50)
+            for app_id, permissions in sorted(result.items()):
+                print(f"{app_id}: " + ", ".join(f"{portal}={value}" for portal, value in permissions.items()))
+        else:
+            print("No app permissions found set for any portals")
+        return
+
+    # Profiles only touch permission files, don't load the catalog for them
+    if args.export_profile:
+        handle_export_profile(args)
+        return
+
+    if args.apply_profile:
+        handle_apply_profile(args)
+        return
+
     # Handle package operations
-    searcher = get_reposearcher(args.system)
+    searcher = get_reposearcher(args.system, False, args.appstream_backend)
 
     if args.install:
         handle_install(args, searcher)
@@ -2461,17 +5092,6 @@ def main():
         else:
             print("Missing options. Use -h for help.")
 
-    if args.get_all_portal_permissions:
-        result = portal_lookup_all()
-        if result:
-            print("\nPortal Permissions:")
-            print("-" * 50)
-            for portal_id, permissions in result:
-                print(f"{portal_id}: {permissions}")
-        else:
-            print("No app permissions found set for any portals")
-        return
-
     if args.get_portal_permissions:
         result = portal_lookup(args.get_portal_permissions)
         if result:
@@ -2515,33 +5135,104 @@ def handle_remove_repo(args):
     repodelete(args.remove_repo, args.system)
     print(f"\nRepository removed successfully: {args.remove_repo}")
 
+def handle_benchmark_load(args):
+    results = benchmark_appstream_backends(args.system)
+    print("\nAppStream load times:")
+    for backend, timing in results.items():
+        print(f"{backend}: first {timing['first']:.3f}s, warm {timing['warm']:.3f}s ({timing['packages']} packages)")
+        for remote_name, seconds in timing['remotes'].items():
+            print(f"  - {remote_name}: {seconds:.3f}s")
+
+def handle_stage_updates(args):
+    limit = args.bandwidth_limit * 1024 if args.bandwidth_limit else None
+    stager = UpdateStager(args.system, limit)
+    stager.run(print_transaction_progress())
+    if stager.skipped_reason:
+        print(f"Staging skipped: {stager.skipped_reason}")
+    if stager.last_error:
+        print(stager.last_error)
+    handle_staging_status(args, stager)
+
+def handle_staging_status(args, stager=None):
+    if stager is None:
+        stager = UpdateStager(args.system)
+    status = stager.status()
+    print(f"Staged: {len(status['staged'])} update(s), {GLib.format_size(status['staged_bytes'])} downloaded")
+    for ref in status['staged']:
+        print(f"  - {ref}")
+    print(f"Pending: {len(status['pending'])} update(s)")
+    for ref in status['pending']:
+        print(f"  - {ref}")
+    if status['bandwidth_limit']:
+        print(f"Bandwidth limit: {GLib.format_size(status['bandwidth_limit'])}/s")
+
+def handle_audit_permissions(args):
+    report = audit_permissions(args.system, [args.id] if args.id else None)
+    write_permission_audit(report, args.output_format)
+
+def handle_export_profile(args):
+    if not args.id:
+        print("--export-profile requires --id")
+        return
+    try:
+        profile = export_permission_profile(args.id, args.system, args.profile_effective)
+        with open(args.export_profile, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, indent=2)
+    except (GLib.Error, IOError) as e:
+        print(f"Failed to export profile: {str(e)}")
+        return
+    print(f"Exported permission profile of {args.id} to {args.export_profile}")
+
+def handle_apply_profile(args):
+    if not args.profile_apps:
+        print("--apply-profile requires --profile-apps")
+        return
+    try:
+        profile = load_permission_profile(args.apply_profile)
+    except (IOError, ValueError) as e:
+        print(f"Invalid profile {args.apply_profile}: {str(e)}")
+        return
+    success, message, diffs = apply_permission_profile(profile, args.profile_apps, args.system, args.dry_run)
+    for app_id, lines in diffs.items():
+        print(f"{app_id}:")
+        for line in lines or ["(overrides change, effective permissions stay the same)"]:
+            print(f"  {line}")
+    print(message)
+
 def handle_install(args, searcher):
-    if args.install.endswith('.flatpakref'):
-        try:
-            success, message = install_flatpakref(args.install, args.system)
-            result_message = f"{message}"
-        except GLib.Error as e:
-            result_message = f"Installation of {args.install} failed: {str(e)}"
-        print(result_message)
-    else:
-        packagelist = searcher.search_flatpak(args.install, args.repo)
-        result_message = ""
-        for package in packagelist:
+    queue = TransactionQueue(args.system)
+    for app_id in args.install:
+        if app_id.endswith('.flatpakref'):
             try:
-                success, message = install_flatpak(package, args.repo, args.system)
+                success, message = install_flatpakref(app_id, args.system, print_transaction_progress())
                 result_message = f"{message}"
-                break
             except GLib.Error as e:
-                result_message = f"Installation of {args.install} failed: {str(e)}"
-                pass
-        print(result_message)
+                result_message = f"Installation of {app_id} failed: {str(e)}"
+            print(result_message)
+            continue
+        packagelist = searcher.search_flatpak(app_id, args.repo)
+        if not packagelist:
+            print(f"No package named {app_id} found.")
+            continue
+        queue.add_install(packagelist[0], args.repo)
+
+    if queue and args.plan:
+        print(queue.plan())
+    elif queue:
+        success, message = queue.run(print_transaction_progress())
+        print(message)
 
 def handle_remove(args, searcher):
     packagelist = searcher.search_flatpak(args.remove, args.repo)
+    if args.plan and packagelist:
+        queue = TransactionQueue(args.system)
+        queue.add_remove(packagelist[0])
+        print(queue.plan())
+        return
     result_message = ""
     for package in packagelist:
         try:
-            success, message = remove_flatpak(package, args.system)
+            success, message = remove_flatpak(package, args.system, print_transaction_progress())
             result_message = f"{message}"
             break
         except GLib.Error as e:
@@ -2551,10 +5242,15 @@ def handle_remove(args, searcher):
 
 def handle_update(args, searcher):
     packagelist = searcher.search_flatpak(args.update)
+    if args.plan and packagelist:
+        queue = TransactionQueue(args.system)
+        queue.add_update(packagelist[0])
+        print(queue.plan())
+        return
     result_message = ""
     for package in packagelist:
         try:
-            success, message = update_flatpak(package, args.system)
+            success, message = update_flatpak(package, args.system, print_transaction_progress())
             result_message = f"{message}"
             break
         except GLib.Error as e:
@@ -2563,17 +5259,12 @@ def handle_update(args, searcher):
     print(result_message)
 
 def handle_update_all(args, searcher):
-    packagelist = searcher.search_flatpak(args.update)
-    result_message = ""
-    for package in packagelist:
-        try:
-            success, message = update_all_flatpaks(package, args.system)
-            result_message = f"{message}"
-            break
-        except GLib.Error as e:
-            result_message = f"Unable to apply updates: {str(e)}"
-            pass
-    print(result_message)
+    if args.plan:
+        print(plan_update_all(args.system))
+        return
+    success, message = update_all_flatpaks(None, args.system, print_transaction_progress(),
+                                           args.update_order, args.update_batch_size)
+    print(message)
 
 def handle_list_installed(args, searcher):
     installed_apps = searcher.get_installed_apps(args.system)
@@ -2789,7 +5480,7 @@ def handle_set_app_portal_permissions(args, searcher):
     try:
         success, message = portal_set_app_permissions(args.set_app_portal_permissions, args.id, status_str)
         print(f"{message}")
-    except dbus.exceptions.DBusException as e:
+    except GLib.Error as e:
         print(f"{str(e)}")
 
 def handle_get_app_portal_permissions(args, searcher):
@@ -2799,7 +5490,7 @@ def handle_get_app_portal_permissions(args, searcher):
     try:
         success, message = portal_get_app_permissions(args.id)
         print(f"{message}")
-    except dbus.exceptions.DBusException as e:
+    except GLib.Error as e:
         print(f"{str(e)}")
 
 